@@ -1,78 +1,216 @@
+import argparse
 import json
 import os
-from booking_agent import BookingAgent
+from booking_agent import BookingAgent, BYPASS_AGENT_CACHE
+from modules.concurrency import DEFAULT_WORKERS
+from modules.llm_cache import llm_cache
+from modules.fingerprints import Manifest, MANIFEST_PATH, fingerprint, question_key, record_test_key
+from modules.jsonl_store import (
+    read_records,
+    read_checkpoint,
+    iter_jsonl,
+    jsonl_path,
+    OrderedJsonlWriter,
+    export_json,
+)
+from modules.progress import make_progress
+from modules.lm_registry import lm_registry, add_model_argument
+from modules.call_layer import call_layer
+from modules.metrics import reused_metrics, summarize_stage, format_stage
+from modules.sharding import add_shard_argument, select_shard, shard_path
+from modules.scheduling import add_scheduling_arguments, previous_statuses, failure_first, count_failing
+from modules.sampling import add_sample_arguments, sample_records, sample_path
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
+
+# ------------------- CLI OPTIONS -------------------
+parser = argparse.ArgumentParser(description="Ask the booking agent every question in the suite.")
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=DEFAULT_WORKERS,
+    help=f"Concurrent agent requests (default: {DEFAULT_WORKERS}, env PIPELINE_WORKERS; 1 = sequential)"
+)
+parser.add_argument(
+    "--no-agent-cache",
+    action="store_true",
+    default=BYPASS_AGENT_CACHE,
+    help="Always query the live agent instead of reusing cached answers (env LLM_CACHE_BYPASS_AGENT=1)"
+)
+parser.add_argument(
+    "--full",
+    action="store_true",
+    help="Re-ask every question instead of reusing answers whose fingerprint is unchanged"
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Continue an interrupted run: skip questions already written to agent_responses.jsonl"
+)
+# Nothing is judged here, so this stage only reorders; compare.py / run_pipeline.py can abort early
+add_scheduling_arguments(parser, abort=False)
+add_sample_arguments(parser)
+add_shard_argument(parser)
+add_model_argument(parser)
+args = parser.parse_args()
+lm_registry.configure(model=args.model)
 
 # ------------------- SETUP -------------------
 console = Console()
 INPUT_PATH = "outputs/expected_results.json"
-OUTPUT_PATH = "outputs/agent_responses.json"
+REPORT_PATH = shard_path("outputs/comparison_report.json", args.shard)
+# Sampled runs write *.sample.* files, so a smoke run never replaces the full suite's answers
+OUTPUT_PATH = shard_path(sample_path("outputs/agent_responses.json", args.sample), args.shard)
+CHECKPOINT_PATH = jsonl_path(OUTPUT_PATH)
 
 os.makedirs("outputs", exist_ok=True)
 
 # ------------------- LOAD QUESTIONS -------------------
 console.print("\n[bold cyan]📂 Loading Questions...[/bold cyan]")
 
-if not os.path.exists(INPUT_PATH):
+if not os.path.exists(INPUT_PATH) and not os.path.exists(jsonl_path(INPUT_PATH)):
     console.print(f"[red]❌ Error: {INPUT_PATH} not found![/red]")
     console.print("[yellow]💡 Run convert_json_to_dict.py first.[/yellow]")
     exit(1)
 
-with open(INPUT_PATH, "r", encoding="utf-8") as f:
-    expected_results = json.load(f)
+suite = read_records(INPUT_PATH)
+if args.sample:
+    # Smoke mode: the same stratified sample `compare.py --sample` will judge (same size and seed)
+    suite, plan = sample_records(suite, previous_statuses("outputs/comparison_report.json"), args.sample, args.sample_seed)
+    console.print(f"[dim]🎲 Sampled {plan['size']} of {plan['population']} questions across {len(plan['strata'])} strata (seed {args.sample_seed})[/dim]")
+
+# Each answer carries its test's stable key so compare.py can join on it instead of position
+entries = [{"test_key": record_test_key(entry), "question": entry["question"]} for entry in suite]
+if args.shard:
+    total = len(entries)
+    entries = select_shard(entries, args.shard)
+    console.print(f"[dim]🧩 Shard {args.shard[0]}/{args.shard[1]}: {len(entries)} of {total} questions[/dim]")
+questions = [entry["question"] for entry in entries]
 
-console.print(f"[green]✅ Loaded {len(expected_results)} questions[/green]")
+console.print(f"[green]✅ Loaded {len(questions)} questions[/green]")
 
 # ------------------- INITIALIZE AGENT -------------------
 console.print("\n[bold cyan]🤖 Initializing Booking Agent...[/bold cyan]")
-agent = BookingAgent()
+agent = BookingAgent(use_cache=not args.no_agent_cache)
 console.print("[green]✅ Agent ready[/green]\n")
 
+# ------------------- INCREMENTAL REUSE -------------------
+# An answer is reused when its question and the agent (model + signature) are unchanged
+# Each shard (and a sampled run) keeps its own manifest so it never overwrites the full run's fingerprints
+manifest = Manifest(shard_path(sample_path(MANIFEST_PATH, args.sample), args.shard))
+agent_fp = agent.fingerprint()
+previous_answers = {}
+if not args.full:
+    try:
+        # Failed questions (agent_answer None) are never reused, so the next run asks them again
+        previous_answers = {
+            row["question"]: row["agent_answer"] for row in read_records(OUTPUT_PATH) if row.get("agent_answer") is not None
+        }
+    except (json.JSONDecodeError, KeyError, TypeError):
+        previous_answers = {}
+
+# ------------------- RESUME CHECKPOINT -------------------
+# agent_responses.jsonl is always an in-order prefix of the suite, so resuming skips that prefix
+checkpoint = []
+if args.resume:
+    checkpoint = read_checkpoint(
+        CHECKPOINT_PATH,
+        matches=lambda idx, row: (
+            idx < len(entries)
+            and row.get("question") == questions[idx]
+            and row.get("test_key", entries[idx]["test_key"]) == entries[idx]["test_key"]
+        )
+    )
+    console.print(f"[dim]⏯ Resuming after {len(checkpoint)} answers already in {CHECKPOINT_PATH}[/dim]")
+
+writer = OrderedJsonlWriter(CHECKPOINT_PATH, append=args.resume, start=len(checkpoint))
+
+fingerprints = {}
+todo = []
+for idx, question in enumerate(questions):
+    key = question_key(question)
+    fp = fingerprint(question, agent_fp)
+    fingerprints[key] = fp
+    if idx < len(checkpoint):
+        continue
+    if question in previous_answers and manifest.is_fresh("ask", key, fp):
+        writer.put(idx, {**entries[idx], "agent_answer": previous_answers[question], "metrics": reused_metrics()})
+    else:
+        todo.append(idx)
+
 # ------------------- ASK AGENT FOR EACH QUESTION -------------------
 console.print("[bold cyan]💬 Asking Agent Questions...[/bold cyan]\n")
+console.print(f"[dim]♻ Reusing {len(questions) - len(todo)} unchanged answers, asking {len(todo)}[/dim]\n")
+
+if not args.no_failure_first:
+    # Ask the questions that failed in the last comparison first; answers are still saved in suite order
+    statuses = previous_statuses(REPORT_PATH)
+    keys = [entries[idx]["test_key"] for idx in todo]
+    todo = [todo[position] for position in failure_first(keys, statuses)]
+    if count_failing(keys, statuses):
+        console.print(f"[dim]⏩ {count_failing(keys, statuses)} previously failing question(s) asked first[/dim]\n")
 
-agent_responses = []
+if todo:
+    # Configure dspy from the main thread before the worker pool starts
+    lm_registry.get_lm()
 
-with Progress(
-    SpinnerColumn(),
-    TextColumn("[progress.description]{task.description}"),
-    console=console,
-) as progress:
+with make_progress(console, unit="q") as progress:
     
-    task = progress.add_task("[cyan]Processing questions...", total=len(expected_results))
+    task = progress.add_task(
+        f"[cyan]Processing questions ({max(args.workers, 1)} workers)...",
+        total=len(todo)
+    )
     
-    for idx, entry in enumerate(expected_results, 1):
-        question = entry["question"]
-        
-        progress.update(task, description=f"[cyan]Processing {idx}/{len(expected_results)}: {question[:50]}...")
-        
-        # Ask the agent
-        agent_answer = agent.respond(question)
-        
-        # Save the response
-        agent_responses.append({
-            "question": question,
-            "agent_answer": agent_answer
-        })
-        
+    def record_answer(slot, outcome):
+        # Answers arrive in completion order; the writer appends them in question order
+        idx = todo[slot]
+        writer.put(idx, {**entries[idx], **outcome})
         progress.update(task, advance=1)
-
-console.print(f"\n[green]✅ Collected {len(agent_responses)} responses[/green]")
+    
+    outcomes = agent.respond_many(
+        [questions[idx] for idx in todo],
+        max_workers=args.workers,
+        on_result=record_answer,
+        tracked=True
+    )
+
+writer.close()
+
+console.print(f"\n[green]✅ Collected {writer.next_index} responses[/green]")
+console.print(f"[dim]LLM cache: {llm_cache.format_stats()}[/dim]")
+console.print(f"[dim]LLM calls: {call_layer.format_stats()}[/dim]")
+if outcomes:
+    console.print(f"[dim]{format_stage('ask', summarize_stage([o['metrics'] for o in outcomes]))}[/dim]")
+failed_questions = [o for o in outcomes if "error" in o]
+if failed_questions:
+    console.print(
+        f"[red]❌ {len(failed_questions)} question(s) got no answer; they are saved with an `error` "
+        f"and will be asked again next run. First error: {failed_questions[0]['error']}[/red]"
+    )
 
 # ------------------- SAVE AGENT RESPONSES -------------------
 console.print("\n[bold cyan]💾 Saving Agent Responses...[/bold cyan]")
 
-with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-    json.dump(agent_responses, f, indent=2, ensure_ascii=False)
+# The classic JSON array stays available as an export of the JSONL stream
+export_json(iter_jsonl(CHECKPOINT_PATH), OUTPUT_PATH)
 
-console.print(f"[green]✅ Responses saved to {OUTPUT_PATH}[/green]")
+# Record fingerprints only once the output file is on disk
+manifest.update_stage("ask", fingerprints)
+manifest.save()
+
+console.print(f"[green]✅ Responses saved to {CHECKPOINT_PATH} (export: {OUTPUT_PATH})[/green]")
 
 # ------------------- PREVIEW -------------------
 console.print("\n[bold cyan]👀 Preview (First 3 responses):[/bold cyan]")
-for i, entry in enumerate(agent_responses[:3], 1):
+preview = []
+for entry in iter_jsonl(CHECKPOINT_PATH):
+    preview.append(entry)
+    if len(preview) == 3:
+        break
+
+for i, entry in enumerate(preview, 1):
     console.print(f"\n[yellow]Response {i}:[/yellow]")
     console.print(f"  Question: {entry['question']}")
-    console.print(f"  Agent Answer: {entry['agent_answer']}")
+    answer = entry["agent_answer"] if entry.get("agent_answer") is not None else f"[red]❌ {entry.get('error')}[/red]"
+    console.print(f"  Agent Answer: {answer}")
 
-console.print(f"\n[dim]Total responses: {len(agent_responses)}[/dim]\n")
\ No newline at end of file
+console.print(f"\n[dim]Total responses: {writer.next_index}[/dim]\n")
\ No newline at end of file
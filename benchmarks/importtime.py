@@ -0,0 +1,135 @@
+"""
+Cold-start / import-time measurements for the pipeline's entry points.
+
+For every target this runs a fresh interpreter a few times and records:
+  - wall time of the process (median), and
+  - total import time reported by `python -X importtime` (median), plus the
+    slowest top-level imports.
+
+Targets are measured in the current tree and, with `--baseline REF`, in a
+clean export of another git revision, so the before/after numbers come from
+the same machine and interpreter. Run from the repository root with the full
+requirements installed:
+
+    python -m benchmarks.importtime --baseline HEAD~1
+    python -m benchmarks.importtime --output benchmarks/results/importtime.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# name -> interpreter arguments (scripts are timed with --help, which exits right after the imports)
+TARGETS = {
+    "compare.py --help": ["compare.py", "--help"],
+    "ask_agent_save_response.py --help": ["ask_agent_save_response.py", "--help"],
+    "main.py --help": ["main.py", "--help"],
+    "run_pipeline.py --help": ["run_pipeline.py", "--help"],
+    "import convert deps": ["-c", "import modules.fingerprints, modules.jsonl_store, rich.console"],
+    "import booking_agent": ["-c", "import booking_agent"],
+    "import modules.test_case_processor": ["-c", "import modules.test_case_processor"],
+    "import modules.judge": ["-c", "import modules.judge"],
+}
+
+
+# ------------------- MEASUREMENT -------------------
+def parse_importtime(stderr: str) -> tuple:
+    """(total microseconds, [(module, cumulative us)] of top-level imports) from -X importtime output"""
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not name.startswith("  "):
+            top_level.append((name.strip(), int(cumulative)))
+    return sum(us for _, us in top_level), top_level
+
+
+def measure(cwd: str, argv: list, repeat: int) -> dict:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    walls, totals, top_level, error = [], [], [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        plain = subprocess.run([sys.executable, *argv], cwd=cwd, env=env, capture_output=True, text=True)
+        walls.append(time.perf_counter() - start)
+        if plain.returncode != 0:
+            error = (plain.stderr or plain.stdout).strip().splitlines()[-1:] or ["non-zero exit"]
+            break
+        traced = subprocess.run(
+            [sys.executable, "-X", "importtime", *argv], cwd=cwd, env=env, capture_output=True, text=True
+        )
+        total, top_level = parse_importtime(traced.stderr)
+        totals.append(total)
+
+    if error:
+        return {"error": error[0]}
+    return {
+        "wall_ms": round(statistics.median(walls) * 1000, 1),
+        "import_ms": round(statistics.median(totals) / 1000, 1),
+        "slowest_imports": [
+            {"module": name, "ms": round(us / 1000, 1)}
+            for name, us in sorted(top_level, key=lambda item: -item[1])[:5]
+        ],
+    }
+
+
+def export_revision(ref: str, dest: str):
+    """Write a clean copy of `ref` into `dest` (outputs/ and caches are not part of it)"""
+    archive = subprocess.run(["git", "archive", "--format=tar", ref], capture_output=True, check=True)
+    subprocess.run(["tar", "-x", "-C", dest], input=archive.stdout, check=True)
+
+
+def git_revision(ref: str = "HEAD") -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", ref], capture_output=True, text=True)
+    return result.stdout.strip() or ref
+
+
+# ------------------- MAIN -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start and import time of the entry points.")
+    parser.add_argument("--baseline", metavar="REF", help="Also measure this git revision (e.g. HEAD~1)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per target; medians are reported")
+    parser.add_argument("--output", default="outputs/importtime.json", help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    trees = {"current": (os.getcwd(), git_revision())}
+    tmp = None
+    if args.baseline:
+        tmp = tempfile.TemporaryDirectory()
+        export_revision(args.baseline, tmp.name)
+        trees["baseline"] = (tmp.name, git_revision(args.baseline))
+
+    results = {}
+    print(f"{'target':<38}" + "".join(f"{label + ' wall/import (ms)':>34}" for label in trees))
+    for name, argv in TARGETS.items():
+        row = {label: measure(path, argv, args.repeat) for label, (path, _) in trees.items()}
+        results[name] = row
+        cells = []
+        for label in trees:
+            m = row[label]
+            cells.append(f"{'error':>34}" if "error" in m else f"{m['wall_ms']:>24.0f} / {m['import_ms']:>7.0f}")
+        print(f"{name:<38}" + "".join(cells))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "revisions": {label: rev for label, (_, rev) in trees.items()},
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
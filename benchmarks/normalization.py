@@ -0,0 +1,163 @@
+"""
+Micro-benchmark for modules/normalization.py.
+
+Checks that the precompiled cleaners return byte-for-byte the same strings as
+the per-call regex versions they replaced, then times both on a synthetic
+corpus. Run from the repository root:
+
+    python -m benchmarks.normalization            # 1M strings
+    python -m benchmarks.normalization --n 100000
+"""
+import argparse
+import random
+import re
+import time
+from modules.normalization import (
+    clean_to_one_sentence,
+    clean_many,
+    clean_text,
+    normalize_text_sentence,
+    canonicalize_expected_output,
+)
+
+
+# ------------------- REFERENCE (previous implementations, verbatim) -------------------
+def legacy_clean_to_one_sentence(text,
+                                 allowed_punct=".,?:-()",
+                                 normalize_dashes=True):
+    if normalize_dashes:
+        text = re.sub(r"[\u2012\u2013\u2014\u2015]", "-", text)
+    text = re.sub(r"[\r\n\t]+", " ", text)
+    safe_punct = re.escape(allowed_punct)
+    pattern = rf"[^A-Za-z0-9\s{safe_punct}]"
+    text = re.sub(pattern, "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    m = re.search(r"[.?!]", text)
+    if m:
+        text = text[: m.end()]
+    return text
+
+
+def legacy_clean_text(text: str) -> str:
+    if not text:
+        return text
+    text = text.strip()
+    text = re.sub(r'^(user|agent)\s*:\s*', '', text, flags=re.IGNORECASE)
+    return text.strip()
+
+
+def legacy_normalize_text_sentence(s: str) -> str:
+    s = re.sub(r"\s*,\s*", ", ", s.strip())
+    s = re.sub(r"\s+", " ", s)
+    if not s:
+        return s
+    if not s.endswith((".", "?", "!")):
+        s += "."
+    return s[0].upper() + s[1:]
+
+
+def legacy_canonicalize_expected_output(raw_expected: str) -> (str, dict):
+    text = raw_expected.strip()
+    if re.match(r"^\s*agent\s*[:\-]\s*", text, re.I):
+        clean = re.sub(r"^\s*agent\s*[:\-]\s*", "", text, flags=re.I).strip()
+        return "Agent: " + legacy_normalize_text_sentence(clean), {"normalization": "agent_prefix_preserved"}
+
+    if "ask" in text.lower() or "," in text or "and" in text.lower():
+        t = re.sub(r"\b(ask|please|provide|give|send|enter)\b", "", text, flags=re.I)
+        t = re.sub(r"[:;]+", ",", t)
+        t = re.sub(r"\s*,\s*", ", ", t)
+        t = re.sub(r"\s+", " ", t).strip(" ,.")
+        canonical = f"Agent: To help you, please provide {t}."
+        return legacy_normalize_text_sentence(canonical), {"normalization": "list_to_agent_reply"}
+
+    return "Agent: " + legacy_normalize_text_sentence(text), {"normalization": "fallback_agent_prefix"}
+
+
+# ------------------- SYNTHETIC CORPUS -------------------
+WORDS = [
+    "book", "a", "flight", "to", "Paris", "please", "and", "ask", "for", "the", "date",
+    "passenger", "name", "email", "Agent", "should", "confirm", "seat", "café", "naïve",
+    "Zürich", "2024-05-01", "ASK", "Provide", "give", "send", "enter", "user", "agent",
+]
+NOISE = [
+    " ", " ", " ", "  ", "\n", "\r\n", "\t", " ", " ", "　", "\x0b", "\x0c", "\x1c", " ",
+    ".", ",", "?", "!", ":", ";", "-", "(", ")", "\"", "'", "/", "@", "#", "$", "%", "&", "*",
+    "‒", "–", "—", "―", "‐", "…", "é", "ß", "😀", "✈️", "→", "_",
+]
+PREFIXES = ["", "", "", "User: ", "agent : ", "AGENT- ", "  Agent:", "user:", "Agent -"]
+
+
+def make_corpus(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        parts = [rng.choice(PREFIXES)]
+        for _ in range(rng.randint(0, 24)):
+            parts.append(rng.choice(WORDS) if rng.random() < 0.6 else rng.choice(NOISE))
+            if rng.random() < 0.5:
+                parts.append(" ")
+        corpus.append("".join(parts))
+    return corpus
+
+
+# ------------------- HARNESS -------------------
+def timed(label: str, fn, results: dict):
+    start = time.perf_counter()
+    output = fn()
+    results[label] = time.perf_counter() - start
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify and time the text normalization functions.")
+    parser.add_argument("--n", type=int, default=1_000_000, help="Number of synthetic strings (default: 1,000,000)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.n, args.seed)
+    options = [{}, {"normalize_dashes": False}, {"allowed_punct": ".!"}, {"allowed_punct": ""}]
+    print(f"Corpus: {len(corpus):,} strings, {sum(map(len, corpus)):,} characters")
+
+    timings = {}
+    checks = [
+        ("clean_to_one_sentence",
+         lambda: [legacy_clean_to_one_sentence(t) for t in corpus],
+         lambda: [clean_to_one_sentence(t) for t in corpus]),
+        ("clean_many",
+         lambda: [legacy_clean_to_one_sentence(t) for t in corpus],
+         lambda: clean_many(corpus)),
+        ("clean_text",
+         lambda: [legacy_clean_text(t) for t in corpus],
+         lambda: [clean_text(t) for t in corpus]),
+        ("normalize_text_sentence",
+         lambda: [legacy_normalize_text_sentence(t) for t in corpus],
+         lambda: [normalize_text_sentence(t) for t in corpus]),
+        ("canonicalize_expected_output",
+         lambda: [legacy_canonicalize_expected_output(t) for t in corpus],
+         lambda: [canonicalize_expected_output(t) for t in corpus]),
+    ]
+
+    mismatches = 0
+    print(f"\n{'function':<32}{'legacy (s)':>12}{'new (s)':>12}{'speedup':>10}  identical")
+    for name, legacy, new in checks:
+        expected = timed(f"{name}:legacy", legacy, timings)
+        actual = timed(f"{name}:new", new, timings)
+        identical = expected == actual
+        mismatches += not identical
+        old_s, new_s = timings[f"{name}:legacy"], timings[f"{name}:new"]
+        print(f"{name:<32}{old_s:>12.2f}{new_s:>12.2f}{old_s / new_s:>9.1f}x  {'yes' if identical else 'NO'}")
+
+    # Non-default option sets only need the equality check
+    sample = corpus[:100_000]
+    for opts in options[1:]:
+        same = [legacy_clean_to_one_sentence(t, **opts) for t in sample] == clean_many(sample, **opts)
+        mismatches += not same
+        print(f"clean_many({opts}): {'identical' if same else 'MISMATCH'}")
+
+    if mismatches:
+        raise SystemExit(f"\n❌ {mismatches} check(s) differ from the previous implementation")
+    print("\n✅ All outputs are byte-for-byte identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+End-to-end benchmark of every pipeline stage on synthetic suites, against the
+offline mock LM (modules/mock_lm.py), so no API key or network is needed.
+
+Each stage runs in its own interpreter so its peak RSS is its own:
+
+    ingest          main.py --batch (process_test_case / batched programs)
+    convert         convert_json_to_dict.py
+    ask             ask_agent_save_response.py --full
+    judge           compare.py --full (includes its own report export)
+    report          export_report of the judged rows to a fresh JSON report
+    dashboard_load  what the dashboard does on load: json.load + DataFrame + status filter
+
+Results (wall time, peak RSS, items/s, LLM calls/s) are written as JSON.
+Pass an earlier results file with --compare to flag regressions; the exit
+status is 1 when any stage got slower than --tolerance allows.
+
+    python -m benchmarks.pipeline                         # 1k, 10k, 100k
+    python -m benchmarks.pipeline --sizes 1000 --latency-ms 5
+    python -m benchmarks.pipeline --compare outputs/benchmarks/pipeline-abc123.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ["ingest", "convert", "ask", "judge", "report", "dashboard_load"]
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+# ------------------- SYNTHETIC SUITE -------------------
+SYLLABLES = ["ka", "ro", "mi", "ten", "sa", "lu", "ve", "do", "pri", "nal", "zo", "qui", "ber", "tas", "hu", "fen"]
+VOCAB_SIZE = 5000
+
+
+def make_vocabulary(rng) -> list:
+    words = set()
+    while len(words) < VOCAB_SIZE:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_suite(n: int, seed: int = 0) -> list:
+    """
+    n distinct raw test descriptions: ~40% explicit Q&A, ~40% behavioral (both caught
+    by the rules) and ~20% ambiguous ones that need the LLM classifier. Words come
+    from a random vocabulary so cases are not near duplicates of each other.
+    """
+    rng = random.Random(seed)
+    vocab = make_vocabulary(rng)
+
+    def phrase(k):
+        return " ".join(rng.choice(vocab) for _ in range(k))
+
+    suite = []
+    for idx in range(n):
+        kind = rng.random()
+        if kind < 0.4:
+            text = f"Question: can I book the {phrase(4)} room? Answer: yes, the {phrase(3)} room is available."
+        elif kind < 0.8:
+            text = f"When the user asks about {phrase(4)}, the agent should ask for the {phrase(2)} details."
+        else:
+            text = f"Agent greets {phrase(3)} and confirms {phrase(3)} booking {idx}."
+        suite.append(text)
+    return suite
+
+
+# ------------------- STAGE RUNNERS (child process) -------------------
+def run_script(script: str, argv: list):
+    sys.argv = [script, *argv]
+    try:
+        runpy.run_path(os.path.join(ROOT, script), run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise
+
+
+def stage_items(stage: str) -> int:
+    """How many items a stage processed, read back from what it wrote"""
+    from modules.jsonl_store import read_records
+    paths = {
+        "ingest": "outputs/test_cases.json",
+        "convert": "outputs/expected_results.json",
+        "ask": "outputs/agent_responses.json",
+        "judge": "outputs/comparison_report.json",
+        "report": "outputs/comparison_report.json",
+        "dashboard_load": "outputs/comparison_report.json",
+    }
+    return sum(1 for _ in read_records(paths[stage]))
+
+
+def run_stage(stage: str, opts) -> dict:
+    workers = str(opts.workers)
+    start = time.perf_counter()
+
+    if stage == "ingest":
+        run_script("main.py", [
+            "--batch", "suite.txt", "--format", "text", "--model", "mock",
+            "--workers", workers, "--llm-batch-size", str(opts.llm_batch_size)
+        ])
+    elif stage == "convert":
+        run_script("convert_json_to_dict.py", [])
+    elif stage == "ask":
+        run_script("ask_agent_save_response.py", ["--model", "mock", "--workers", workers, "--full"])
+    elif stage == "judge":
+        run_script("compare.py", ["--model", "mock", "--workers", workers, "--method", opts.method, "--full"])
+    elif stage == "report":
+        from modules.jsonl_store import iter_jsonl, export_report
+        from modules.judge import summarize
+        rows = list(iter_jsonl("outputs/comparison_report.jsonl"))
+        header = {"timestamp": "benchmark", "comparison_method": opts.method, "summary": summarize(rows)}
+        export_report(header, rows, "outputs/benchmark_report.json")
+    elif stage == "dashboard_load":
+        import pandas as pd
+        with open("outputs/comparison_report.json", "r", encoding="utf-8") as f:
+            report = json.load(f)
+        comparisons = report.get("comparisons", [])
+        pd.DataFrame(comparisons)
+        [c for c in comparisons if c["status"] in ["PASS", "PARTIAL", "FAIL"] and c["similarity_score"] >= 0]
+
+    wall = time.perf_counter() - start
+    from modules.lm_registry import lm_registry
+    usage = lm_registry.usage()
+    items = stage_items(stage)
+    return {
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "items": items,
+        "items_per_s": round(items / wall, 1) if wall else None,
+        "llm_calls": usage.get("calls", 0),
+        "llm_calls_per_s": round(usage.get("calls", 0) / wall, 1) if wall else None,
+        "llm_errors": usage.get("errors", 0),
+    }
+
+
+# ------------------- ORCHESTRATION (parent process) -------------------
+def child_env(opts, workdir: str) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        "LLM_MODEL": "mock",
+        "MOCK_LM_LATENCY_MS": str(opts.latency_ms),
+        "MOCK_LM_JITTER_MS": str(opts.jitter_ms),
+        "MOCK_LM_ERROR_RATE": str(opts.error_rate),
+        "LLM_CACHE_PATH": os.path.join(workdir, "outputs", "llm_cache.sqlite"),
+        "LOCAL_CLASSIFIER_DISABLE": "1",
+        "PIPELINE_WORKERS": str(opts.workers),
+    }
+    if opts.no_cache:
+        env["LLM_CACHE_DISABLE"] = "1"
+    return env
+
+
+def benchmark_size(size: int, opts) -> list:
+    workdir = tempfile.mkdtemp(prefix=f"bench-{size}-")
+    os.makedirs(os.path.join(workdir, "outputs"))
+    with open(os.path.join(workdir, "suite.txt"), "w", encoding="utf-8") as f:
+        f.write("\n\n".join(make_suite(size, opts.seed)) + "\n")
+
+    rows = []
+    failed = False
+    for stage in opts.stages:
+        if failed:
+            rows.append({"size": size, "stage": stage, "skipped": True})
+            continue
+        result_path = os.path.join(workdir, f"{stage}.result.json")
+        with open(os.path.join(workdir, f"{stage}.log"), "w", encoding="utf-8") as log:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.pipeline", "--run-stage", stage, "--result", result_path,
+                 "--workers", str(opts.workers), "--llm-batch-size", str(opts.llm_batch_size), "--method", opts.method],
+                cwd=workdir, env=child_env(opts, workdir), stdout=log, stderr=subprocess.STDOUT
+            )
+        if proc.returncode != 0 or not os.path.exists(result_path):
+            failed = True
+            rows.append({"size": size, "stage": stage, "error": f"exit {proc.returncode}; see {workdir}/{stage}.log"})
+            print(f"  {size:>7} {stage:<15} FAILED (log: {workdir}/{stage}.log)")
+            continue
+        with open(result_path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        rows.append({"size": size, "stage": stage, **result})
+        print(
+            f"  {size:>7} {stage:<15} {result['wall_s']:>9.2f}s {result['peak_rss_mb']:>8.0f} MB "
+            f"{result['items_per_s'] or 0:>10.0f} items/s {result['llm_calls_per_s'] or 0:>8.0f} LLM calls/s"
+        )
+
+    if not opts.keep and not failed:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return rows
+
+
+def compare_results(current: list, baseline_path: str, tolerance: float) -> int:
+    """Print wall-time ratios against a previous results file; returns the number of regressions"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["size"], r["stage"]): r for r in json.load(f)["results"] if "wall_s" in r}
+    regressions = 0
+    print(f"\nAgainst {baseline_path} (tolerance {tolerance:.0%}):")
+    for row in current:
+        before = baseline.get((row["size"], row["stage"]))
+        if "wall_s" not in row or before is None or not before["wall_s"]:
+            continue
+        ratio = row["wall_s"] / before["wall_s"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        regressions += bool(flag)
+        print(f"  {row['size']:>7} {row['stage']:<15} {before['wall_s']:>9.2f}s -> {row['wall_s']:>9.2f}s ({ratio:.2f}x) {flag}")
+    return regressions
+
+
+def git_revision() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or "unknown"
+
+
+# ------------------- MAIN -------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage against the mock LM.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Suite sizes (default: 1k 10k 100k)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--workers", type=int, default=32, help="Worker threads for the LLM stages")
+    parser.add_argument("--llm-batch-size", type=int, default=8, help="main.py --llm-batch-size for ingest")
+    parser.add_argument("--method", choices=["tiered", "cot", "vector"], default="tiered", help="compare.py --method")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock LM latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Mock LM latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock LM injected failure rate")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the LLM cache (default: a fresh cache per size)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="Keep the per-size working directories")
+    parser.add_argument("--output", help="Results file (default: outputs/benchmarks/pipeline-<revision>.json)")
+    parser.add_argument("--compare", metavar="RESULTS", help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown before flagging (default: 0.10)")
+    parser.add_argument("--run-stage", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    opts = parser.parse_args()
+
+    if opts.run_stage:
+        result = run_stage(opts.run_stage, opts)
+        with open(opts.result, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    from modules.mock_lm import mock_dspy
+
+    revision = git_revision()
+    # Without dspy the mock skips prompt formatting and output parsing, so timings are not comparable
+    adapter = mock_dspy() is not None
+    print(
+        f"Benchmarking {revision}: stages {', '.join(opts.stages)}; mock LM {opts.latency_ms:g}±{opts.jitter_ms:g} ms "
+        f"({'through the dspy adapter' if adapter else 'direct, dspy not installed'})"
+    )
+    results = []
+    for size in opts.sizes:
+        results.extend(benchmark_size(size, opts))
+
+    output = opts.output or os.path.join("outputs", "benchmarks", f"pipeline-{revision}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    report = {
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "workers": opts.workers,
+            "llm_batch_size": opts.llm_batch_size,
+            "method": opts.method,
+            "mock_latency_ms": opts.latency_ms,
+            "mock_jitter_ms": opts.jitter_ms,
+            "mock_error_rate": opts.error_rate,
+            "mock_dspy_adapter": adapter,
+            "llm_cache": not opts.no_cache,
+            "seed": opts.seed,
+        },
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if opts.compare and compare_results(results, opts.compare, opts.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,29 @@
 import os
-import dspy
-from dspy import LM
+import re
+from modules.concurrency import run_ordered, DEFAULT_WORKERS
+from modules.llm_cache import CachedPredictor
+from modules.metrics import track
+from modules.call_layer import LLMCallError
 
 # ------------------- SETUP OPENAI MODEL -------------------
+# The LM is created by modules.lm_registry on first use (model: --model / env LLM_MODEL)
 #os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "sk-xxx")
-lm = LM("openai/gpt-4o-mini")
-dspy.configure(lm=lm)
 
 
-# ------------------- BOOKING AGENT SIGNATURE -------------------
-class BookingAgentSignature(dspy.Signature):
-    """
-    A helpful booking agent that assists users with venue/room bookings.
-    
-    The agent should:
-    - Ask for missing information (campus, date, time, room type)
-    - Provide helpful responses
-    - Confirm bookings when all details are provided
-    """
-    user_query: str = dspy.InputField(desc="The user's booking-related query or request.")
-    agent_response: str = dspy.OutputField(desc="The agent's helpful response to the user.")
+# ------------------- BOOKING AGENT CLASS -------------------
+# Set LLM_CACHE_BYPASS_AGENT=1 to always query the live agent under test
+BYPASS_AGENT_CACHE = os.getenv("LLM_CACHE_BYPASS_AGENT", "0") == "1"
+
+
+def clean_response(response: str) -> str:
+    """Strip whitespace and a leading "Agent:" prefix (case insensitive)"""
+    response = re.sub(r'^(agent)\s*:\s*', '', response.strip(), flags=re.IGNORECASE)
+    return response.strip()
 
 
-# ------------------- BOOKING AGENT CLASS -------------------
 class BookingAgent:
-    def __init__(self):
-        self.agent = dspy.ChainOfThought(BookingAgentSignature)
+    def __init__(self, use_cache: bool = not BYPASS_AGENT_CACHE):
+        self.agent = CachedPredictor("agent", "signatures.booking_agent:BookingAgentSignature", bypass=not use_cache)
     
     def respond(self, user_query: str) -> str:
         """
@@ -36,18 +34,59 @@ class BookingAgent:
             
         Returns:
             The agent's response string (without "Agent:" prefix)
-        """
-        try:
-            result = self.agent(user_query=user_query)
-            response = result.agent_response.strip()
             
-            # Remove "Agent:" prefix if present (case insensitive)
-            import re
-            response = re.sub(r'^(agent)\s*:\s*', '', response, flags=re.IGNORECASE)
+        Raises:
+            LLMCallError: The agent could not be reached (after the call layer's retries).
+                Errors are never turned into an answer, so they cannot be judged as one.
+        """
+        result = self.agent(user_query=user_query)
+        return clean_response(result.agent_response)
+
+    def cached_response(self, user_query: str):
+        """The answer `respond` would return from the LLM cache, or None when it would call the LLM"""
+        cached = self.agent.peek(user_query=user_query)
+        if cached is None or cached.get("agent_response") is None:
+            return None
+        return clean_response(cached["agent_response"])
+
+    def respond_tracked(self, user_query: str) -> dict:
+        """
+        `respond` for batch runs: never raises, and reports what answering cost.
+        
+        Returns:
+            {"agent_answer": str, "metrics": {...}} or, when the agent failed,
+            {"agent_answer": None, "error": str, "metrics": {...}}
+        """
+        with track() as metrics:
+            try:
+                outcome = {"agent_answer": self.respond(user_query)}
+            except LLMCallError as e:
+                outcome = {"agent_answer": None, "error": str(e)}
+        outcome["metrics"] = metrics
+        return outcome
+
+    def fingerprint(self) -> str:
+        """Identity of the agent under test (model + signature), used by incremental runs"""
+        return self.agent.fingerprint()
+
+    def respond_many(self, user_queries, max_workers: int = DEFAULT_WORKERS, on_result=None, tracked: bool = False):
+        """
+        Answer many queries concurrently on a bounded worker pool.
+        
+        All workers share this agent's program and the single configured LM, so
+        requests go through one pooled HTTP client instead of one per question.
+        
+        Args:
+            user_queries: Iterable of user inputs/questions
+            max_workers: Maximum number of in-flight LLM requests
+            on_result: Optional callback(index, response) fired as each answer arrives
+            tracked: Return `respond_tracked` outcomes (answer or error, plus metrics) instead
             
-            return response.strip()
-        except Exception as e:
-            return f"I apologize, I encountered an error: {str(e)}"
+        Returns:
+            List of response strings in the same order as `user_queries`
+        """
+        respond = self.respond_tracked if tracked else self.respond
+        return run_ordered(respond, user_queries, max_workers=max_workers, on_result=on_result)
 
 
 # ------------------- STANDALONE USAGE -------------------
@@ -67,5 +106,9 @@ if __name__ == "__main__":
         if not user_input:
             continue
         
-        response = agent.respond(user_input)
+        try:
+            response = agent.respond(user_input)
+        except LLMCallError as e:
+            console.print(f"[red]❌ {e}[/red]\n")
+            continue
         console.print(f"[green]{response}[/green]\n")
\ No newline at end of file
@@ -1,7 +1,38 @@
+import argparse
 import json
 import os
-import dspy
-from dspy import LM
+import time
+from modules.concurrency import run_ordered, DEFAULT_WORKERS
+from modules.llm_cache import llm_cache
+from modules.comparison import LEXICAL_LOW, LEXICAL_HIGH
+from modules.similarity import VECTOR_PASS_SCORE
+from modules.judge import (
+    COMPARISON_METHODS,
+    build_comparison_row,
+    error_row,
+    fast_decisions as method_fast_decisions,
+    judge_fingerprint,
+    summarize,
+    PASSING_STATUSES,
+    STATUS_ERROR,
+)
+from modules.progress import make_progress
+from modules.lm_registry import lm_registry, add_model_argument
+from modules.call_layer import call_layer
+from modules.metrics import track, reused_metrics, format_performance
+from modules.run_history import new_run_id, record_run, HISTORY_PATH
+from modules.fingerprints import Manifest, MANIFEST_PATH, fingerprint, record_test_key
+from modules.sharding import add_shard_argument, in_shard, select_shard, shard_path
+from modules.scheduling import add_scheduling_arguments, previous_statuses, failure_first, count_failing, EarlyAbort
+from modules.sampling import add_sample_arguments, sample_records, summarize_sample, format_sample, sample_path
+from modules.jsonl_store import (
+    read_records,
+    read_checkpoint,
+    iter_jsonl,
+    jsonl_path,
+    OrderedJsonlWriter,
+    export_report,
+)
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -12,211 +43,443 @@ console = Console()
 EXPECTED_PATH = "outputs/expected_results.json"
 ACTUAL_PATH = "outputs/agent_responses.json"
 COMPARISON_OUTPUT = "outputs/comparison_report.json"
+CHECKPOINT_PATH = jsonl_path(COMPARISON_OUTPUT)
 
-os.makedirs("outputs", exist_ok=True)
 
-# ------------------- SETUP OPENAI MODEL -------------------
-#os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "")
-lm = LM("openai/gpt-4o-mini")
-dspy.configure(lm=lm)
-
-# ------------------- DSPY SIGNATURE FOR SEMANTIC COMPARISON -------------------
-class SemanticComparisonSignature(dspy.Signature):
-    """
-    Compare two answers semantically to determine if they convey the same meaning.
-    
-    Output JSON format:
-    {
-        "are_equivalent": true/false,
-        "similarity_score": 0-100,
-        "reasoning": "Brief explanation of comparison"
-    }
-    """
-    question: str = dspy.InputField(desc="The original question asked")
-    expected_answer: str = dspy.InputField(desc="The expected/reference answer")
-    actual_answer: str = dspy.InputField(desc="The actual answer given by the agent")
-    comparison_json: str = dspy.OutputField(desc="JSON with are_equivalent, similarity_score, and reasoning")
+# ------------------- CLI OPTIONS -------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Semantically compare agent answers against expected answers.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Concurrent judge requests (default: {DEFAULT_WORKERS}, env PIPELINE_WORKERS; 1 = sequential)"
+    )
+    parser.add_argument(
+        "--method",
+        choices=["tiered", "cot", "vector"],
+        default="tiered",
+        help=(
+            "tiered: exact match, then lexical overlap, then the LLM judge for uncertain rows; "
+            "cot: LLM judge for every row; vector: offline TF-IDF cosine only (no network)"
+        )
+    )
+    parser.add_argument(
+        "--lexical-scorer",
+        choices=["overlap", "tfidf"],
+        default="overlap",
+        help="Scorer for the tiered lexical pre-filter: token-set F1 or offline TF-IDF cosine"
+    )
+    parser.add_argument(
+        "--vector-pass-score",
+        type=float,
+        default=VECTOR_PASS_SCORE,
+        help=f"Cosine score (0-100) that counts as equivalent for --method vector (default: {VECTOR_PASS_SCORE:g})"
+    )
+    parser.add_argument(
+        "--lexical-band",
+        nargs=2,
+        type=float,
+        metavar=("LOW", "HIGH"),
+        default=[LEXICAL_LOW, LEXICAL_HIGH],
+        help=f"Token-overlap scores <= LOW fail and >= HIGH pass without the LLM (default: {LEXICAL_LOW:g} {LEXICAL_HIGH:g})"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-judge every row instead of reusing rows whose fingerprint is unchanged"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run: skip rows already written to comparison_report.jsonl"
+    )
+    add_scheduling_arguments(parser)
+    add_sample_arguments(parser)
+    add_shard_argument(parser)
+    add_model_argument(parser)
+    return parser.parse_args(argv)
 
-# Initialize Chain of Thought comparator
-semantic_comparator = dspy.ChainOfThought(SemanticComparisonSignature)
 
 # ------------------- LOAD DATA -------------------
-console.print("\n[bold cyan]📊 Loading Test Results...[/bold cyan]")
-
-# Load expected results
-if not os.path.exists(EXPECTED_PATH):
-    console.print(f"[red]❌ Error: {EXPECTED_PATH} not found![/red]")
-    exit(1)
-
-with open(EXPECTED_PATH, "r", encoding="utf-8") as f:
-    expected_results = json.load(f)
+def load_results(shard=None, sample=None, sample_seed=None):
+    """
+    Expected and actual rows (streamed from the JSONL stage outputs or their JSON exports),
+    plus the sample plan when `sample` is set (None otherwise).
 
-# Load actual results
-if not os.path.exists(ACTUAL_PATH):
-    console.print(f"[red]❌ Error: {ACTUAL_PATH} not found![/red]")
-    console.print("[yellow]💡 Run ask_agent_save_responses.py first.[/yellow]")
-    exit(1)
+    With a sample, only a stratified random subset of the tests is kept (chosen exactly as
+    `ask_agent_save_response.py --sample` chose it). With a shard, only that shard's tests
+    are kept. Answers come from the most specific agent_responses file that exists:
+    the (sampled) shard's own, then the sampled run's, then the full suite's.
+    """
+    console.print("\n[bold cyan]📊 Loading Test Results...[/bold cyan]")
+
+    if not os.path.exists(EXPECTED_PATH) and not os.path.exists(jsonl_path(EXPECTED_PATH)):
+        console.print(f"[red]❌ Error: {EXPECTED_PATH} not found![/red]")
+        exit(1)
+
+    expected_results = read_records(EXPECTED_PATH)
+    plan = None
+    if sample:
+        # Sample the whole suite before sharding, so every shard draws from the same sample
+        expected_results, plan = sample_records(expected_results, previous_statuses(COMPARISON_OUTPUT), sample, sample_seed)
+        console.print(f"[dim]🎲 Sampled {plan['size']} of {plan['population']} tests across {len(plan['strata'])} strata (seed {sample_seed})[/dim]")
+    expected_results = select_shard(expected_results, shard)
+
+    candidates = [shard_path(sample_path(ACTUAL_PATH, sample), shard), sample_path(ACTUAL_PATH, sample), ACTUAL_PATH]
+    actual_path = next((p for p in candidates if os.path.exists(p) or os.path.exists(jsonl_path(p))), None)
+    if actual_path is None:
+        console.print(f"[red]❌ Error: {ACTUAL_PATH} not found![/red]")
+        console.print("[yellow]💡 Run ask_agent_save_responses.py first.[/yellow]")
+        exit(1)
+
+    # Keyless answers (written before test keys) are kept; the question join decides for them
+    actual_results = [
+        row for row in read_records(actual_path)
+        if not row.get("test_key") or in_shard(row, shard)
+    ]
+    if actual_path != ACTUAL_PATH:
+        console.print(f"[dim]🧩 Answers from {actual_path}[/dim]")
+
+    console.print(f"[green]✅ Loaded {len(expected_results)} expected results[/green]")
+    console.print(f"[green]✅ Loaded {len(actual_results)} actual results[/green]\n")
+    return expected_results, actual_results, plan
+
+
+# ------------------- JOIN -------------------
+def match_results(expected_results, actual_results) -> tuple:
+    """
+    Hash-join expected and actual rows on their stable test key (in expected order).
 
-with open(ACTUAL_PATH, "r", encoding="utf-8") as f:
-    actual_results = json.load(f)
+    Answers written before test keys existed are matched on the question instead.
+    Returns (matched pairs, expected rows without an answer, answers without a test).
+    """
+    by_key = {}
+    by_question = {}
+    for actual in actual_results:
+        if actual.get("test_key"):
+            by_key.setdefault(actual["test_key"], actual)
+        else:
+            by_question.setdefault(actual.get("question", ""), actual)
+
+    matched = []
+    missing = []
+    used = set()
+    for expected in expected_results:
+        key = record_test_key(expected)
+        actual = by_key.get(key) or by_question.get(expected["question"])
+        if actual is None:
+            missing.append(expected)
+            continue
+        used.add(id(actual))
+        matched.append((expected, actual))
+
+    orphans = [a for a in [*by_key.values(), *by_question.values()] if id(a) not in used]
+    return matched, missing, orphans
+
+
+def report_unmatched(missing, orphans):
+    """Warn about rows the join could not pair instead of dropping them silently"""
+    if missing:
+        console.print(f"[yellow]⚠ {len(missing)} expected test(s) have no agent answer and are not judged:[/yellow]")
+        for row in missing[:5]:
+            console.print(f"  [dim]{record_test_key(row)}[/dim] {row['question'][:70]}")
+        console.print("[yellow]💡 Run ask_agent_save_response.py to answer them.[/yellow]")
+    if orphans:
+        console.print(f"[yellow]⚠ {len(orphans)} agent answer(s) match no expected test (stale answers?); ignored[/yellow]")
+    if missing or orphans:
+        console.print()
 
-console.print(f"[green]✅ Loaded {len(expected_results)} expected results[/green]")
-console.print(f"[green]✅ Loaded {len(actual_results)} actual results[/green]\n")
 
 # ------------------- SEMANTIC COMPARISON LOGIC -------------------
-def compare_answers_semantic(question: str, expected: str, actual: str) -> dict:
-    """Use DSPy Chain of Thought to semantically compare answers"""
-    try:
-        result = semantic_comparator(
-            question=question,
-            expected_answer=expected,
-            actual_answer=actual
+def judge_pair(indexed_pair) -> dict:
+    """Judge one (expected, actual) pair and build its report row"""
+    idx, (expected, actual), fast_decision = indexed_pair
+    with track() as metrics:
+        if actual.get("agent_answer") is None:
+            # The agent call failed in the ask stage: report it, don't judge a non-answer
+            row = error_row(
+                idx,
+                expected["question"],
+                expected.get("expected_answer", ""),
+                None,
+                f"Agent failed: {actual.get('error', 'no answer recorded')}"
+            )
+        else:
+            row = build_comparison_row(
+                idx,
+                expected["question"],
+                expected.get("expected_answer", ""),
+                actual["agent_answer"],
+                fast_decision
+            )
+    row["test_key"] = record_test_key(expected)
+    if "stratum" in expected:
+        row["stratum"] = expected["stratum"]
+    # Per-test cost of both LLM stages: the ask run's metrics travel with agent_responses rows
+    row["metrics"] = {"ask": actual.get("metrics") or reused_metrics(), "judge": metrics}
+    return row
+
+
+def run_comparison(args, matched, plan=None) -> dict:
+    """Judge every matched pair (reusing unchanged rows), write the report and return it"""
+    # Sampled runs get their own report, checkpoint and manifest; the full suite's are left untouched
+    output_path = shard_path(sample_path(COMPARISON_OUTPUT, args.sample), args.shard)
+    checkpoint_path = jsonl_path(output_path)
+
+    # ------------------- INCREMENTAL REUSE -------------------
+    # A row is reused when its question, both answers and the judge configuration are unchanged
+    manifest = Manifest(shard_path(sample_path(MANIFEST_PATH, args.sample), args.shard))
+    judge_fp = judge_fingerprint(args.method, args.lexical_band, args.lexical_scorer, args.vector_pass_score)
+    previous_rows = {}
+    if not args.full:
+        try:
+            for row in read_records(output_path):
+                # ERROR rows are never reused: the next run retries them
+                if row.get("status") != STATUS_ERROR:
+                    previous_rows[record_test_key(row)] = row
+        except (json.JSONDecodeError, KeyError, TypeError):
+            previous_rows = {}
+
+    # Statuses of the last full run (a sample only sees part of the suite); read before the
+    # checkpoint writer below truncates comparison_report.jsonl
+    statuses = {} if args.no_failure_first else previous_statuses(shard_path(COMPARISON_OUTPUT, args.shard))
+
+    # ------------------- RESUME CHECKPOINT -------------------
+    # comparison_report.jsonl is always an in-order prefix of the report rows
+    checkpoint = []
+    if args.resume:
+        checkpoint = read_checkpoint(
+            checkpoint_path,
+            matches=lambda idx, row: (
+                idx < len(matched)
+                and record_test_key(row) == record_test_key(matched[idx][0])
+            )
         )
-        comparison_data = json.loads(result.comparison_json)
-        return comparison_data
-    except Exception as e:
-        console.print(f"[yellow]⚠ Error in semantic comparison: {e}[/yellow]")
-        # Fallback to simple word matching
-        expected_words = set(expected.lower().split())
-        actual_words = set(actual.lower().split())
-        if not expected_words:
-            similarity = 0
+        console.print(f"[dim]⏯ Resuming after {len(checkpoint)} rows already in {checkpoint_path}[/dim]")
+
+    writer = OrderedJsonlWriter(checkpoint_path, append=args.resume, start=len(checkpoint))
+
+    fingerprints = {}
+    reused_rows = []
+    todo = []
+    for idx, (expected, actual) in enumerate(matched):
+        key = record_test_key(expected)
+        fp = fingerprint(expected["question"], expected.get("expected_answer", ""), actual.get("agent_answer", ""), judge_fp)
+        fingerprints[key] = fp
+        if idx < len(checkpoint):
+            reused_rows.append(checkpoint[idx])
+        elif key in previous_rows and manifest.is_fresh("compare", key, fp):
+            reused_rows.append({
+                **previous_rows[key],
+                **({"stratum": expected["stratum"]} if "stratum" in expected else {}),
+                "test_id": idx + 1,
+                "test_key": key,
+                "metrics": {"ask": actual.get("metrics") or reused_metrics(), "judge": reused_metrics()}
+            })
         else:
-            intersection = expected_words.intersection(actual_words)
-            similarity = (len(intersection) / len(expected_words)) * 100
-        
-        return {
-            "are_equivalent": similarity >= 70,
-            "similarity_score": round(similarity, 2),
-            "reasoning": "Fallback word-based comparison due to error"
-        }
-
-
-console.print("[bold cyan]🔍 Comparing Results with Chain of Thought...[/bold cyan]\n")
-
-comparison_results = []
-passed = 0
-failed = 0
-
-for idx, (expected, actual) in enumerate(zip(expected_results, actual_results), 1):
-    question = expected["question"]
-    expected_answer = expected.get("expected_answer", "")
-    actual_answer = actual.get("agent_answer", "")
-    
-    console.print(f"[dim]Analyzing test {idx}/{len(expected_results)}...[/dim]", end="\r")
-    
-    # Use semantic comparison with Chain of Thought
-    comparison_data = compare_answers_semantic(question, expected_answer, actual_answer)
-    
-    are_equivalent = comparison_data.get("are_equivalent", False)
-    similarity = comparison_data.get("similarity_score", 0)
-    reasoning = comparison_data.get("reasoning", "")
-    
-    # Status determination
-    if are_equivalent:
-        status = "PASS"
-        passed += 1
-    elif similarity >= 70:
-        status = "PARTIAL"
-        passed += 1
+            todo.append(idx)
+
+    console.print(f"[dim]♻ Reusing {len(reused_rows)} unchanged rows, judging {len(todo)}[/dim]\n")
+
+    answer_pairs = [
+        (matched[idx][0].get("expected_answer", ""), matched[idx][1].get("agent_answer") or "")
+        for idx in todo
+    ]
+
+    fast_decisions = method_fast_decisions(
+        answer_pairs,
+        args.method,
+        args.lexical_band,
+        args.lexical_scorer,
+        args.vector_pass_score
+    )
+
+    pairs = [(idx + 1, matched[idx], decision) for idx, decision in zip(todo, fast_decisions)]
+    if not args.no_failure_first:
+        # Judge what broke last time first, so a regression shows up in the first minutes
+        keys = [record_test_key(matched[idx][0]) for idx in todo]
+        pairs = [pairs[position] for position in failure_first(keys, statuses)]
+        if count_failing(keys, statuses):
+            console.print(f"[dim]⏩ {count_failing(keys, statuses)} previously failing test(s) scheduled first[/dim]\n")
+    if any(decision is None and actual.get("agent_answer") is not None for _, (_, actual), decision in pairs):
+        # Rows left for the LLM judge: configure dspy here, before the worker threads start
+        lm_registry.get_lm()
+
+    comparison_results = [None] * len(matched)
+    tally = {"passed": 0, "failed": 0, "errors": 0}
+    abort = EarlyAbort(args.abort_below, args.abort_after, PASSING_STATUSES)
+    started = time.perf_counter()
+
+    with make_progress(console, unit="tests") as progress:
+        task = progress.add_task("[cyan]Judging...", total=len(matched))
+
+        def record_result(slot, row):
+            """Stream each finished row into its report slot, the live tally and the abort check"""
+            comparison_results[row["test_id"] - 1] = row
+            if slot is not None:
+                abort.record(row["status"])
+            if row["test_id"] > len(checkpoint):
+                writer.put(row["test_id"] - 1, row)
+            if row["status"] in PASSING_STATUSES:
+                tally["passed"] += 1
+            elif row["status"] == STATUS_ERROR:
+                tally["errors"] += 1
+            else:
+                tally["failed"] += 1
+            errors = f" [yellow]{tally['errors']} errors[/yellow]" if tally["errors"] else ""
+            progress.update(
+                task,
+                advance=1,
+                description=f"[cyan]Judging... [green]{tally['passed']} passed[/green] [red]{tally['failed']} failed[/red]{errors}"
+            )
+
+        for row in reused_rows:
+            record_result(None, row)
+
+        run_ordered(judge_pair, pairs, max_workers=args.workers, on_result=record_result, should_stop=abort.should_stop)
+
+    judge_wall_s = time.perf_counter() - started
+    writer.close()
+
+    if abort.triggered:
+        # Tests never started have no row; the report covers the tests that finished
+        console.print(f"[bold red]🛑 Early abort: {abort.describe()['reason']}[/bold red]")
+        console.print(f"[dim]{len(matched) - sum(r is not None for r in comparison_results)} test(s) not run[/dim]\n")
+        comparison_results = [row for row in comparison_results if row is not None]
+        finished_keys = {record_test_key(row) for row in comparison_results}
+        fingerprints = {key: fp for key, fp in fingerprints.items() if key in finished_keys}
+
+    # ------------------- SAVE COMPARISON REPORT -------------------
+    console.print("[bold cyan]💾 Saving Comparison Report...[/bold cyan]")
+
+    summary = summarize(comparison_results)
+    if "judge" in summary["performance"]:
+        summary["performance"]["judge"]["wall_s"] = round(judge_wall_s, 3)
+    # Retry / rate-limit / circuit-breaker outcomes of this run's judge calls
+    summary["llm_outcomes"] = call_layer.snapshot()
+    if plan:
+        # The sample's pass rate, weighted back up to the whole suite, with its confidence interval
+        summary["sample"] = summarize_sample(comparison_results, plan)
+    report_header = {
+        "run_id": new_run_id(),
+        "timestamp": datetime.now().isoformat(),
+        "comparison_method": COMPARISON_METHODS[args.method],
+        "summary": summary
+    }
+    if args.shard:
+        report_header["shard"] = {"index": args.shard[0], "count": args.shard[1]}
+    if abort.triggered:
+        report_header["aborted"] = {**abort.describe(), "not_run": len(matched) - len(comparison_results)}
+        # The JSONL checkpoint stops at the first test not run (so --resume continues from there);
+        # the report itself holds every finished row
+        export_report(report_header, comparison_results, output_path)
     else:
-        status = "FAIL"
-        failed += 1
-    
-    comparison_results.append({
-        "test_id": idx,
-        "question": question,
-        "expected_answer": expected_answer,
-        "actual_answer": actual_answer,
-        "status": status,
-        "similarity_score": round(similarity, 2),
-        "are_semantically_equivalent": are_equivalent,
-        "reasoning": reasoning
-    })
-
-console.print(" " * 50, end="\r")  # Clear the progress line
-
-# ------------------- SAVE COMPARISON REPORT -------------------
-console.print("[bold cyan]💾 Saving Comparison Report...[/bold cyan]")
-
-report = {
-    "timestamp": datetime.now().isoformat(),
-    "comparison_method": "DSPy Chain of Thought (Semantic)",
-    "summary": {
-        "total_tests": len(comparison_results),
-        "passed": passed,
-        "failed": failed,
-        "pass_rate": round((passed / len(comparison_results)) * 100, 2) if comparison_results else 0
-    },
-    "comparisons": comparison_results
-}
-
-with open(COMPARISON_OUTPUT, "w", encoding="utf-8") as f:
-    json.dump(report, f, indent=2, ensure_ascii=False)
-
-console.print(f"[green]✅ Report saved to {COMPARISON_OUTPUT}[/green]\n")
-
-# ------------------- DISPLAY SUMMARY TABLE -------------------
-console.print("[bold cyan]📋 Comparison Summary[/bold cyan]\n")
-
-table = Table(show_header=True, header_style="bold magenta", show_lines=True)
-table.add_column("ID", style="dim", width=4, justify="center")
-table.add_column("Question", width=30)
-table.add_column("Expected", width=25)
-table.add_column("Actual", width=25)
-table.add_column("Score", width=8, justify="center")
-table.add_column("Status", width=10, justify="center")
-
-for comp in comparison_results:
-    # Truncate long text for display
-    question_short = comp["question"][:27] + "..." if len(comp["question"]) > 30 else comp["question"]
-    expected_short = comp["expected_answer"][:22] + "..." if len(comp["expected_answer"]) > 25 else comp["expected_answer"]
-    actual_short = comp["actual_answer"][:22] + "..." if len(comp["actual_answer"]) > 25 else comp["actual_answer"]
-    
-    # Color code status
-    if comp["status"] == "PASS":
-        status_display = "[green]✅ PASS[/green]"
-    elif comp["status"] == "PARTIAL":
-        status_display = "[yellow]⚠ PARTIAL[/yellow]"
+        # Rows were appended to comparison_report.jsonl as they finished; the JSON report is an export
+        export_report(report_header, iter_jsonl(checkpoint_path), output_path)
+
+    # Record fingerprints only once the report is on disk
+    manifest.update_stage("compare", fingerprints)
+    manifest.save()
+
+    console.print(f"[green]✅ Report saved to {output_path} (rows: {checkpoint_path})[/green]")
+    if abort.triggered or plan:
+        # A partial run would skew the history's trends and diffs, so it is not recorded
+        console.print(f"[dim]📚 {'Aborted' if abort.triggered else 'Sampled'} run not recorded in the run history[/dim]")
+    elif args.shard:
+        # A shard is part of a run: merge_shards.py records the merged report instead
+        console.print(f"[dim]🧩 Shard {args.shard[0]}/{args.shard[1]} done; run merge_shards.py once every shard has finished[/dim]")
     else:
-        status_display = "[red]❌ FAIL[/red]"
-    
-    similarity_display = f"{comp['similarity_score']}%"
-    
-    table.add_row(
-        str(comp["test_id"]),
-        question_short,
-        expected_short,
-        actual_short,
-        similarity_display,
-        status_display
-    )
+        # Every run is also appended to the indexed history behind the dashboard's trend/diff views
+        record_run(report_header, comparison_results)
+        console.print(f"[dim]📚 Run {report_header['run_id']} recorded in {HISTORY_PATH}[/dim]")
+    console.print(f"[dim]LLM cache: {llm_cache.format_stats()}[/dim]")
+    console.print(f"[dim]LLM calls: {call_layer.format_stats()}[/dim]\n")
+    return {**report_header, "comparisons": comparison_results}
+
+
+# ------------------- DISPLAY -------------------
+def show_summary_table(comparison_results):
+    console.print("[bold cyan]📋 Comparison Summary[/bold cyan]\n")
+
+    table = Table(show_header=True, header_style="bold magenta", show_lines=True)
+    table.add_column("ID", style="dim", width=4, justify="center")
+    table.add_column("Question", width=30)
+    table.add_column("Expected", width=25)
+    table.add_column("Actual", width=25)
+    table.add_column("Score", width=8, justify="center")
+    table.add_column("Status", width=10, justify="center")
+
+    for comp in comparison_results:
+        # Truncate long text for display
+        question_short = comp["question"][:27] + "..." if len(comp["question"]) > 30 else comp["question"]
+        expected_short = comp["expected_answer"][:22] + "..." if len(comp["expected_answer"]) > 25 else comp["expected_answer"]
+        actual_short = comp["actual_answer"][:22] + "..." if len(comp["actual_answer"]) > 25 else comp["actual_answer"]
+
+        # Color code status
+        if comp["status"] == "PASS":
+            status_display = "[green]✅ PASS[/green]"
+        elif comp["status"] == "PARTIAL":
+            status_display = "[yellow]⚠ PARTIAL[/yellow]"
+        elif comp["status"] == STATUS_ERROR:
+            status_display = "[magenta]🛑 ERROR[/magenta]"
+        else:
+            status_display = "[red]❌ FAIL[/red]"
+
+        similarity_display = f"{comp['similarity_score']}%"
+
+        table.add_row(
+            str(comp["test_id"]),
+            question_short,
+            expected_short,
+            actual_short,
+            similarity_display,
+            status_display
+        )
 
-console.print(table)
+    console.print(table)
 
-# ------------------- DISPLAY STATISTICS -------------------
-console.print("\n")
-stats_panel = Panel(
-    f"""[bold]Total Tests:[/bold] {report['summary']['total_tests']}
+
+def show_statistics(report):
+    console.print("\n")
+    decided_by_counts = report["summary"]["decided_by"]
+    sample = report["summary"].get("sample")
+    sample_line = f"\n[bold yellow]Sample:[/bold yellow] {format_sample(sample)}" if sample else ""
+    stats_panel = Panel(
+        f"""[bold]Total Tests:[/bold] {report['summary']['total_tests']}
 [bold green]Passed:[/bold green] {report['summary']['passed']}
 [bold red]Failed:[/bold red] {report['summary']['failed']}
-[bold]Pass Rate:[/bold] {report['summary']['pass_rate']}%
+[bold magenta]Errors:[/bold magenta] {report['summary'].get('errors', 0)} (not judged; excluded from the pass rate)
+[bold]Pass Rate:[/bold] {report['summary']['pass_rate']}%{sample_line}
+[bold]Decided By:[/bold] {", ".join(f"{tier}: {count}" for tier, count in decided_by_counts.items()) or "-"}
 
-[dim]Comparison Method: DSPy Chain of Thought (Semantic Analysis)[/dim]""",
-    title="[bold cyan]Test Statistics[/bold cyan]",
-    border_style="cyan"
-)
-console.print(stats_panel)
+[bold]Performance:[/bold]
+{format_performance(report["summary"].get("performance", {})) or "-"}
+
+[dim]Comparison Method: {report['comparison_method']}[/dim]""",
+        title="[bold cyan]Test Statistics[/bold cyan]",
+        border_style="cyan"
+    )
+    console.print(stats_panel)
+
+
+def show_cases(comparison_results):
+    # ------------------- SHOW ERRORED CASES -------------------
+    errored_cases = [c for c in comparison_results if c["status"] == STATUS_ERROR]
+    if errored_cases:
+        console.print(f"\n[bold magenta]🛑 {len(errored_cases)} test(s) could not be judged (retried next run):[/bold magenta]")
+        for errored in errored_cases[:10]:
+            console.print(f"  Test #{errored['test_id']}: {errored['reasoning']}")
 
-# ------------------- SHOW FAILED CASES -------------------
-failed_cases = [c for c in comparison_results if c["status"] == "FAIL"]
+    # ------------------- SHOW FAILED CASES -------------------
+    failed_cases = [c for c in comparison_results if c["status"] == "FAIL"]
 
-if failed_cases:
-    console.print("\n[bold red]❌ Failed Test Cases:[/bold red]\n")
-    
-    for fail in failed_cases:
-        fail_panel = Panel(
-            f"""[yellow]Question:[/yellow] {fail['question']}
+    if failed_cases:
+        console.print("\n[bold red]❌ Failed Test Cases:[/bold red]\n")
+
+        for fail in failed_cases:
+            fail_panel = Panel(
+                f"""[yellow]Question:[/yellow] {fail['question']}
 
 [green]Expected:[/green]
 {fail['expected_answer']}
@@ -227,22 +490,22 @@ if failed_cases:
 [cyan]AI Reasoning:[/cyan]
 {fail['reasoning']}
 
-[dim]Similarity Score: {fail['similarity_score']}%[/dim]""",
-            title=f"[bold red]Test #{fail['test_id']} - FAILED[/bold red]",
-            border_style="red"
-        )
-        console.print(fail_panel)
-else:
-    console.print("\n[bold green]🎉 All tests passed![/bold green]\n")
+[dim]Similarity Score: {fail['similarity_score']}% · Decided by: {fail['decided_by']}[/dim]""",
+                title=f"[bold red]Test #{fail['test_id']} - FAILED[/bold red]",
+                border_style="red"
+            )
+            console.print(fail_panel)
+    else:
+        console.print("\n[bold green]🎉 All tests passed![/bold green]\n")
 
-# ------------------- SHOW PASSED CASES WITH REASONING -------------------
-console.print("\n[bold green]✅ Passed Test Cases (Sample):[/bold green]\n")
+    # ------------------- SHOW PASSED CASES WITH REASONING -------------------
+    console.print("\n[bold green]✅ Passed Test Cases (Sample):[/bold green]\n")
 
-passed_cases = [c for c in comparison_results if c["status"] in ["PASS", "PARTIAL"]][:3]
+    passed_cases = [c for c in comparison_results if c["status"] in ["PASS", "PARTIAL"]][:3]
 
-for passed_case in passed_cases:
-    passed_panel = Panel(
-        f"""[yellow]Question:[/yellow] {passed_case['question']}
+    for passed_case in passed_cases:
+        passed_panel = Panel(
+            f"""[yellow]Question:[/yellow] {passed_case['question']}
 
 [green]Expected:[/green]
 {passed_case['expected_answer']}
@@ -253,8 +516,33 @@ for passed_case in passed_cases:
 [cyan]AI Reasoning:[/cyan]
 {passed_case['reasoning']}
 
-[dim]Similarity Score: {passed_case['similarity_score']}%[/dim]""",
-        title=f"[bold green]Test #{passed_case['test_id']} - {passed_case['status']}[/bold green]",
-        border_style="green"
-    )
-    console.print(passed_panel)
\ No newline at end of file
+[dim]Similarity Score: {passed_case['similarity_score']}% · Decided by: {passed_case['decided_by']}[/dim]""",
+            title=f"[bold green]Test #{passed_case['test_id']} - {passed_case['status']}[/bold green]",
+            border_style="green"
+        )
+        console.print(passed_panel)
+
+
+# ------------------- MAIN -------------------
+def main(argv=None):
+    args = parse_args(argv)
+    lm_registry.configure(model=args.model)
+    os.makedirs("outputs", exist_ok=True)
+
+    expected_results, actual_results, plan = load_results(args.shard, args.sample, args.sample_seed)
+    console.print(f"[bold cyan]🔍 Comparing Results: {COMPARISON_METHODS[args.method]} ({max(args.workers, 1)} workers)...[/bold cyan]\n")
+
+    matched, missing, orphans = match_results(expected_results, actual_results)
+    report_unmatched(missing, orphans)
+    report = run_comparison(args, matched, plan)
+
+    show_summary_table(report["comparisons"])
+    show_statistics(report)
+    show_cases(report["comparisons"])
+    if report.get("aborted"):
+        # Non-zero exit so CI marks the build as failed without waiting for the full suite
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-import json
 import os
+from modules.fingerprints import record_test_key
+from modules.jsonl_store import read_records, iter_jsonl, jsonl_path, JsonlWriter, export_json
 from rich.console import Console
 
 # ------------------- SETUP -------------------
@@ -12,42 +13,58 @@ os.makedirs("outputs", exist_ok=True)
 # ------------------- LOAD JSON -------------------
 console.print("\n[bold cyan]📂 Loading Test Cases JSON...[/bold cyan]")
 
-if not os.path.exists(INPUT_PATH):
+if not os.path.exists(INPUT_PATH) and not os.path.exists(jsonl_path(INPUT_PATH)):
     console.print(f"[red]❌ Error: {INPUT_PATH} not found![/red]")
     console.print("[yellow]💡 Run main.py first to generate test cases.[/yellow]")
     exit(1)
 
-with open(INPUT_PATH, "r", encoding="utf-8") as f:
-    test_cases_json = json.load(f)
-
-console.print(f"[green]✅ Loaded {len(test_cases_json)} test cases[/green]")
+# Test cases are streamed from test_cases.jsonl (or the JSON export) one record at a time
+test_cases_json = read_records(INPUT_PATH)
 
 # ------------------- CONVERT TO DICTIONARY -------------------
 console.print("\n[bold cyan]🔄 Converting to Dictionary List...[/bold cyan]")
 
-expected_results = []
+# Converting a row costs less than fingerprinting it, so every run rewrites the whole file
+preview = []
+total = 0
+writer = JsonlWriter(jsonl_path(OUTPUT_PATH))
 
 for tc in test_cases_json:
-    expected_results.append({
-        "question": tc.get("input_prompt", ""),
-        "expected_answer": tc.get("expected_output", "")
-    })
+    question = tc.get("input_prompt", "")
+    expected_answer = tc.get("expected_output", "")
+    # Ingest assigns the key; cases saved before that get the same key derived here
+    entry = {
+        "test_key": record_test_key(tc),
+        "question": question,
+        "expected_answer": expected_answer
+    }
+    if tc.get("test_case_type"):
+        # Carried along for `--sample`, which stratifies by case type
+        entry["test_case_type"] = tc["test_case_type"]
+
+    # Each entry is appended to expected_results.jsonl as soon as it is converted
+    writer.write(entry)
+    total += 1
+    if len(preview) < 3:
+        preview.append(entry)
+
+writer.close()
 
-console.print(f"[green]✅ Converted {len(expected_results)} entries[/green]")
+console.print(f"[green]✅ Converted {total} entries[/green]")
 
 # ------------------- SAVE DICTIONARY -------------------
 console.print("\n[bold cyan]💾 Saving Dictionary...[/bold cyan]")
 
-with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-    json.dump(expected_results, f, indent=2, ensure_ascii=False)
+# The classic JSON array stays available as an export of the JSONL stream
+export_json(iter_jsonl(writer.path), OUTPUT_PATH)
 
-console.print(f"[green]✅ Dictionary saved to {OUTPUT_PATH}[/green]")
+console.print(f"[green]✅ Dictionary saved to {writer.path} (export: {OUTPUT_PATH})[/green]")
 
 # ------------------- PREVIEW -------------------
 console.print("\n[bold cyan]👀 Preview (First 3 entries):[/bold cyan]")
-for i, entry in enumerate(expected_results[:3], 1):
+for i, entry in enumerate(preview, 1):
     console.print(f"\n[yellow]Entry {i}:[/yellow]")
     console.print(f"  Question: {entry['question']}")
     console.print(f"  Expected: {entry['expected_answer']}")
 
-console.print(f"\n[dim]Total entries: {len(expected_results)}[/dim]\n")
\ No newline at end of file
+console.print(f"\n[dim]Total entries: {total}[/dim]\n")
\ No newline at end of file
@@ -1,10 +1,14 @@
 import streamlit as st
+import html
 import json
 import os
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+from modules.run_history import RunHistory, HISTORY_PATH
+from modules.sampling import sample_path
 
 # ------------------- PAGE CONFIG -------------------
 st.set_page_config(
@@ -39,6 +43,13 @@ st.markdown("""
         border-left: 4px solid #dc3545;
         margin: 0.5rem 0;
     }
+    .error-card {
+        background-color: #e2e3e5;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #6c757d;
+        margin: 0.5rem 0;
+    }
     .partial-card {
         background-color: #fff3cd;
         padding: 1rem;
@@ -49,29 +60,231 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# ------------------- VIEW SETTINGS -------------------
+REPORT_PATH = "outputs/comparison_report.json"
+# `--sample` smoke runs write their own report next to the full suite's
+REPORTS = {"Full suite": REPORT_PATH, "Sampled run": sample_path(REPORT_PATH, True)}
+PAGE_SIZES = [25, 50, 100, 250]
+# Expanders are the slowest element to render; never build more than this per tab
+MAX_EXPANDERS = 50
+# Above this many tests the per-test bar chart becomes a score histogram
+MAX_BAR_POINTS = 1000
+STATUSES = ["PASS", "PARTIAL", "FAIL", "ERROR"]
+DISPLAY_COLUMNS = ["ID", "Question", "Expected", "Actual", "Score (%)", "Status"]
+CARD_STYLES = {
+    "PASS": ("pass-card", "✅", "PASSED"),
+    "PARTIAL": ("partial-card", "⚠️", "PARTIAL"),
+    "FAIL": ("fail-card", "❌", "FAILED"),
+    "ERROR": ("error-card", "🛑", "NOT JUDGED (ERROR)"),
+}
+
+
 # ------------------- LOAD DATA -------------------
-@st.cache_data
-def load_comparison_data():
+# Everything below is keyed by the report's (path, mtime), so it is built once per report
+# version and shared across reruns (cache_resource returns it without copying).
+def report_source(path: str = REPORT_PATH):
+    return (path, os.path.getmtime(path)) if os.path.exists(path) else None
+
+
+@st.cache_resource(max_entries=4)
+def load_comparison_data(source):
     """Load comparison report from JSON file"""
-    report_path = "outputs/comparison_report.json"
-    
-    if not os.path.exists(report_path):
+    if source is None or not os.path.exists(source[0]):
         return None
     
-    with open(report_path, "r", encoding="utf-8") as f:
+    with open(source[0], "r", encoding="utf-8") as f:
         return json.load(f)
 
+
+@st.cache_resource(max_entries=4)
+def build_views(source) -> dict:
+    """Columnar table, lowercase search text and per-test latencies of the report, built once"""
+    comparisons = load_comparison_data(source).get("comparisons", [])
+    frame = pd.DataFrame({
+        "ID": [c["test_id"] for c in comparisons],
+        "Question": [c["question"] for c in comparisons],
+        "Expected": [c["expected_answer"] for c in comparisons],
+        "Actual": [c["actual_answer"] for c in comparisons],
+        "Score (%)": [c["similarity_score"] for c in comparisons],
+        "Status": [c["status"] for c in comparisons],
+    })
+    search = (frame["Question"] + "\n" + frame["Expected"] + "\n" + frame["Actual"]).str.lower()
+    latency = pd.DataFrame([
+        {"Stage": stage, "Latency (ms)": m["latency_ms"], "test_id": c["test_id"]}
+        for c in comparisons
+        for stage, m in (c.get("metrics") or {}).items()
+        if m and not m.get("reused")
+    ])
+    return {"frame": frame, "search": search, "latency": latency}
+
+
+@st.cache_data(max_entries=32)
+def filter_positions(source, statuses: tuple, min_score: float, query: str) -> dict:
+    """Row positions passing the filters, split by status ("ALL" keeps report order)"""
+    views = build_views(source)
+    frame = views["frame"]
+    mask = frame["Status"].isin(statuses).to_numpy() & (frame["Score (%)"] >= min_score).to_numpy()
+    if query:
+        mask &= views["search"].str.contains(query.lower(), regex=False).to_numpy()
+    positions = np.flatnonzero(mask)
+    status_values = frame["Status"].to_numpy()[positions]
+    return {"ALL": positions, **{status: positions[status_values == status] for status in STATUSES}}
+
+
+@st.cache_data(max_entries=8)
+def filtered_csv(source, statuses: tuple, min_score: float, query: str) -> str:
+    positions = filter_positions(source, statuses, min_score, query)["ALL"]
+    return build_views(source)["frame"].iloc[positions].to_csv(index=False)
+
+
+@st.cache_resource(max_entries=4)
+def report_bytes(source) -> bytes:
+    with open(source[0], "rb") as f:
+        return f.read()
+
+
+# ------------------- RUN HISTORY -------------------
+HISTORY_RUN_OPTIONS = [20, 100, 500]
+
+
+def history_mtime():
+    paths = [HISTORY_PATH, HISTORY_PATH + "-wal"]
+    return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=None)
+
+
+@st.cache_resource
+def history_store():
+    return RunHistory(HISTORY_PATH)
+
+
+@st.cache_data(max_entries=4)
+def history_runs(mtime, limit: int):
+    return pd.DataFrame(history_store().runs(limit))
+
+
+@st.cache_data(max_entries=64)
+def history_diff(base_run: str, run: str) -> dict:
+    # Stored runs never change, so a diff is cached for good
+    return history_store().diff(base_run, run)
+
+
+def render_history(mtime, current_run_id: str):
+    """Trend of pass rate and latency over runs, plus the newly failing/passing diff"""
+    st.header("📚 Run History")
+
+    limit = st.radio("Runs shown", options=HISTORY_RUN_OPTIONS, index=1, horizontal=True)
+    runs = history_runs(mtime, limit)
+    if runs.empty:
+        st.info("No runs recorded yet.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig_rate = px.line(runs, x="timestamp", y="pass_rate", markers=True, hover_data=["run_id", "total_tests"],
+                           title="Pass Rate over Runs", labels={"timestamp": "Run", "pass_rate": "Pass Rate (%)"})
+        fig_rate.update_layout(height=350, yaxis_range=[0, 100])
+        st.plotly_chart(fig_rate, use_container_width=True)
+    with col2:
+        latency_columns = [c for c in ["ask_p50_ms", "ask_p95_ms", "judge_p50_ms", "judge_p95_ms"] if runs[c].notna().any()]
+        if latency_columns:
+            fig_trend = px.line(
+                runs.melt(id_vars=["timestamp", "run_id"], value_vars=latency_columns, var_name="Series", value_name="ms"),
+                x="timestamp", y="ms", color="Series", markers=True, hover_data=["run_id"],
+                title="Latency over Runs", labels={"timestamp": "Run", "ms": "Latency (ms)"}
+            )
+            fig_trend.update_layout(height=350)
+            st.plotly_chart(fig_trend, use_container_width=True)
+        else:
+            st.info("No latency metrics recorded for these runs.")
+
+    if len(runs) < 2:
+        return
+
+    run_ids = runs["run_id"].tolist()[::-1]
+    target_index = run_ids.index(current_run_id) if current_run_id in run_ids else 0
+    col1, col2 = st.columns(2)
+    run = col1.selectbox("Run", options=run_ids, index=target_index)
+    base_options = [r for r in run_ids if r != run]
+    older = [r for r in base_options if r < run]
+    base_run = col2.selectbox(
+        "Compared with (run X)", options=base_options,
+        index=base_options.index(older[0]) if older else 0
+    )
+
+    diff = history_diff(base_run, run)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Newly Failing", len(diff["newly_failing"]))
+    col2.metric("Newly Passing", len(diff["newly_passing"]))
+    col3.metric("New Tests", diff["added"])
+    col4.metric("Removed Tests", diff["removed"])
+
+    diff_columns = {"test_id": "ID", "question": "Question", "expected_answer": "Expected",
+                    "base_status": "Before", "status": "After", "base_score": "Score Before",
+                    "score": "Score After", "decided_by": "Decided By"}
+    tab_failing, tab_passing = st.tabs(["❌ Newly Failing", "✅ Newly Passing"])
+    for tab, rows in [(tab_failing, diff["newly_failing"]), (tab_passing, diff["newly_passing"])]:
+        with tab:
+            if rows:
+                st.dataframe(pd.DataFrame(rows)[list(diff_columns)].rename(columns=diff_columns),
+                             use_container_width=True, hide_index=True)
+            else:
+                st.info("No tests changed this way.")
+
+
+# ------------------- RENDER HELPERS -------------------
+def paginate(positions, page_size: int, key: str):
+    """Page selector; returns the slice of `positions` to render"""
+    pages = max(1, -(-len(positions) // page_size))
+    # The page count is part of the key, so a stale page number never outlives a filter change
+    page = st.number_input(
+        f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_{pages}"
+    ) if pages > 1 else 1
+    start = (page - 1) * page_size
+    st.caption(f"Showing {start + 1 if len(positions) else 0}–{min(start + page_size, len(positions))} of {len(positions)}")
+    return positions[start:start + page_size]
+
+
+def render_card(test: dict):
+    css_class, icon, label = CARD_STYLES[test["status"]]
+    with st.expander(f"Test #{test['test_id']}: {test['question'][:50]}..."):
+        st.markdown(f"""
+        <div class="{css_class}">
+            <h4>{icon} Test #{test['test_id']} - {label}</h4>
+            <p><strong>Question:</strong> {html.escape(test['question'])}</p>
+            <p><strong>Expected:</strong> {html.escape(test['expected_answer'])}</p>
+            <p><strong>Actual:</strong> {html.escape(test['actual_answer'])}</p>
+            <p><strong>Similarity Score:</strong> {test['similarity_score']}%</p>
+            <p><strong>Reasoning:</strong> {html.escape(str(test.get('reasoning', 'N/A')))}</p>
+            <p><strong>Decided By:</strong> {test.get('decided_by', 'llm_judge')}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+def color_status(val):
+    if val == 'PASS':
+        return 'background-color: #d4edda'
+    elif val == 'PARTIAL':
+        return 'background-color: #fff3cd'
+    elif val == 'ERROR':
+        return 'background-color: #e2e3e5'
+    else:
+        return 'background-color: #f8d7da'
+
+
 # ------------------- MAIN DASHBOARD -------------------
 def main():
     st.title("🧪 Test Results Dashboard")
     st.markdown("---")
     
-    # Load data
-    report = load_comparison_data()
+    # Load data (the full suite's report unless a sampled run's is picked)
+    available = [name for name, path in REPORTS.items() if os.path.exists(path)]
+    report_name = st.sidebar.radio("Report", available, horizontal=True) if len(available) > 1 else None
+    source = report_source(REPORTS[report_name] if report_name else REPORT_PATH)
+    report = load_comparison_data(source)
     
     if report is None:
         st.error("❌ No comparison report found!")
-        st.info("💡 Run `python compare_results.py` first to generate test results.")
+        st.info("💡 Run `python compare.py` (or `python run_pipeline.py`) first to generate test results.")
         return
     
     # Extract data
@@ -79,6 +292,24 @@ def main():
     comparisons = report.get("comparisons", [])
     timestamp = report.get("timestamp", "")
     method = report.get("comparison_method", "Unknown")
+    views = build_views(source)
+
+    if report.get("aborted"):
+        aborted = report["aborted"]
+        st.error(
+            f"🛑 Run aborted early: {aborted['reason']}. "
+            f"{aborted.get('not_run', 0)} test(s) were not run; the numbers below cover the finished tests only."
+        )
+
+    sample = summary.get("sample")
+    if sample:
+        low, high = sample["pass_rate_ci"]
+        st.info(
+            f"🎲 Sampled run: {sample['size']} of {sample['population']} tests, stratified by case type and "
+            f"previous status across {len(sample['strata'])} strata (seed {sample['seed']}). "
+            f"Estimated suite pass rate {sample['pass_rate_estimate']}% "
+            f"({sample['confidence']:.0%} CI {low}–{high}%); the counts below cover the sampled tests only."
+        )
     
     # ------------------- SIDEBAR -------------------
     with st.sidebar:
@@ -86,15 +317,21 @@ def main():
         st.write(f"**Timestamp:** {timestamp[:19]}")
         st.write(f"**Method:** {method}")
         st.write(f"**Total Tests:** {summary.get('total_tests', 0)}")
+        if sample:
+            st.write(f"**Sampled:** {sample['size']} of {sample['population']} tests")
+        if report.get("shards"):
+            st.write(f"**Shards:** {report['shards']['merged']} of {report['shards']['count']} merged")
         
         st.markdown("---")
         
         # Filter options
         st.header("🔍 Filters")
+        query = st.text_input("Search question / answers", placeholder="e.g. campus").strip()
+
         status_filter = st.multiselect(
             "Filter by Status",
-            options=["PASS", "PARTIAL", "FAIL"],
-            default=["PASS", "PARTIAL", "FAIL"]
+            options=STATUSES,
+            default=STATUSES
         )
         
         min_score = st.slider(
@@ -104,12 +341,15 @@ def main():
             value=0,
             step=5
         )
+
+        page_size = st.selectbox("Rows per page", options=PAGE_SIZES, index=1)
         
         st.markdown("---")
         
         # Refresh button
         if st.button("🔄 Refresh Data", use_container_width=True):
             st.cache_data.clear()
+            st.cache_resource.clear()
             st.rerun()
     
     # ------------------- TOP METRICS -------------------
@@ -138,6 +378,8 @@ def main():
             delta=f"-{100 - summary.get('pass_rate', 0):.1f}%",
             delta_color="inverse"
         )
+        if summary.get("errors"):
+            st.caption(f"🛑 {summary['errors']} not judged (LLM errors; excluded from the pass rate)")
     
     with col4:
         st.metric(
@@ -145,6 +387,8 @@ def main():
             value=f"{summary.get('pass_rate', 0)}%",
             delta=None
         )
+        if sample:
+            st.caption(f"🎲 Suite estimate {sample['pass_rate_estimate']}% ({sample['confidence']:.0%} CI {low}–{high}%)")
     
     st.markdown("---")
     
@@ -156,10 +400,10 @@ def main():
     with col1:
         # Pie chart - Pass/Fail distribution
         fig_pie = go.Figure(data=[go.Pie(
-            labels=['Passed', 'Failed'],
-            values=[summary.get('passed', 0), summary.get('failed', 0)],
+            labels=['Passed', 'Failed', 'Errors'],
+            values=[summary.get('passed', 0), summary.get('failed', 0), summary.get('errors', 0)],
             hole=0.4,
-            marker_colors=['#28a745', '#dc3545']
+            marker_colors=['#28a745', '#dc3545', '#6c757d']
         )])
         fig_pie.update_layout(
             title="Test Results Distribution",
@@ -168,50 +412,118 @@ def main():
         st.plotly_chart(fig_pie, use_container_width=True)
     
     with col2:
-        # Bar chart - Similarity scores
-        df = pd.DataFrame(comparisons)
-        fig_bar = px.bar(
-            df,
-            x='test_id',
-            y='similarity_score',
-            color='status',
-            color_discrete_map={'PASS': '#28a745', 'PARTIAL': '#ffc107', 'FAIL': '#dc3545'},
-            title="Similarity Scores by Test",
-            labels={'test_id': 'Test ID', 'similarity_score': 'Similarity Score (%)'}
-        )
+        df = views["frame"]
+        status_colors = {'PASS': '#28a745', 'PARTIAL': '#ffc107', 'FAIL': '#dc3545', 'ERROR': '#6c757d'}
+        if len(df) <= MAX_BAR_POINTS:
+            # Bar chart - Similarity scores
+            fig_bar = px.bar(
+                df,
+                x='ID',
+                y='Score (%)',
+                color='Status',
+                color_discrete_map=status_colors,
+                title="Similarity Scores by Test",
+                labels={'ID': 'Test ID', 'Score (%)': 'Similarity Score (%)'}
+            )
+        else:
+            # One bar per test does not scale; show the score distribution instead
+            fig_bar = px.histogram(
+                df,
+                x='Score (%)',
+                color='Status',
+                nbins=20,
+                color_discrete_map=status_colors,
+                title="Similarity Score Distribution",
+                labels={'Score (%)': 'Similarity Score (%)'}
+            )
         fig_bar.update_layout(height=350)
         st.plotly_chart(fig_bar, use_container_width=True)
-    
+
     st.markdown("---")
-    
+
+    # ------------------- PERFORMANCE & COST -------------------
+    performance = summary.get("performance", {})
+    stages = {name: s for name, s in performance.items() if name != "total"}
+    if stages:
+        st.header("⏱ Performance & Cost")
+
+        total = performance.get("total", {})
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("LLM Calls", total.get("llm_calls", 0))
+        col2.metric("Cache Hits", total.get("cache_hits", 0))
+        col3.metric("Tokens", f"{total.get('prompt_tokens', 0) + total.get('completion_tokens', 0):,}")
+        col4.metric("Estimated Cost", f"${total.get('cost_usd', 0):.4f}")
+
+        df_perf = pd.DataFrame([
+            {
+                "Stage": name,
+                "Tests": s["tests"],
+                "Reused": s.get("reused", 0),
+                "p50 (ms)": s["latency_ms"]["p50"],
+                "p95 (ms)": s["latency_ms"]["p95"],
+                "p99 (ms)": s["latency_ms"]["p99"],
+                "Mean (ms)": s["latency_ms"]["mean"],
+                "LLM Calls": s["llm_calls"],
+                "Cache Hits": s["cache_hits"],
+                "Prompt Tokens": s["prompt_tokens"],
+                "Completion Tokens": s["completion_tokens"],
+                "Cost ($)": s["cost_usd"],
+                "Retries": s["retries"],
+                "Wall (s)": s.get("wall_s"),
+            }
+            for name, s in stages.items()
+        ])
+        st.dataframe(df_perf, use_container_width=True, hide_index=True)
+
+        # Call-layer outcomes: retries, rate limiting and circuit-breaker rejections
+        llm_outcomes = summary.get("llm_outcomes", {})
+        if llm_outcomes.get("stages"):
+            st.caption(
+                f"LLM call outcomes · concurrency limit at end: {llm_outcomes.get('concurrency_limit')} · "
+                f"circuit: {llm_outcomes.get('circuit_state')} (opened {llm_outcomes.get('circuit_opened', 0)}×)"
+            )
+            st.dataframe(
+                pd.DataFrame.from_dict(llm_outcomes["stages"], orient="index").rename_axis("Stage").reset_index(),
+                use_container_width=True,
+                hide_index=True
+            )
+
+        # Per-test latency distribution of the rows that actually ran this time
+        if not views["latency"].empty:
+            fig_latency = px.box(
+                views["latency"],
+                x="Stage",
+                y="Latency (ms)",
+                points="outliers",
+                hover_data=["test_id"],
+                title="Per-Test Latency by Stage"
+            )
+            fig_latency.update_layout(height=350)
+            st.plotly_chart(fig_latency, use_container_width=True)
+
+        st.markdown("---")
+
+    # ------------------- RUN HISTORY -------------------
+    runs_mtime = history_mtime()
+    if runs_mtime is not None:
+        render_history(runs_mtime, report.get("run_id"))
+        st.markdown("---")
+
     # ------------------- DETAILED RESULTS TABLE -------------------
     st.header("📋 Detailed Test Results")
     
-    # Filter data
-    filtered_comparisons = [
-        c for c in comparisons
-        if c['status'] in status_filter and c['similarity_score'] >= min_score
-    ]
+    # Filter once (cached per filter combination); tabs and the table reuse the same split
+    filter_key = (source, tuple(status_filter), min_score, query)
+    positions = filter_positions(*filter_key)
     
-    if not filtered_comparisons:
+    if not len(positions["ALL"]):
         st.warning("No tests match the current filters.")
         return
     
-    # Create DataFrame
-    df_display = pd.DataFrame(filtered_comparisons)
-    df_display = df_display[['test_id', 'question', 'expected_answer', 'actual_answer', 'similarity_score', 'status']]
-    df_display.columns = ['ID', 'Question', 'Expected', 'Actual', 'Score (%)', 'Status']
-    
-    # Style the dataframe
-    def color_status(val):
-        if val == 'PASS':
-            return 'background-color: #d4edda'
-        elif val == 'PARTIAL':
-            return 'background-color: #fff3cd'
-        else:
-            return 'background-color: #f8d7da'
-    
-    styled_df = df_display.style.applymap(color_status, subset=['Status'])
+    # Only the visible page is sliced and styled
+    page_positions = paginate(positions["ALL"], page_size, key="table_page")
+    df_page = views["frame"].iloc[page_positions][DISPLAY_COLUMNS]
+    styled_df = df_page.style.map(color_status, subset=['Status'])
     
     st.dataframe(styled_df, use_container_width=True, height=400)
     
@@ -220,64 +532,28 @@ def main():
     # ------------------- INDIVIDUAL TEST CARDS -------------------
     st.header("🔍 Test Case Details")
     
-    tabs = st.tabs(["✅ Passed", "⚠️ Partial", "❌ Failed"])
-    
-    # Passed tests
-    with tabs[0]:
-        passed_tests = [c for c in filtered_comparisons if c['status'] == 'PASS']
-        if passed_tests:
-            for test in passed_tests:
-                with st.expander(f"Test #{test['test_id']}: {test['question'][:50]}..."):
-                    st.markdown(f"""
-                    <div class="pass-card">
-                        <h4>✅ Test #{test['test_id']} - PASSED</h4>
-                        <p><strong>Question:</strong> {test['question']}</p>
-                        <p><strong>Expected:</strong> {test['expected_answer']}</p>
-                        <p><strong>Actual:</strong> {test['actual_answer']}</p>
-                        <p><strong>Similarity Score:</strong> {test['similarity_score']}%</p>
-                        <p><strong>Reasoning:</strong> {test.get('reasoning', 'N/A')}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-        else:
-            st.info("No passed tests match the filters.")
-    
-    # Partial tests
-    with tabs[1]:
-        partial_tests = [c for c in filtered_comparisons if c['status'] == 'PARTIAL']
-        if partial_tests:
-            for test in partial_tests:
-                with st.expander(f"Test #{test['test_id']}: {test['question'][:50]}..."):
-                    st.markdown(f"""
-                    <div class="partial-card">
-                        <h4>⚠️ Test #{test['test_id']} - PARTIAL</h4>
-                        <p><strong>Question:</strong> {test['question']}</p>
-                        <p><strong>Expected:</strong> {test['expected_answer']}</p>
-                        <p><strong>Actual:</strong> {test['actual_answer']}</p>
-                        <p><strong>Similarity Score:</strong> {test['similarity_score']}%</p>
-                        <p><strong>Reasoning:</strong> {test.get('reasoning', 'N/A')}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-        else:
-            st.info("No partial tests match the filters.")
+    tabs = st.tabs([
+        f"✅ Passed ({len(positions['PASS'])})",
+        f"⚠️ Partial ({len(positions['PARTIAL'])})",
+        f"❌ Failed ({len(positions['FAIL'])})",
+        f"🛑 Errors ({len(positions['ERROR'])})",
+    ])
+    empty_messages = {
+        "PASS": (st.info, "No passed tests match the filters."),
+        "PARTIAL": (st.info, "No partial tests match the filters."),
+        "FAIL": (st.success, "🎉 No failed tests!"),
+        "ERROR": (st.success, "No LLM errors."),
+    }
     
-    # Failed tests
-    with tabs[2]:
-        failed_tests = [c for c in filtered_comparisons if c['status'] == 'FAIL']
-        if failed_tests:
-            for test in failed_tests:
-                with st.expander(f"Test #{test['test_id']}: {test['question'][:50]}..."):
-                    st.markdown(f"""
-                    <div class="fail-card">
-                        <h4>❌ Test #{test['test_id']} - FAILED</h4>
-                        <p><strong>Question:</strong> {test['question']}</p>
-                        <p><strong>Expected:</strong> {test['expected_answer']}</p>
-                        <p><strong>Actual:</strong> {test['actual_answer']}</p>
-                        <p><strong>Similarity Score:</strong> {test['similarity_score']}%</p>
-                        <p><strong>Reasoning:</strong> {test.get('reasoning', 'N/A')}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-        else:
-            st.success("🎉 No failed tests!")
+    for tab, status in zip(tabs, STATUSES):
+        with tab:
+            status_positions = positions[status]
+            if not len(status_positions):
+                show, message = empty_messages[status]
+                show(message)
+                continue
+            for pos in paginate(status_positions, min(page_size, MAX_EXPANDERS), key=f"cards_page_{status}"):
+                render_card(comparisons[pos])
     
     st.markdown("---")
     
@@ -287,26 +563,24 @@ def main():
     col1, col2 = st.columns(2)
     
     with col1:
-        # Download JSON
-        json_str = json.dumps(report, indent=2)
+        # Download JSON (the report file as written; no re-serialization per rerun)
         st.download_button(
             label="📄 Download JSON Report",
-            data=json_str,
+            data=report_bytes(source),
             file_name=f"test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
             mime="application/json",
             use_container_width=True
         )
     
     with col2:
-        # Download CSV
-        csv_data = df_display.to_csv(index=False)
+        # Download CSV of every filtered row, not just the visible page
         st.download_button(
             label="📊 Download CSV Report",
-            data=csv_data,
+            data=filtered_csv(*filter_key),
             file_name=f"test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv",
             use_container_width=True
         )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
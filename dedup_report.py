@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+from modules.dedup import DuplicateIndex, DEFAULT_THRESHOLD
+from modules.jsonl_store import read_records, jsonl_path
+from rich.console import Console
+from rich.table import Table
+
+# ------------------- CLI OPTIONS -------------------
+parser = argparse.ArgumentParser(description="Report clusters of near-duplicate test cases.")
+parser.add_argument(
+    "--threshold",
+    type=float,
+    default=DEFAULT_THRESHOLD,
+    help=f"Estimated Jaccard similarity at which two cases count as near duplicates (default: {DEFAULT_THRESHOLD})"
+)
+parser.add_argument("--show", type=int, default=20, help="Number of clusters to print")
+args = parser.parse_args()
+
+# ------------------- SETUP -------------------
+console = Console()
+TEST_CASES_PATH = "outputs/test_cases.json"
+LSH_PATH = "outputs/test_cases.lsh.npz"
+REPORT_PATH = "outputs/duplicate_clusters.json"
+
+if not os.path.exists(TEST_CASES_PATH) and not os.path.exists(jsonl_path(TEST_CASES_PATH)):
+    console.print(f"[red]❌ Error: {TEST_CASES_PATH} not found![/red]")
+    console.print("[yellow]💡 Run main.py first to generate test cases.[/yellow]")
+    exit(1)
+
+cases = list(read_records(TEST_CASES_PATH))
+index = DuplicateIndex.load_or_build(LSH_PATH, cases, threshold=args.threshold)
+index.save(LSH_PATH, cases)
+
+# ------------------- CLUSTERS -------------------
+clusters = []
+for positions in index.clusters():
+    leader = positions[0]
+    members = []
+    for position in positions:
+        similarity = float((index.signatures[position] == index.signatures[leader]).mean())
+        members.append({
+            "test_id": position + 1,
+            "similarity": round(similarity, 3),
+            "input_prompt": cases[position].get("input_prompt", ""),
+            "expected_output": cases[position].get("expected_output", "")
+        })
+    clusters.append({"size": len(members), "cases": members})
+
+report = {
+    "threshold": args.threshold,
+    "total_cases": len(cases),
+    "clusters": len(clusters),
+    "cases_in_clusters": sum(c["size"] for c in clusters),
+    "duplicate_clusters": clusters
+}
+with open(REPORT_PATH, "w", encoding="utf-8") as f:
+    json.dump(report, f, indent=2, ensure_ascii=False)
+
+# ------------------- DISPLAY -------------------
+console.print(
+    f"\n[bold cyan]🔎 {len(clusters)} near-duplicate clusters "
+    f"({report['cases_in_clusters']} of {len(cases)} cases) at threshold {args.threshold}[/bold cyan]\n"
+)
+
+for number, cluster in enumerate(clusters[:args.show], 1):
+    table = Table(title=f"Cluster {number} ({cluster['size']} cases)", show_lines=True)
+    table.add_column("Test #", style="cyan", justify="right")
+    table.add_column("Similarity", justify="right")
+    table.add_column("Input Prompt", style="white")
+    table.add_column("Expected Output", style="green")
+    for case in cluster["cases"]:
+        table.add_row(str(case["test_id"]), f"{case['similarity']:.2f}", case["input_prompt"], case["expected_output"])
+    console.print(table)
+
+if len(clusters) > args.show:
+    console.print(f"[dim]... {len(clusters) - args.show} more clusters in {REPORT_PATH}[/dim]")
+console.print(f"[green]✅ Cluster report saved to {REPORT_PATH}[/green]")
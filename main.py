@@ -1,111 +1,327 @@
+import argparse
 import json
 import os
 import re
-from modules.test_case_processor import process_test_case
+import sys
+from modules.test_case_processor import process_test_case, process_test_cases, FUSED_DEFAULT
+from modules.batching import BATCH_SIZE, chunked
+from modules.llm_cache import llm_cache
+from modules.local_classifier import classification_stats
+from modules.concurrency import run_ordered, DEFAULT_WORKERS
+from modules.progress import make_progress
+from modules.lm_registry import lm_registry, add_model_argument
+from modules.normalization import clean_many, clean_text
+from modules.dedup import DuplicateIndex, DEFAULT_THRESHOLD
+from modules.fingerprints import test_key
+from modules.call_layer import call_layer, LLMCallError
+from modules.metrics import track, summarize_stage, format_stage
+from modules.jsonl_store import read_records, iter_jsonl, jsonl_path, JsonlWriter, export_json
 from rich.console import Console
 
+# ---------------- CLI OPTIONS ----------------
+parser = argparse.ArgumentParser(description="Turn raw test descriptions into structured test cases.")
+parser.add_argument(
+    "--batch",
+    metavar="PATH",
+    help="Non-interactive bulk ingest from a file ('-' for stdin) instead of the interactive prompt"
+)
+parser.add_argument(
+    "--format",
+    choices=["auto", "text", "jsonl"],
+    default="auto",
+    help="Batch input format: text = blocks separated by blank lines; jsonl = one JSON object/string per line"
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=DEFAULT_WORKERS,
+    help=f"Concurrent process_test_case calls in batch mode (default: {DEFAULT_WORKERS})"
+)
+parser.add_argument(
+    "--llm-batch-size",
+    type=int,
+    default=BATCH_SIZE,
+    help=f"Test descriptions per classify/extract/synthesize LLM call in batch mode; 1 = one call each (default: {BATCH_SIZE})"
+)
+parser.add_argument(
+    "--fused",
+    action=argparse.BooleanOptionalAction,
+    default=FUSED_DEFAULT,
+    help="Classify and structure ambiguous inputs in one LLM call (per-case processing: interactive mode "
+         "and --llm-batch-size 1; env FUSED_PROCESSING=1)"
+)
+parser.add_argument(
+    "--near-dup-threshold",
+    type=float,
+    default=DEFAULT_THRESHOLD,
+    help=f"Estimated Jaccard similarity at which a case counts as a near duplicate (default: {DEFAULT_THRESHOLD})"
+)
+parser.add_argument(
+    "--skip-near-duplicates",
+    action="store_true",
+    help="Skip near-duplicate cases instead of only warning about them"
+)
+add_model_argument(parser)
+args = parser.parse_args()
+lm_registry.configure(model=args.model)
+
 # ---------------- SETUP ----------------
 os.makedirs("outputs", exist_ok=True)
 OUTPUT_PATH = "outputs/test_cases.json"
+JSONL_PATH = jsonl_path(OUTPUT_PATH)
+LSH_PATH = "outputs/test_cases.lsh.npz"
+FAILURES_PATH = "outputs/ingest_failures.jsonl"
 
 console = Console()
-console.print("\n[bold cyan]🧠 DSPy Interactive Test Case Agent[/bold cyan]")
-console.print("[dim]Type a test case (Q&A or behavioral). Type 'exit' to quit.[/dim]\n")
 
 # ---------------- CLEANING FUNCTIONS ----------------
-def clean_to_one_sentence(text,
-                          allowed_punct=".,?:-()",
-                          normalize_dashes=True):
-    """Clean text to a single sentence with normalized punctuation"""
-    # 1) normalize common dash characters to ascii hyphen
-    if normalize_dashes:
-        text = re.sub(r"[\u2012\u2013\u2014\u2015]", "-", text)
-
-    # 2) collapse newlines and tabs to single space
-    text = re.sub(r"[\r\n\t]+", " ", text)
-
-    # 3) remove characters NOT in allowed set (letters, digits, spaces, allowed punctuation)
-    safe_punct = re.escape(allowed_punct)
-    pattern = rf"[^A-Za-z0-9\s{safe_punct}]"
-    text = re.sub(pattern, "", text)
-
-    # 4) collapse multiple spaces to single space, trim ends
-    text = re.sub(r"\s+", " ", text).strip()
-
-    # 5) keep up to the first sentence terminator (. ? !)
-    m = re.search(r"[.?!]", text)
-    if m:
-        text = text[: m.end()]
-    return text
-
-
-def clean_text(text: str) -> str:
-    """Remove 'User:', 'Agent:' prefixes and clean whitespace"""
-    if not text:
-        return text
-    text = text.strip()
-    # Remove "User:" or "Agent:" prefix (case insensitive)
-    text = re.sub(r'^(user|agent)\s*:\s*', '', text, flags=re.IGNORECASE)
-    return text.strip()
+def require_text(result: dict) -> dict:
+    """The processed test case, or TypeError if its prompt/expected output is not text to clean"""
+    for field in ("input_prompt", "expected_output"):
+        if not isinstance(result.get(field, ""), str):
+            raise TypeError(f"{field} is {type(result.get(field)).__name__}, expected text")
+    return result
+
+
+def compact_results(results: list) -> list:
+    """Extract, CLEAN, and normalize processed test cases to single sentences"""
+    # First clean prefixes, then normalize to one sentence (patterns resolved once for the whole batch)
+    input_prompts = clean_many([clean_text(result.get("input_prompt", "")) for result in results])
+    expected_outputs = clean_many([clean_text(result.get("expected_output", "")) for result in results])
+    return [
+        {
+            # Stable, content-derived id that every later stage carries and joins on
+            "test_key": test_key(input_prompt, expected_output),
+            "input_prompt": input_prompt,
+            "expected_output": expected_output,
+            # Kept so sampled runs can stratify by case type
+            "test_case_type": result.get("test_case_type")
+        }
+        for result, input_prompt, expected_output in zip(results, input_prompts, expected_outputs)
+    ]
+
+
+def compact_result(result: dict) -> dict:
+    """compact_results for a single case (interactive mode)"""
+    return compact_results([require_text(result)])[0]
+
+
+def add_case(compact_case: dict) -> str:
+    """
+    Append a case unless it duplicates an existing one.
+
+    Returns "added", "duplicate" (byte-identical, always skipped) or
+    "near_duplicate" (skipped only with --skip-near-duplicates; otherwise
+    added with a warning, and reported as "added_near_duplicate").
+    """
+    if dedup_index.find_exact(compact_case) is not None:
+        return "duplicate"
+
+    near = dedup_index.find_near(compact_case)
+    if near and args.skip_near_duplicates:
+        return "near_duplicate"
+
+    all_cases.append(compact_case)
+    dedup_index.add(compact_case)
+    writer.write(compact_case)
+    return "added_near_duplicate" if near else "added"
+
+
+# ---------------- BATCH INPUT ----------------
+def parse_batch(raw: str, fmt: str) -> list:
+    """
+    Split batch input into raw test descriptions.
+
+    text: blocks separated by one or more blank lines (like the interactive prompt).
+    jsonl: one JSON value per line - a string, or an object with a "text",
+    "raw_text" or "test_case" field.
+    """
+    if fmt == "auto":
+        first = raw.lstrip()[:1]
+        fmt = "jsonl" if first in ['{', '"'] else "text"
+
+    if fmt == "text":
+        blocks = re.split(r"\n\s*\n", raw.replace("\r\n", "\n"))
+        return [b.strip() for b in blocks if b.strip()]
+
+    texts = []
+    for line_no, line in enumerate(raw.splitlines(), 1):
+        if not line.strip():
+            continue
+        value = json.loads(line)
+        if isinstance(value, dict):
+            value = value.get("text") or value.get("raw_text") or value.get("test_case")
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"Line {line_no}: expected a string or an object with a 'text' field")
+        texts.append(value.strip())
+    return texts
+
+
+def ingest_one(raw_text: str) -> dict:
+    """process_test_case for one description (cleanup runs over the whole batch); failures are returned, not raised"""
+    with track() as metrics:
+        try:
+            outcome = {"result": require_text(process_test_case(raw_text, fused=args.fused))}
+        except Exception as e:
+            outcome = {"error": f"{type(e).__name__}: {e}"}
+    ingest_metrics.append(metrics)
+    return outcome
+
+
+def ingest_chunk(raw_texts: list) -> list:
+    """Batched ingest_one: the LLM stages see the whole chunk in one call each"""
+    outcomes = []
+    with track() as metrics:
+        for outcome in process_test_cases(raw_texts, batch_size=len(raw_texts)):
+            if "error" in outcome:
+                outcomes.append(outcome)
+                continue
+            try:
+                outcomes.append({"result": require_text(outcome["result"])})
+            except Exception as e:
+                outcomes.append({"error": f"{type(e).__name__}: {e}"})
+    ingest_metrics.append(metrics)
+    return outcomes
 
 
 # ---------------- LOAD EXISTING DATA ----------------
-if os.path.exists(OUTPUT_PATH):
-    try:
-        with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
-            all_cases = json.load(f)
-            if not isinstance(all_cases, list):
-                all_cases = []
-    except json.JSONDecodeError:
-        all_cases = []
-else:
+try:
+    all_cases = [c for c in read_records(OUTPUT_PATH) if isinstance(c, dict)]
+except json.JSONDecodeError:
     all_cases = []
 
+# Cases are appended to test_cases.jsonl as soon as they are saved, so a crash loses nothing.
+# If the JSON export is newer (or the JSONL is missing), re-seed the JSONL from what was loaded.
+jsonl_is_current = os.path.exists(JSONL_PATH) and (
+    not os.path.exists(OUTPUT_PATH) or os.path.getmtime(JSONL_PATH) >= os.path.getmtime(OUTPUT_PATH)
+)
+writer = JsonlWriter(JSONL_PATH, append=jsonl_is_current)
+if not jsonl_is_current:
+    for case in all_cases:
+        writer.write(case)
+
+# Exact + near-duplicate index; MinHash signatures are reused from disk when the store is unchanged
+dedup_index = DuplicateIndex.load_or_build(LSH_PATH, all_cases, threshold=args.near_dup_threshold)
+
+# ---------------- BATCH MODE ----------------
+if args.batch:
+    if args.batch == "-":
+        raw_batch = sys.stdin.read()
+    else:
+        with open(args.batch, "r", encoding="utf-8") as f:
+            raw_batch = f.read()
+
+    try:
+        texts = parse_batch(raw_batch, args.format)
+    except (json.JSONDecodeError, ValueError) as e:
+        console.print(f"[red]❌ Could not parse batch input: {e}[/red]")
+        writer.close()
+        exit(1)
+
+    # Identical raw descriptions would produce identical cases; don't pay the LLM twice
+    texts = list(dict.fromkeys(texts))
+
+    console.print(f"\n[bold cyan]📥 Ingesting {len(texts)} test descriptions ({max(args.workers, 1)} workers)...[/bold cyan]\n")
+
+    # Configure dspy from the main thread before the worker pool starts
+    lm_registry.get_lm()
+
+    # One metrics entry per description (or per LLM batch with --llm-batch-size > 1)
+    ingest_metrics = []
+    with make_progress(console, unit="cases") as progress:
+        task = progress.add_task("[cyan]Processing test cases...", total=len(texts))
+        if args.llm_batch_size > 1:
+            chunk_outcomes = run_ordered(
+                ingest_chunk,
+                list(chunked(texts, args.llm_batch_size)),
+                max_workers=args.workers,
+                on_result=lambda idx, chunk: progress.update(task, advance=len(chunk))
+            )
+            outcomes = [outcome for chunk in chunk_outcomes for outcome in chunk]
+        else:
+            outcomes = run_ordered(
+                ingest_one,
+                texts,
+                max_workers=args.workers,
+                on_result=lambda idx, outcome: progress.update(task, advance=1)
+            )
+
+    # Clean every processed case in one pass, then merge in input order so the suite
+    # is identical however the pool scheduled the work
+    cases = iter(compact_results([outcome["result"] for outcome in outcomes if "error" not in outcome]))
+    counts = {"added": 0, "added_near_duplicate": 0, "duplicate": 0, "near_duplicate": 0}
+    failures = []
+    for idx, (raw_text, outcome) in enumerate(zip(texts, outcomes), 1):
+        if "error" in outcome:
+            failures.append({"index": idx, "raw_text": raw_text, "error": outcome["error"]})
+        else:
+            counts[add_case(next(cases))] += 1
+
+    console.print(
+        f"[green]✅ Added {counts['added'] + counts['added_near_duplicate']} cases[/green] "
+        f"[yellow]({counts['duplicate']} duplicates, {counts['near_duplicate']} near duplicates skipped; "
+        f"{counts['added_near_duplicate']} near duplicates kept)[/yellow]"
+    )
+    unit = "ingest (per batch)" if args.llm_batch_size > 1 else "ingest"
+    console.print(f"[dim]{format_stage(unit, summarize_stage(ingest_metrics))}[/dim]")
+
+    if failures:
+        with JsonlWriter(FAILURES_PATH) as failure_writer:
+            for failure in failures:
+                failure_writer.write(failure)
+        console.print(f"[red]❌ {len(failures)} case(s) failed; details in {FAILURES_PATH}[/red]")
+        for failure in failures[:10]:
+            console.print(f"  #{failure['index']}: {failure['error']}  [dim]{failure['raw_text'][:60]}[/dim]")
+
 # ---------------- INTERACTIVE LOOP ----------------
-while True:
-    console.print("[yellow]🧾 Enter Test Case (press Enter twice to submit):[/yellow]")
-    
-    # Collect multi-line input
-    lines = []
+else:
+    console.print("\n[bold cyan]🧠 DSPy Interactive Test Case Agent[/bold cyan]")
+    console.print("[dim]Type a test case (Q&A or behavioral). Type 'exit' to quit.[/dim]\n")
+
     while True:
-        line = input()
-        if line.strip() == "":
+        console.print("[yellow]🧾 Enter Test Case (press Enter twice to submit):[/yellow]")
+        
+        # Collect multi-line input
+        lines = []
+        while True:
+            line = input()
+            if line.strip() == "":
+                break
+            lines.append(line)
+        
+        user_input = "\n".join(lines).strip()
+        
+        if user_input.lower() in ["exit", "quit"]:
             break
-        lines.append(line)
-    
-    user_input = "\n".join(lines).strip()
-    
-    if user_input.lower() in ["exit", "quit"]:
-        break
-    if not user_input:
-        continue
-
-    result = process_test_case(user_input)
-
-    # 🎯 Extract, CLEAN, and normalize to single sentence
-    raw_input = result.get("input_prompt", "")
-    raw_output = result.get("expected_output", "")
-    
-    # First clean prefixes, then normalize to one sentence
-    compact_case = {
-        "input_prompt": clean_to_one_sentence(clean_text(raw_input)),
-        "expected_output": clean_to_one_sentence(clean_text(raw_output))
-    }
-
-    console.print(f"\n[green]✅ Saved Case:[/green]\n{json.dumps(compact_case, indent=2)}")
-
-    # Optional: skip duplicates
-    if not any(
-        c["input_prompt"] == compact_case["input_prompt"]
-        and c["expected_output"] == compact_case["expected_output"]
-        for c in all_cases
-    ):
-        all_cases.append(compact_case)
-    else:
-        console.print("[yellow]⚠ Duplicate case skipped.[/yellow]")
+        if not user_input:
+            continue
+
+        try:
+            result = process_test_case(user_input, fused=args.fused)
+        except LLMCallError as e:
+            console.print(f"[red]❌ Could not process this case: {e}[/red]\n")
+            continue
+        compact_case = compact_result(result)
+
+        console.print(f"\n[green]✅ Saved Case:[/green]\n{json.dumps(compact_case, indent=2)}")
+
+        # Optional: skip duplicates
+        outcome = add_case(compact_case)
+        if outcome == "duplicate":
+            console.print("[yellow]⚠ Duplicate case skipped.[/yellow]")
+        elif outcome == "near_duplicate":
+            console.print("[yellow]⚠ Near-duplicate case skipped.[/yellow]")
+        elif outcome == "added_near_duplicate":
+            console.print("[yellow]⚠ Saved, but this case is a near duplicate of an existing one.[/yellow]")
 
 # ---------------- SAVE TO FILE ----------------
-with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-    json.dump(all_cases, f, indent=2)
+writer.close()
+dedup_index.save(LSH_PATH, all_cases)
+
+# The classic JSON array stays available as an export of the JSONL stream
+export_json(iter_jsonl(JSONL_PATH), OUTPUT_PATH)
 
-console.print(f"\n[bold green]✅ Test cases saved to {OUTPUT_PATH}[/bold green]")
\ No newline at end of file
+console.print(f"\n[bold green]✅ Test cases saved to {OUTPUT_PATH}[/bold green]")
+console.print(f"[dim]LLM cache: {llm_cache.format_stats()}[/dim]")
+console.print(f"[dim]LLM calls: {call_layer.format_stats()}[/dim]")
+console.print(f"[dim]Classification: {classification_stats.format_stats()}[/dim]")
\ No newline at end of file
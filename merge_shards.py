@@ -0,0 +1,164 @@
+import argparse
+import glob
+import json
+import os
+import re
+from modules.judge import summarize
+from modules.call_layer import merge_snapshots
+from modules.sampling import summarize_sample, sample_path
+from modules.run_history import new_run_id, record_run, HISTORY_PATH
+from modules.fingerprints import Manifest, MANIFEST_PATH, record_test_key
+from modules.sharding import shard_paths
+from modules.jsonl_store import read_records, jsonl_path, JsonlWriter, iter_jsonl, export_json, export_report
+from compare import show_statistics, EXPECTED_PATH, ACTUAL_PATH, COMPARISON_OUTPUT
+from rich.console import Console
+from datetime import datetime
+
+# ------------------- CLI OPTIONS -------------------
+parser = argparse.ArgumentParser(
+    description="Merge the per-shard outputs of `--shard i/N` runs into one agent_responses file and one comparison report."
+)
+parser.add_argument(
+    "--shards",
+    type=int,
+    default=None,
+    help="Shard count N (default: detected from the comparison_report.shard-*-of-N.json files)"
+)
+parser.add_argument(
+    "--allow-missing",
+    action="store_true",
+    help="Merge the shards that finished even if some reports are missing (the summary then covers fewer tests)"
+)
+parser.add_argument(
+    "--sample",
+    action="store_true",
+    help="Merge the shards of a `--sample` run (the *.sample.shard-* files) into the *.sample.* outputs"
+)
+args = parser.parse_args()
+
+# ------------------- SETUP -------------------
+console = Console()
+SHARD_PATTERN = re.compile(r"\.shard-\d+-of-(\d+)\.json$")
+# A sampled run's shards merge into its own files, never into the full suite's
+ACTUAL_OUTPUT = sample_path(ACTUAL_PATH, args.sample)
+REPORT_OUTPUT = sample_path(COMPARISON_OUTPUT, args.sample)
+MANIFEST_OUTPUT = sample_path(MANIFEST_PATH, args.sample)
+
+
+def detect_shard_count() -> int:
+    root, _ = os.path.splitext(REPORT_OUTPUT)
+    counts = {int(SHARD_PATTERN.search(p).group(1)) for p in glob.glob(f"{root}.shard-*-of-*.json") if SHARD_PATTERN.search(p)}
+    if len(counts) != 1:
+        found = ", ".join(str(c) for c in sorted(counts)) or "none"
+        console.print(f"[red]❌ Error: cannot tell the shard count (found shard reports for N = {found}); pass --shards N[/red]")
+        exit(1)
+    return counts.pop()
+
+
+def in_suite_order(rows, positions: dict) -> list:
+    """Rows ordered like expected_results (rows of tests no longer in the suite go last)"""
+    return sorted(rows, key=lambda row: positions.get(record_test_key(row), len(positions)))
+
+
+count = args.shards or detect_shard_count()
+report_paths = shard_paths(REPORT_OUTPUT, count)
+missing = [p for p in report_paths if not os.path.exists(p)]
+if missing:
+    console.print(f"[{'yellow' if args.allow_missing else 'red'}]⚠ {len(missing)} of {count} shard reports missing:[/]")
+    for path in missing:
+        console.print(f"  [dim]{path}[/dim]")
+    if not args.allow_missing or len(missing) == count:
+        console.print("[yellow]💡 Wait for every `compare.py --shard i/N` run to finish, or pass --allow-missing.[/yellow]")
+        exit(1)
+
+# Suite order comes from the full expected_results, so merged test ids match an unsharded run
+positions = {}
+for position, row in enumerate(read_records(EXPECTED_PATH)):
+    positions.setdefault(record_test_key(row), position)
+
+# ------------------- MERGE AGENT RESPONSES -------------------
+answer_paths = [p for p in shard_paths(ACTUAL_OUTPUT, count) if os.path.exists(p) or os.path.exists(jsonl_path(p))]
+if answer_paths:
+    answers = in_suite_order([row for path in answer_paths for row in read_records(path)], positions)
+    with JsonlWriter(jsonl_path(ACTUAL_OUTPUT)) as writer:
+        for row in answers:
+            writer.write(row)
+    export_json(iter_jsonl(jsonl_path(ACTUAL_OUTPUT)), ACTUAL_OUTPUT)
+    console.print(f"[green]✅ Merged {len(answers)} answers from {len(answer_paths)} shard(s) into {ACTUAL_OUTPUT}[/green]")
+
+# ------------------- MERGE COMPARISON REPORTS -------------------
+headers = []
+rows = {}
+for path in report_paths:
+    if path in missing:
+        continue
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    headers.append(report)
+    for row in report.get("comparisons", []):
+        # A test lives in exactly one shard; keep the first copy if stale files disagree
+        rows.setdefault(record_test_key(row), row)
+
+methods = {h.get("comparison_method") for h in headers}
+if len(methods) > 1:
+    console.print(f"[yellow]⚠ Shards used different comparison methods: {', '.join(sorted(map(str, methods)))}[/yellow]")
+
+comparison_results = in_suite_order(rows.values(), positions)
+for test_id, row in enumerate(comparison_results, 1):
+    row["test_id"] = test_id
+
+# The summary is recomputed from the merged rows, never added up from shard summaries
+summary = summarize(comparison_results)
+shard_walls = [h["summary"].get("performance", {}).get("judge", {}).get("wall_s") for h in headers]
+if "judge" in summary["performance"] and any(w is not None for w in shard_walls):
+    # Shards run side by side, so the run took as long as the slowest shard
+    summary["performance"]["judge"]["wall_s"] = max(w for w in shard_walls if w is not None)
+summary["llm_outcomes"] = merge_snapshots(h["summary"].get("llm_outcomes") for h in headers)
+plans = [h["summary"]["sample"] for h in headers if h["summary"].get("sample")]
+if plans:
+    # Shards split one suite-wide sample, so any shard's plan describes the whole of it
+    summary["sample"] = summarize_sample(comparison_results, plans[0])
+
+report_header = {
+    "run_id": new_run_id(),
+    "timestamp": datetime.now().isoformat(),
+    "comparison_method": headers[0].get("comparison_method") if len(methods) == 1 else "mixed",
+    "shards": {"count": count, "merged": len(headers), "runs": [h.get("run_id") for h in headers]},
+    "summary": summary
+}
+aborted = [h for h in headers if h.get("aborted")]
+partial = aborted or plans
+if aborted:
+    report_header["aborted"] = {
+        "reason": f"{len(aborted)} shard(s) aborted early: " + "; ".join(h["aborted"]["reason"] for h in aborted),
+        "not_run": sum(h["aborted"].get("not_run", 0) for h in aborted),
+    }
+
+with JsonlWriter(jsonl_path(REPORT_OUTPUT)) as writer:
+    for row in comparison_results:
+        writer.write(row)
+export_report(report_header, iter_jsonl(jsonl_path(REPORT_OUTPUT)), REPORT_OUTPUT)
+
+# Fold the shard manifests into the main one, so a later unsharded run can reuse every shard's work
+manifest = Manifest(MANIFEST_OUTPUT)
+for stage in ["ask", "compare"]:
+    entries = {}
+    for path in shard_paths(MANIFEST_OUTPUT, count):
+        entries.update(Manifest(path).stages.get(stage, {}))
+    if entries:
+        manifest.update_stage(stage, entries)
+manifest.save()
+
+console.print(f"[green]✅ Merged {len(comparison_results)} rows from {len(headers)} of {count} shards into {REPORT_OUTPUT}[/green]")
+if aborted:
+    console.print(f"[bold red]🛑 {report_header['aborted']['reason']}[/bold red]")
+if partial:
+    # As in compare.py, aborted and sampled runs stay out of the history
+    console.print(f"[dim]📚 {'Aborted' if aborted else 'Sampled'} run not recorded in the run history[/dim]\n")
+else:
+    record_run(report_header, comparison_results)
+    console.print(f"[dim]📚 Run {report_header['run_id']} recorded in {HISTORY_PATH}[/dim]\n")
+
+show_statistics({**report_header, "comparisons": comparison_results})
+if aborted:
+    exit(1)
@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import threading
+from modules.llm_cache import CachedPredictor
+from modules.metrics import record_retry
+from modules.call_layer import CircuitOpenError
+
+# ------------------- BATCH SETTINGS -------------------
+BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "8"))
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def parse_json_array(text: str) -> list:
+    """Parse a model's JSON array answer, tolerating code fences and prose around it"""
+    text = _FENCE_RE.sub("", (text or "").strip())
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("["), text.rfind("]")
+        if start < 0 or end <= start:
+            raise ValueError("Batch response is not a JSON array")
+        data = json.loads(text[start:end + 1])
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        data = data["results"]
+    if not isinstance(data, list):
+        raise ValueError("Batch response is not a JSON array")
+    return data
+
+
+def chunked(items: list, size: int):
+    for start in range(0, len(items), max(size, 1)):
+        yield items[start:start + size]
+
+
+# ------------------- BATCHED PROGRAM -------------------
+class BatchedPredictor:
+    """
+    Answer N items of a single-item signature with one LLM call.
+
+    The batch signature takes a JSON array of `{"id", **inputs}` items and must
+    return a JSON array of `{"id", **outputs}`. Results are mapped back by id and
+    checked with `required` (output keys) and `validate` (optional predicate).
+    A batch that fails outright is split in half and retried; items the model
+    dropped or mangled are retried on their own with the single-item predictor.
+
+    Args:
+        stage: Stage name for cache stats (the batch calls use "<stage>_batch")
+        batch_signature: dspy.Signature (or "module:ClassName" reference) with `items_json` in and `results_json` out
+        single: CachedPredictor for the original one-item signature
+        single_output: Output field of `single` holding its JSON answer
+        required: Keys every per-item result must have
+        validate: Optional predicate(result) -> bool for extra checks
+    """
+
+    def __init__(self, stage: str, batch_signature, single: CachedPredictor, single_output: str,
+                 required=(), validate=None):
+        self.stage = stage
+        self.program = CachedPredictor(
+            f"{stage}_batch", batch_signature, validate=lambda outputs: parse_json_array(outputs["results_json"])
+        )
+        self.single = single
+        self.single_output = single_output
+        self.required = tuple(required)
+        self.validate = validate
+        self.stats = {"batch_calls": 0, "single_calls": 0, "items_retried": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _valid(self, result) -> bool:
+        if not isinstance(result, dict) or any(result.get(k) in (None, "") for k in self.required):
+            return False
+        return self.validate is None or self.validate(result)
+
+    def _call_single(self, inputs: dict):
+        """One item through the original signature; returns the parsed dict or the exception"""
+        self._count("single_calls")
+        try:
+            result = json.loads(getattr(self.single(**inputs), self.single_output))
+        except Exception as e:
+            return e
+        return result if self._valid(result) else ValueError(f"Invalid {self.stage} output: {result!r}")
+
+    def __call__(self, items: list) -> list:
+        """
+        Run `items` (dicts of the single signature's inputs) and return one entry per
+        item, in order: the parsed output dict, or the exception that item ended with.
+        """
+        if not items:
+            return []
+        if len(items) == 1:
+            return [self._call_single(items[0])]
+
+        self._count("batch_calls")
+        try:
+            response = self.program(items_json=json.dumps(
+                [{"id": idx, **inputs} for idx, inputs in enumerate(items)], ensure_ascii=False
+            ))
+            rows = parse_json_array(response.results_json)
+        except CircuitOpenError as e:
+            # The provider is down; splitting the batch would only queue more rejected calls
+            return [e] * len(items)
+        except Exception:
+            # Whole batch unusable: halve it so one poisonous item cannot sink the rest
+            middle = len(items) // 2
+            record_retry()
+            return self(items[:middle]) + self(items[middle:])
+
+        by_id = {}
+        for row in rows:
+            if isinstance(row, dict) and isinstance(row.get("id"), int) and row["id"] not in by_id:
+                by_id[row["id"]] = row
+
+        results = []
+        for idx, inputs in enumerate(items):
+            row = by_id.get(idx)
+            if row is not None and self._valid(row):
+                results.append({k: v for k, v in row.items() if k != "id"})
+            else:
+                self._count("items_retried")
+                record_retry()
+                results.append(self._call_single(inputs))
+        return results
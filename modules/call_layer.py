@@ -0,0 +1,300 @@
+import os
+import time
+import random
+import threading
+from modules.metrics import record_retry
+from modules.mock_lm import MockLMError
+
+# ------------------- CALL LAYER SETTINGS -------------------
+RATE_LIMIT_RPS = float(os.getenv("LLM_RATE_LIMIT_RPS", "0"))         # 0 = no request-rate limit
+RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LATENCY_TARGET_MS = float(os.getenv("LLM_LATENCY_TARGET_MS", "0"))  # 0 = latency never shrinks the window
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+RETRY_BASE_S = float(os.getenv("LLM_RETRY_BASE_S", "0.5"))
+RETRY_MAX_S = float(os.getenv("LLM_RETRY_MAX_S", "20"))
+BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "10"))
+BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", "30"))
+
+OUTCOME_COUNTERS = [
+    "attempts", "succeeded", "retries", "rate_limited", "transient_errors",
+    "fatal_errors", "failed", "circuit_rejected",
+]
+
+TRANSIENT_STATUS = {408, 409, 425, 500, 502, 503, 504, 529}
+TRANSIENT_NAMES = ("Timeout", "APIConnection", "ServiceUnavailable", "InternalServer", "Overloaded")
+
+
+class LLMCallError(RuntimeError):
+    """An LLM call that still failed after the call layer's retries (the cause is chained)"""
+
+
+class CircuitOpenError(LLMCallError):
+    """Raised without calling the provider while the circuit breaker is open"""
+
+
+def classify_error(exc: Exception) -> str:
+    """"rate_limit", "transient" (worth retrying) or "fatal" for a provider exception"""
+    name = type(exc).__name__
+    status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    text = str(exc).lower()
+    if status == 429 or "RateLimit" in name or "rate limit" in text or "too many requests" in text:
+        return "rate_limit"
+    if (
+        status in TRANSIENT_STATUS
+        or any(part in name for part in TRANSIENT_NAMES)
+        or isinstance(exc, (TimeoutError, ConnectionError, MockLMError))
+    ):
+        return "transient"
+    return "fatal"
+
+
+def backoff_delay(attempt: int, base_s: float = RETRY_BASE_S, max_s: float = RETRY_MAX_S) -> float:
+    """Exponential backoff with full jitter for retry number `attempt` (1-based)"""
+    return random.uniform(0, min(max_s, base_s * 2 ** (attempt - 1)))
+
+
+# ------------------- RATE LIMIT -------------------
+class TokenBucket:
+    """Requests per second with bursts; callers reserve a token and sleep outside the lock"""
+
+    def __init__(self, rate: float = RATE_LIMIT_RPS, burst: int = RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait_s = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait_s:
+            time.sleep(wait_s)
+
+
+# ------------------- ADAPTIVE CONCURRENCY -------------------
+class AIMDLimiter:
+    """
+    In-flight call limit that adapts like TCP congestion control.
+
+    Each successful call grows the limit by 1/limit (about +1 per window of
+    calls). A rate-limit response, or a call slower than `latency_target_ms`,
+    halves it, at most once per `cooldown_s` so one burst of 429s counts as one
+    congestion signal.
+    """
+
+    def __init__(self, initial: int = INITIAL_CONCURRENCY, minimum: int = 1, maximum: int = MAX_CONCURRENCY,
+                 latency_target_ms: float = LATENCY_TARGET_MS, cooldown_s: float = 1.0):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.latency_target_ms = latency_target_ms
+        self.cooldown_s = cooldown_s
+        self.in_flight = 0
+        # -inf, not 0: time.monotonic() may itself be below cooldown_s (e.g. shortly after boot)
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, outcome: str, latency_ms: float):
+        with self._cond:
+            self.in_flight -= 1
+            slow = self.latency_target_ms > 0 and latency_ms > self.latency_target_ms
+            if outcome == "rate_limit" or slow:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown_s:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            elif outcome == "success":
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+# ------------------- CIRCUIT BREAKER -------------------
+class CircuitBreaker:
+    """
+    Stop calling a provider that keeps failing.
+
+    After `threshold` consecutive transient failures (timeouts, 5xx, dropped
+    connections) the circuit opens and calls fail fast with CircuitOpenError.
+    After `reset_s`, one probe call is let through: success closes the circuit,
+    failure opens it again. Rate-limit responses are left to the AIMD limiter
+    and never count here.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_s: float = BREAKER_RESET_S):
+        self.threshold = threshold
+        self.reset_s = reset_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_s:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "open":
+                return False
+            if self.state == "half_open":
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def release_probe(self):
+        """A rate-limited probe says nothing about health: stay half-open and let the next call probe"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.threshold > 0 and self.failures >= self.threshold):
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+# ------------------- CALL LAYER -------------------
+class LLMCallLayer:
+    """
+    The one path every LLM request takes (CachedPredictor routes program calls here).
+
+    Each attempt waits for a rate-limit token and an adaptive concurrency slot,
+    then runs. Rate limits and transient errors are retried with jittered
+    exponential backoff. Fatal errors, and failures that outlast the retries,
+    are raised as LLMCallError. Callers therefore see either a real answer or
+    an explicit error, never a silent substitute. Outcomes are counted per stage
+    for the reports.
+    """
+
+    def __init__(self, max_retries: int = MAX_RETRIES):
+        self.max_retries = max_retries
+        self.bucket = TokenBucket()
+        self.limiter = AIMDLimiter()
+        self.breaker = CircuitBreaker()
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _count(self, stage: str, key: str):
+        with self._lock:
+            stage_stats = self.stats.setdefault(stage, dict.fromkeys(OUTCOME_COUNTERS, 0))
+            stage_stats[key] += 1
+
+    def call(self, stage: str, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count(stage, "circuit_rejected")
+                raise CircuitOpenError(f"{stage}: circuit breaker open after repeated LLM failures")
+
+            self.bucket.acquire()
+            self.limiter.acquire()
+            self._count(stage, "attempts")
+            start = time.perf_counter()
+            error = None
+            outcome = "success"
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                error = e
+                outcome = classify_error(e)
+            finally:
+                self.limiter.release(outcome, (time.perf_counter() - start) * 1000)
+
+            if error is None:
+                self.breaker.record_success()
+                self._count(stage, "succeeded")
+                return result
+
+            self._count(stage, {"rate_limit": "rate_limited", "transient": "transient_errors"}.get(outcome, "fatal_errors"))
+            if outcome == "transient":
+                self.breaker.record_failure()
+            elif outcome == "rate_limit":
+                # Never counts as a failure, but a half-open probe must not stay claimed forever
+                self.breaker.release_probe()
+            elif outcome == "fatal":
+                # The provider answered (e.g. a 400 for this input): it is up, only this call is bad
+                self.breaker.record_success()
+            if outcome == "fatal" or attempt >= self.max_retries:
+                self._count(stage, "failed")
+                raise LLMCallError(
+                    f"{stage}: LLM call failed after {attempt + 1} attempt(s): {type(error).__name__}: {error}"
+                ) from error
+
+            attempt += 1
+            self._count(stage, "retries")
+            record_retry()
+            time.sleep(backoff_delay(attempt))
+
+    def snapshot(self) -> dict:
+        """Per-stage outcome counters plus the limiter/breaker state, for the report summary"""
+        with self._lock:
+            outcomes = {stage: dict(s) for stage, s in sorted(self.stats.items())}
+        return {
+            "stages": outcomes,
+            "concurrency_limit": int(self.limiter.limit),
+            "rate_limit_rps": self.bucket.rate,
+            "circuit_state": self.breaker.state,
+            "circuit_opened": self.breaker.opened,
+        }
+
+    def format_stats(self) -> str:
+        """One-line per-stage summary for console output"""
+        if not self.stats:
+            return "no LLM calls"
+        parts = []
+        for stage, s in sorted(self.stats.items()):
+            detail = f"{s['succeeded']}/{s['attempts']} ok"
+            for key in ["retries", "rate_limited", "failed", "circuit_rejected"]:
+                if s[key]:
+                    detail += f", {s[key]} {key.replace('_', ' ')}"
+            parts.append(f"{stage}: {detail}")
+        return "; ".join(parts) + f" (concurrency limit {int(self.limiter.limit)}, circuit {self.breaker.state})"
+
+
+def merge_snapshots(snapshots) -> dict:
+    """Combine the `llm_outcomes` of several processes (e.g. shards) into one block of the same shape"""
+    snapshots = [s for s in snapshots if s]
+    stages = {}
+    for snapshot in snapshots:
+        for stage, counters in snapshot.get("stages", {}).items():
+            merged = stages.setdefault(stage, dict.fromkeys(OUTCOME_COUNTERS, 0))
+            for key, value in counters.items():
+                merged[key] = merged.get(key, 0) + value
+    states = {s.get("circuit_state") for s in snapshots}
+    return {
+        "stages": dict(sorted(stages.items())),
+        # Processes limit themselves independently, so their limits add up
+        "concurrency_limit": sum(s.get("concurrency_limit", 0) for s in snapshots),
+        "rate_limit_rps": sum(s.get("rate_limit_rps", 0) for s in snapshots),
+        "circuit_state": next((state for state in ("open", "half_open") if state in states), "closed"),
+        "circuit_opened": sum(s.get("circuit_opened", 0) for s in snapshots),
+    }
+
+
+call_layer = LLMCallLayer()
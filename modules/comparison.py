@@ -0,0 +1,149 @@
+import re
+import json
+import math
+
+# ------------------- TIER SETTINGS -------------------
+# Lexical scores at or below LOW are clear failures, at or above HIGH clear passes;
+# anything in between is sent to the LLM judge.
+LEXICAL_LOW = 10.0
+LEXICAL_HIGH = 90.0
+
+TIER_EXACT = "exact"
+TIER_LEXICAL = "lexical"
+TIER_LLM = "llm_judge"
+TIER_ERROR = "error"
+
+_PREFIX_RE = re.compile(r"^\s*(user|agent)\s*[:\-]\s*", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+# ------------------- NORMALIZATION -------------------
+def normalize_answer(text: str) -> str:
+    """Lowercase, drop 'User:'/'Agent:' prefixes and punctuation, collapse whitespace"""
+    if not text:
+        return ""
+    text = _PREFIX_RE.sub("", text)
+    text = _NON_WORD_RE.sub(" ", text.lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+# ------------------- LEXICAL SCORING -------------------
+def word_overlap_score(expected: str, actual: str) -> float:
+    """
+    Share of expected words present in the actual answer (0-100).
+
+    Only the mock judge (modules.mock_lm) scores with this; the lexical tier uses
+    lexical_scores (token-set F1).
+    """
+    expected_words = set(expected.lower().split())
+    actual_words = set(actual.lower().split())
+    if not expected_words:
+        return 0
+    intersection = expected_words.intersection(actual_words)
+    return (len(intersection) / len(expected_words)) * 100
+
+
+def lexical_scores(pairs) -> list:
+    """
+    Score a batch of (expected, actual) pairs by token-set F1 (0-100).
+
+    Tokens are interned to integer ids once for the whole batch, so each pair
+    costs two small set operations no matter how long the suite is.
+    """
+    vocab = {}
+    scores = []
+    for expected, actual in pairs:
+        e = {vocab.setdefault(tok, len(vocab)) for tok in normalize_answer(expected).split()}
+        a = {vocab.setdefault(tok, len(vocab)) for tok in normalize_answer(actual).split()}
+        if not e or not a:
+            scores.append(0.0)
+            continue
+        common = len(e & a)
+        scores.append(round(200.0 * common / (len(e) + len(a)), 2))
+    return scores
+
+
+# ------------------- FAST-PATH TIERS -------------------
+def decide_fast_tiers(pairs, low: float = LEXICAL_LOW, high: float = LEXICAL_HIGH, scorer=lexical_scores,
+                      scorer_name: str = "overlap") -> list:
+    """
+    Run the deterministic tiers over a batch of (expected, actual) pairs.
+
+    `scorer` maps the whole batch of pairs to 0-100 scores for the lexical tier
+    (token-set F1 by default; modules.similarity.pairwise_cosine for TF-IDF).
+    `scorer_name` ("overlap", "tfidf") names it in the decision's reasoning.
+
+    Returns one entry per pair: a comparison dict (same keys as the LLM judge
+    plus `decided_by`) when a tier is confident, or None when the row falls in
+    the uncertain band and needs the LLM judge.
+    """
+    pairs = list(pairs)
+    scores = scorer(pairs)
+    decisions = []
+
+    for (expected, actual), score in zip(pairs, scores):
+        score = float(score)
+        norm_expected = normalize_answer(expected)
+        norm_actual = normalize_answer(actual)
+
+        if norm_expected and norm_expected == norm_actual:
+            decisions.append({
+                "are_equivalent": True,
+                "similarity_score": 100,
+                "reasoning": "Exact match after normalization",
+                "decided_by": TIER_EXACT
+            })
+        elif not norm_actual:
+            decisions.append({
+                "are_equivalent": False,
+                "similarity_score": 0,
+                "reasoning": "Empty actual answer",
+                "decided_by": TIER_EXACT
+            })
+        elif score >= high:
+            decisions.append({
+                "are_equivalent": True,
+                "similarity_score": score,
+                "reasoning": f"Lexical score ({scorer_name}) {score}% is above the {high}% pass band",
+                "decided_by": TIER_LEXICAL
+            })
+        elif score <= low:
+            decisions.append({
+                "are_equivalent": False,
+                "similarity_score": score,
+                "reasoning": f"Lexical score ({scorer_name}) {score}% is below the {low}% fail band",
+                "decided_by": TIER_LEXICAL
+            })
+        else:
+            decisions.append(None)
+
+    return decisions
+
+
+# ------------------- LLM VERDICT -------------------
+def parse_verdict(text: str) -> dict:
+    """
+    The LLM judge's JSON verdict, checked and normalized to
+    {"are_equivalent": bool, "similarity_score": float, "reasoning": str}.
+
+    Raises ValueError when the reply is not a JSON object or its score is not a number.
+    """
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"judge verdict is not a JSON object: {str(text)[:80]!r}")
+    raw_score = data.get("similarity_score", 0)
+    try:
+        score = float(raw_score.strip().rstrip("%") if isinstance(raw_score, str) else raw_score)
+    except (TypeError, ValueError):
+        raise ValueError(f"judge similarity_score is not a number: {raw_score!r}")
+    if isinstance(raw_score, bool) or not math.isfinite(score):
+        raise ValueError(f"judge similarity_score is not a number: {raw_score!r}")
+    are_equivalent = data.get("are_equivalent", False)
+    if isinstance(are_equivalent, str):
+        are_equivalent = are_equivalent.strip().lower() == "true"
+    return {
+        "are_equivalent": bool(are_equivalent),
+        "similarity_score": score,
+        "reasoning": str(data.get("reasoning") or ""),
+    }
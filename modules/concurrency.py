@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# ------------------- WORKER POOL DEFAULTS -------------------
+DEFAULT_WORKERS = int(os.getenv("PIPELINE_WORKERS", "8"))
+
+
+# ------------------- ORDERED PARALLEL MAP -------------------
+def run_ordered(fn, items, max_workers: int = DEFAULT_WORKERS, on_result=None, should_stop=None):
+    """
+    Apply `fn` to every item on a bounded thread pool and return results in input order.
+
+    At most `max_workers * 2` calls are in flight at once, so memory stays flat for
+    very large suites. `on_result(index, result)` is called from the calling thread as
+    soon as each item finishes (completion order), which is what drives progress bars.
+
+    `should_stop()` is checked before each new item is started; once it returns True
+    no more items start, the calls in flight finish, and unstarted items stay None.
+    """
+    items = list(items)
+    results = [None] * len(items)
+
+    if max_workers <= 1:
+        for idx, item in enumerate(items):
+            if should_stop and should_stop():
+                break
+            results[idx] = fn(item)
+            if on_result:
+                on_result(idx, results[idx])
+        return results
+
+    window = max_workers * 2
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        next_idx = 0
+        while next_idx < len(items) or pending:
+            if should_stop and should_stop():
+                next_idx = len(items)
+            while next_idx < len(items) and len(pending) < window:
+                pending[pool.submit(fn, items[next_idx])] = next_idx
+                next_idx += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = pending.pop(future)
+                results[idx] = future.result()
+                if on_result:
+                    on_result(idx, results[idx])
+
+    return results
@@ -0,0 +1,184 @@
+import os
+import zlib
+import hashlib
+import numpy as np
+from modules.comparison import normalize_answer
+
+# ------------------- DEDUP SETTINGS -------------------
+NUM_PERM = 128
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_SEED = 1
+
+
+# ------------------- SHINGLES & MINHASH -------------------
+def exact_key(case: dict) -> tuple:
+    """Byte-identical duplicate key (same rule the interactive loop always used)"""
+    return (case.get("input_prompt") or "", case.get("expected_output") or "")
+
+
+def shingles(case: dict) -> np.ndarray:
+    """crc32 ids of word 3-gram shingles of the prompt and expected output (tagged per field)"""
+    ids = set()
+    for field in ["input_prompt", "expected_output"]:
+        words = normalize_answer(case.get(field) or "").split()
+        size = min(SHINGLE_SIZE, len(words)) or 1
+        for i in range(max(len(words) - size + 1, 1)):
+            gram = " ".join(words[i:i + size])
+            ids.add(zlib.crc32(f"{field}:{gram}".encode("utf-8")))
+    return np.fromiter(ids, dtype=np.uint64, count=len(ids))
+
+
+class MinHasher:
+    """Universal-hash MinHash: `num_perm` functions (a*x + b) mod (2^31 - 1), vectorized over shingles"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = _SEED):
+        rng = np.random.default_rng(seed)
+        prime = int(_MERSENNE_PRIME)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, prime, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, prime, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_ids: np.ndarray) -> np.ndarray:
+        x = shingle_ids % _MERSENNE_PRIME
+        hashed = (np.outer(self.a, x) + self.b[:, None]) % _MERSENNE_PRIME
+        return hashed.min(axis=1).astype(np.uint32)
+
+
+def optimal_bands(threshold: float, num_perm: int = NUM_PERM) -> tuple:
+    """(bands, rows) whose LSH S-curve midpoint (1/b)^(1/r) sits closest to `threshold`"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1.0 / bands) ** (1.0 / rows)
+        error = abs(midpoint - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+# ------------------- DUPLICATE INDEX -------------------
+class DuplicateIndex:
+    """
+    Exact hash index + MinHash/LSH near-duplicate index over a test-case store.
+
+    Exact lookups are a dict hit. Near-duplicate lookups only compare against the
+    cases sharing at least one LSH band, then confirm with the estimated Jaccard
+    similarity of the full signatures. MinHash signatures are persisted next to
+    the store so they are not recomputed every session; band buckets are rebuilt
+    from them on load, so the threshold can change between sessions.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self.exact = {}
+        self.signatures = []
+        self.buckets = [{} for _ in range(self.bands)]
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _insert(self, case: dict, signature: np.ndarray) -> int:
+        position = len(self.signatures)
+        self.exact.setdefault(exact_key(case), position)
+        self.signatures.append(signature)
+        for band, key in self._band_keys(signature):
+            self.buckets[band].setdefault(key, []).append(position)
+        return position
+
+    def add(self, case: dict) -> int:
+        """Index a case (in store order) and return its position"""
+        return self._insert(case, self.hasher.signature(shingles(case)))
+
+    def find_exact(self, case: dict):
+        return self.exact.get(exact_key(case))
+
+    def find_near(self, case: dict, signature: np.ndarray = None) -> list:
+        """[(position, estimated_jaccard)] of indexed cases at or above the threshold, best first"""
+        if signature is None:
+            signature = self.hasher.signature(shingles(case))
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(key, []))
+        matches = []
+        for position in candidates:
+            similarity = float(np.mean(self.signatures[position] == signature))
+            if similarity >= self.threshold:
+                matches.append((position, round(similarity, 3)))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def clusters(self) -> list:
+        """Groups (size >= 2) of positions connected by near-duplicate matches, largest first"""
+        parent = list(range(len(self.signatures)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band_buckets in self.buckets:
+            for positions in band_buckets.values():
+                # Greedy leader clustering inside each bucket keeps this linear in bucket size
+                leaders = []
+                for position in positions:
+                    for leader in leaders:
+                        if find(leader) == find(position):
+                            break
+                        if np.mean(self.signatures[leader] == self.signatures[position]) >= self.threshold:
+                            parent[find(position)] = find(leader)
+                            break
+                    else:
+                        leaders.append(position)
+
+        groups = {}
+        for position in range(len(self.signatures)):
+            groups.setdefault(find(position), []).append(position)
+        return sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+    # ------------------- PERSISTENCE -------------------
+    @staticmethod
+    def store_digest(cases) -> str:
+        """Digest of the store's exact keys, used to detect a stale persisted index"""
+        h = hashlib.sha256()
+        for case in cases:
+            prompt, expected = exact_key(case)
+            h.update(prompt.encode("utf-8") + b"\x00" + expected.encode("utf-8") + b"\x01")
+        return h.hexdigest()
+
+    def save(self, path: str, cases):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        signatures = np.stack(self.signatures) if self.signatures else np.zeros((0, self.hasher.num_perm), np.uint32)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            signatures=signatures,
+            num_perm=self.hasher.num_perm,
+            digest=self.store_digest(cases)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_or_build(cls, path: str, cases, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM):
+        """Load persisted signatures if they match `cases`, otherwise rebuild (and the caller saves)"""
+        cases = list(cases)
+        index = cls(threshold, num_perm)
+        if os.path.exists(path):
+            try:
+                data = np.load(path)
+                if int(data["num_perm"]) == num_perm and str(data["digest"]) == cls.store_digest(cases):
+                    for case, signature in zip(cases, data["signatures"]):
+                        index._insert(case, signature)
+                    return index
+            except (OSError, ValueError, KeyError):
+                pass
+        for case in cases:
+            index.add(case)
+        return index
@@ -0,0 +1,156 @@
+import os
+import json
+
+# ------------------- PATH HELPERS -------------------
+def jsonl_path(json_path: str) -> str:
+    """outputs/agent_responses.json -> outputs/agent_responses.jsonl"""
+    root, _ = os.path.splitext(json_path)
+    return root + ".jsonl"
+
+
+def iter_jsonl(path: str):
+    """Yield records from a JSONL file, stopping quietly at a torn final line"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                return
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+
+
+# ------------------- READERS -------------------
+def read_records(json_path: str):
+    """
+    Stream the records of a stage output, whichever of `<name>.jsonl` or the
+    `<name>.json` array export was written most recently.
+
+    Yields nothing when neither file exists. JSON arrays are loaded whole; JSONL
+    files are read one line at a time.
+    """
+    line_path = jsonl_path(json_path)
+    candidates = [p for p in (line_path, json_path) if os.path.exists(p)]
+    if not candidates:
+        return
+    newest = max(candidates, key=os.path.getmtime)
+
+    if newest == line_path:
+        yield from iter_jsonl(line_path)
+        return
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("comparisons", [])
+    yield from data
+
+
+def read_checkpoint(path: str, matches=None) -> list:
+    """
+    Load the valid, in-order prefix of a JSONL checkpoint for `--resume`.
+
+    `matches(index, record)` decides whether the record written at position
+    `index` still belongs there. The file is truncated right after the last
+    accepted record, so a torn line or stale tail is never appended to.
+    """
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    good_offset = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(raw)
+            except json.JSONDecodeError:
+                break
+            if matches is not None and not matches(len(records), record):
+                break
+            records.append(record)
+            good_offset += len(raw)
+
+    with open(path, "r+b") as f:
+        f.truncate(good_offset)
+    return records
+
+
+# ------------------- WRITERS -------------------
+class JsonlWriter:
+    """Append-as-you-go JSONL writer; every record is flushed as soon as it is written"""
+
+    def __init__(self, path: str, append: bool = False):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._f = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, record: dict):
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class OrderedJsonlWriter(JsonlWriter):
+    """
+    JSONL writer for results that finish out of order.
+
+    `put(index, record)` buffers a record until every lower index has been
+    written, so the file is always a contiguous, in-order prefix of the suite
+    and `--resume` can simply skip the records already on disk.
+    """
+
+    def __init__(self, path: str, append: bool = False, start: int = 0):
+        super().__init__(path, append=append)
+        self.next_index = start
+        self._pending = {}
+
+    def put(self, index: int, record: dict):
+        self._pending[index] = record
+        while self.next_index in self._pending:
+            self.write(self._pending.pop(self.next_index))
+            self.next_index += 1
+
+
+# ------------------- JSON EXPORT -------------------
+def _write_array(f, records, indent: str):
+    """Stream records as the body of a JSON array, formatted like json.dump(indent=2)"""
+    first = True
+    for record in records:
+        body = json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n" + indent)
+        f.write(("\n" if first else ",\n") + indent + body)
+        first = False
+    f.write("\n" + indent[:-2] + "]" if not first else "]")
+
+
+def export_json(records, json_path: str):
+    """Write records as the classic indented JSON array export, without holding them all in memory"""
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        _write_array(f, records, "  ")
+    os.replace(tmp_path, json_path)
+
+
+def export_report(header: dict, rows, json_path: str, rows_key: str = "comparisons"):
+    """Write a report object (header fields + streamed row array) in the classic JSON format"""
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for key, value in header.items():
+            body = json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            f.write(f"\n  {json.dumps(key)}: {body},")
+        f.write(f"\n  {json.dumps(rows_key)}: [")
+        _write_array(f, rows, "    ")
+        f.write("\n}")
+    os.replace(tmp_path, json_path)
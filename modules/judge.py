@@ -0,0 +1,152 @@
+from rich.console import Console
+from modules.llm_cache import CachedPredictor
+from modules.fingerprints import fingerprint
+from modules.metrics import summarize_metrics
+from modules.call_layer import LLMCallError
+from modules.comparison import (
+    decide_fast_tiers,
+    lexical_scores,
+    parse_verdict,
+    TIER_LLM,
+    TIER_ERROR,
+)
+from modules.similarity import pairwise_cosine, vector_decisions
+
+console = Console()
+
+# ------------------- COMPARISON METHODS -------------------
+COMPARISON_METHODS = {
+    "tiered": "Tiered (Exact → Lexical → DSPy Chain of Thought)",
+    "cot": "DSPy Chain of Thought (Semantic)",
+    "vector": "Offline TF-IDF Cosine (Hashed N-grams)",
+}
+LEXICAL_SCORERS = {
+    "overlap": lexical_scores,
+    "tfidf": pairwise_cosine,
+}
+
+PASSING_STATUSES = ["PASS", "PARTIAL"]
+STATUS_ERROR = "ERROR"
+
+# Initialize Chain of Thought comparator (served from the persistent LLM cache when possible)
+semantic_comparator = CachedPredictor(
+    "judge",
+    "signatures.semantic_comparison:SemanticComparisonSignature",
+    validate=lambda outputs: parse_verdict(outputs["comparison_json"])
+)
+
+
+# ------------------- SEMANTIC COMPARISON LOGIC -------------------
+def compare_answers_semantic(question: str, expected: str, actual: str) -> dict:
+    """
+    Use DSPy Chain of Thought to semantically compare answers.
+
+    Raises LLMCallError (after the call layer's retries) or ValueError for a verdict
+    that is not a JSON object with a numeric score; a failed judgement is never
+    replaced by a guess.
+    """
+    result = semantic_comparator(
+        question=question,
+        expected_answer=expected,
+        actual_answer=actual
+    )
+    return {**parse_verdict(result.comparison_json), "decided_by": TIER_LLM}
+
+
+def fast_decisions(answer_pairs, method: str, lexical_band, lexical_scorer: str, vector_pass_score: float) -> list:
+    """Decisions the configured method can make without the LLM judge (None = needs the judge)"""
+    if method == "tiered":
+        low, high = lexical_band
+        return decide_fast_tiers(
+            answer_pairs, low=low, high=high, scorer=LEXICAL_SCORERS[lexical_scorer], scorer_name=lexical_scorer
+        )
+    if method == "vector":
+        # Every row scored in one batch; the LLM judge is never called
+        return vector_decisions(answer_pairs, pass_score=vector_pass_score)
+    return [None] * len(answer_pairs)
+
+
+def judge_fingerprint(method: str, lexical_band, lexical_scorer: str, vector_pass_score: float) -> str:
+    """Identity of the judge configuration, used by incremental runs"""
+    # The vector method never calls the LLM judge, so it doesn't depend on (or load) it
+    judge_fp = None if method == "vector" else semantic_comparator.fingerprint()
+    return fingerprint(judge_fp, method, list(lexical_band), lexical_scorer, vector_pass_score)
+
+
+# ------------------- REPORT ROWS -------------------
+def build_comparison_row(test_id: int, question: str, expected_answer: str, actual_answer: str,
+                         fast_decision=None) -> dict:
+    """Judge one pair (fast decision first, LLM judge otherwise) and build its report row"""
+    # Deterministic tiers decided the easy rows up front; only the rest pay for the LLM judge
+    try:
+        comparison_data = fast_decision or compare_answers_semantic(question, expected_answer, actual_answer)
+    except (LLMCallError, ValueError, TypeError, KeyError) as e:
+        # One malformed verdict becomes an ERROR row instead of aborting the whole run
+        console.print(f"[yellow]⚠ Judge failed for test #{test_id}: {e}[/yellow]")
+        return error_row(test_id, question, expected_answer, actual_answer, f"Judge failed: {e}")
+    
+    are_equivalent = comparison_data.get("are_equivalent", False)
+    similarity = comparison_data.get("similarity_score", 0)
+    reasoning = comparison_data.get("reasoning", "")
+    
+    # Status determination
+    if are_equivalent:
+        status = "PASS"
+    elif similarity >= 70:
+        status = "PARTIAL"
+    else:
+        status = "FAIL"
+    
+    return {
+        "test_id": test_id,
+        "question": question,
+        "expected_answer": expected_answer,
+        "actual_answer": actual_answer,
+        "status": status,
+        "similarity_score": round(similarity, 2),
+        "are_semantically_equivalent": are_equivalent,
+        "reasoning": reasoning,
+        "decided_by": comparison_data.get("decided_by", TIER_LLM)
+    }
+
+
+def error_row(test_id: int, question: str, expected_answer: str, actual_answer, reason: str) -> dict:
+    """
+    Report row for a test that could not be judged (agent or judge call failed).
+    It is neither a pass nor a fail: summaries count it under `errors`.
+    """
+    return {
+        "test_id": test_id,
+        "question": question,
+        "expected_answer": expected_answer,
+        "actual_answer": actual_answer or "",
+        "status": STATUS_ERROR,
+        "similarity_score": 0,
+        "are_semantically_equivalent": False,
+        "reasoning": reason,
+        "decided_by": TIER_ERROR
+    }
+
+
+def summarize(rows) -> dict:
+    """
+    The report `summary` block for a list of comparison rows.
+    ERROR rows are counted separately and left out of the pass rate.
+    """
+    passed = sum(1 for r in rows if r["status"] in PASSING_STATUSES)
+    errors = sum(1 for r in rows if r["status"] == STATUS_ERROR)
+    failed = len(rows) - passed - errors
+    judged = passed + failed
+    decided_by_counts = {}
+    for r in rows:
+        decided_by = r.get("decided_by", TIER_LLM)
+        decided_by_counts[decided_by] = decided_by_counts.get(decided_by, 0) + 1
+    return {
+        "total_tests": len(rows),
+        "passed": passed,
+        "failed": failed,
+        "errors": errors,
+        "pass_rate": round((passed / judged) * 100, 2) if judged else 0,
+        "decided_by": decided_by_counts,
+        "performance": summarize_metrics(rows)
+    }
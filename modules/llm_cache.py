@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from modules.fingerprints import signature_fingerprint, program_fingerprint
+from modules.lm_registry import lm_registry
+from modules import metrics
+from modules.call_layer import call_layer
+
+# ------------------- CACHE SETTINGS -------------------
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "outputs/llm_cache.sqlite")
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "200000"))
+CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLE", "0") == "1"
+
+# Run a size/age sweep after this many writes in one process
+EVICT_EVERY_N_WRITES = 1000
+
+
+# ------------------- CACHE KEY -------------------
+def make_cache_key(model: str, signature, module_type: str, inputs: dict, lm_kwargs: dict = None) -> str:
+    """Content address for one LLM call: model + generation settings + signature + program type + inputs"""
+    payload = {
+        "model": model,
+        "lm_kwargs": lm_kwargs or {},
+        "module": module_type,
+        **signature_fingerprint(signature),
+        "inputs": inputs,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ------------------- SQLITE STORE -------------------
+class LLMCache:
+    """
+    Persistent, content-addressed store of LLM outputs shared by every pipeline stage.
+
+    Entries older than `max_age_days` are dropped, and the least recently used
+    entries are dropped once the store exceeds `max_entries` or `max_mb`.
+    Hit/miss counters are kept per stage for the current process.
+    """
+
+    def __init__(self, path: str = CACHE_PATH,
+                 max_entries: int = CACHE_MAX_ENTRIES,
+                 max_mb: float = CACHE_MAX_MB,
+                 max_age_days: float = CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 86400
+        self.stats = {}
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    signature TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_cache(created_at)")
+            self._evict()
+        return self._conn
+
+    def _count(self, stage: str, outcome: str):
+        stage_stats = self.stats.setdefault(stage, {"hits": 0, "misses": 0})
+        stage_stats[outcome] += 1
+
+    def get(self, stage: str, key: str):
+        """Return the cached output dict for `key`, or None"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count(stage, "misses")
+                return None
+            conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self._count(stage, "hits")
+            return json.loads(row[0])
+
+    def peek(self, key: str):
+        """Like get(), but leaves the hit/miss stats and the LRU order alone (for planning a run)"""
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, stage: str, key: str, model: str, signature_name: str, value: dict):
+        value_json = json.dumps(value, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, stage, model, signature_name, value_json, len(value_json.encode("utf-8")), now, now)
+            )
+            conn.commit()
+            self._writes += 1
+            if self._writes % EVICT_EVERY_N_WRITES == 0:
+                self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under both size limits"""
+        conn = self._conn
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+
+        count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count > self.max_entries or total_bytes > self.max_bytes:
+            keep_bytes = 0
+            keep_count = 0
+            cutoff = None
+            for last_used, size in conn.execute("SELECT last_used, size FROM llm_cache ORDER BY last_used DESC"):
+                if keep_count + 1 > self.max_entries or keep_bytes + size > self.max_bytes:
+                    cutoff = last_used
+                    break
+                keep_count += 1
+                keep_bytes += size
+            if cutoff is not None:
+                conn.execute("DELETE FROM llm_cache WHERE last_used <= ?", (cutoff,))
+        conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def format_stats(self) -> str:
+        """One-line per-stage hit/miss summary for console output"""
+        if not self.stats:
+            return "no cached stages used"
+        parts = []
+        for stage, s in sorted(self.stats.items()):
+            total = s["hits"] + s["misses"]
+            rate = (s["hits"] / total * 100) if total else 0
+            parts.append(f"{stage}: {s['hits']} hits / {s['misses']} misses ({rate:.0f}%)")
+        return ", ".join(parts)
+
+
+llm_cache = LLMCache()
+
+
+def json_output(field: str):
+    """`validate` check for programs whose `field` must hold a JSON object"""
+    def check(outputs: dict) -> bool:
+        return isinstance(json.loads(outputs[field]), dict)
+    return check
+
+
+# ------------------- CACHED PROGRAM WRAPPER -------------------
+class CachedPredictor:
+    """
+    Drop-in replacement for `dspy.ChainOfThought(Signature)` that consults the
+    persistent cache before calling the LLM.
+
+    The dspy program (and the LM behind it) comes from the shared registry and is
+    only built on the first cache miss. Misses go through modules.call_layer
+    (rate limit, adaptive concurrency, retries, circuit breaker) and raise
+    LLMCallError when the call cannot be completed.
+
+    Args:
+        stage: Stage name used for hit/miss counters (e.g. "classifier", "judge")
+        signature: The dspy.Signature class the program answers, or a
+            "package.module:ClassName" reference resolved on first use
+        module_cls: dspy module name (or class) used on a miss (default: ChainOfThought)
+        bypass: Always call the LLM and never read or write the cache (dspy's own
+            LM cache included)
+        validate: Optional check on the outputs dict; answers it rejects (returns
+            False or raises ValueError/TypeError/KeyError) are returned but not cached,
+            so an unparseable reply is asked again next time
+    """
+
+    def __init__(self, stage: str, signature, module_cls="ChainOfThought", bypass: bool = False, validate=None):
+        self.stage = stage
+        self.signature_ref = signature
+        self.module_type = module_cls if isinstance(module_cls, str) else module_cls.__name__
+        self.bypass = bypass or CACHE_DISABLED
+        self.validate = validate
+
+    @property
+    def signature(self):
+        return lm_registry.signature(self.signature_ref)
+
+    @property
+    def program(self):
+        return lm_registry.program(self.module_type, self.signature_ref)
+
+    def fingerprint(self) -> str:
+        """Identity of this program (model + generation settings + signature) for incremental runs"""
+        return program_fingerprint(lm_registry.model, self.signature, lm_registry.generation_kwargs())
+
+    def key(self, inputs: dict) -> str:
+        """Cache key for `inputs` under the current model and generation settings"""
+        return make_cache_key(lm_registry.model, self.signature, self.module_type, inputs, lm_registry.generation_kwargs())
+
+    def _cacheable(self, outputs: dict) -> bool:
+        if self.validate is None:
+            return True
+        try:
+            return self.validate(outputs) is not False
+        except (ValueError, TypeError, KeyError):
+            return False
+
+    def _call_program(self, inputs: dict):
+        """Call the LLM through the shared call layer and record the call for modules.metrics"""
+        # A bypassed call must also skip dspy.LM's own (disk + memory) cache
+        config = {"config": {"cache": False}} if self.bypass else {}
+        result = call_layer.call(self.stage, self.program, **inputs, **config)
+        outputs = {name: result[name] for name in result.keys()}
+        prompt_tokens, completion_tokens = metrics.prediction_usage(
+            result,
+            getattr(self.signature, "instructions", "") + "".join(str(v) for v in inputs.values()),
+            "".join(str(v) for v in outputs.values())
+        )
+        metrics.record_llm_call(lm_registry.model, prompt_tokens, completion_tokens)
+        return result, outputs
+
+    def peek(self, **inputs):
+        """The cached outputs for `inputs` without calling the LLM (None on a miss or when bypassed)"""
+        if self.bypass:
+            return None
+        return llm_cache.peek(self.key(inputs))
+
+    def __call__(self, **inputs):
+        if self.bypass:
+            return self._call_program(inputs)[0]
+
+        key = self.key(inputs)
+        cached = llm_cache.get(self.stage, key)
+        if cached is not None:
+            metrics.record_cache_hit()
+            return lm_registry.prediction(**cached)
+
+        result, outputs = self._call_program(inputs)
+        if self._cacheable(outputs):
+            llm_cache.put(self.stage, key, lm_registry.model, self.signature.__qualname__, outputs)
+        return result
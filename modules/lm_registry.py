@@ -0,0 +1,132 @@
+import os
+import threading
+from importlib import import_module
+from modules.mock_lm import MockLM, MockProgram, MockPrediction, is_mock_model, mock_dspy, adapter_program
+
+# ------------------- MODEL SETTINGS -------------------
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o-mini")
+# Sampling settings sent to real providers; they change the answers, so they are part of every cache key
+GENERATION_DEFAULTS = {
+    "temperature": float(os.getenv("LLM_TEMPERATURE", "0.0")),
+    "max_tokens": int(os.getenv("LLM_MAX_TOKENS", "4000")),
+}
+# LM kwargs that only affect how a call is made, never what it answers
+TRANSPORT_KWARGS = ("api_key", "api_base", "base_url", "num_retries", "cache", "cache_in_memory", "callbacks")
+
+
+# ------------------- REGISTRY -------------------
+class LMRegistry:
+    """
+    Single, lazily created LM and program table for every LLM-backed stage.
+
+    Nothing here imports dspy until a program actually has to call the model, so
+    commands that never need the LM (convert, the dashboard, `--method vector`,
+    cache-only reports) start without paying for dspy/litellm.
+
+    Signatures may be given as classes or as "package.module:ClassName" strings;
+    strings are imported on first use.
+
+    A model named `mock` (or `mock/...`) selects the deterministic offline
+    backend in modules.mock_lm instead of a real provider; `lm_kwargs` such as
+    latency_ms, jitter_ms and error_rate are passed to it. When dspy is installed
+    the mock answers through the usual dspy program and adapter, so only the
+    network call is simulated.
+
+    dspy only lets the thread that configured it change its settings, so entry
+    points that fan out to worker pools call `get_lm()` from the main thread first.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL):
+        self.model = model
+        self.lm_kwargs = {}
+        self._lm = None
+        self._programs = {}
+        self._signatures = {}
+        self._lock = threading.RLock()
+
+    def configure(self, model: str = None, **lm_kwargs):
+        """Select the model (e.g. from `--model`); takes effect on the next `get_lm()`"""
+        with self._lock:
+            if model:
+                self.model = model
+            self.lm_kwargs.update(lm_kwargs)
+            self._lm = None
+            self._programs = {}
+
+    @property
+    def is_mock(self) -> bool:
+        return is_mock_model(self.model)
+
+    def get_lm(self):
+        """Create the LM and configure dspy with it, once"""
+        with self._lock:
+            if self._lm is None:
+                if self.is_mock:
+                    self._lm = MockLM(self.model, **self.lm_kwargs)
+                    dspy = mock_dspy()
+                    if dspy is not None:
+                        dspy.configure(track_usage=True)
+                else:
+                    import dspy
+                    # No litellm-internal retries: modules.call_layer owns retry, backoff and the breaker,
+                    # and must see every 429 and transient error
+                    self._lm = dspy.LM(self.model, **{"num_retries": 0, **GENERATION_DEFAULTS, **self.lm_kwargs})
+                    # track_usage lets predictions report their token counts (modules.metrics)
+                    dspy.configure(lm=self._lm, track_usage=True)
+            return self._lm
+
+    def generation_kwargs(self) -> dict:
+        """The LM kwargs that shape answers (temperature, max_tokens, ...); empty for the mock backend"""
+        if self.is_mock:
+            return {}
+        kwargs = {**GENERATION_DEFAULTS, **self.lm_kwargs}
+        return {name: value for name, value in kwargs.items() if name not in TRANSPORT_KWARGS}
+
+    def signature(self, ref):
+        """Resolve a signature class from a class or a "module:ClassName" reference"""
+        if not isinstance(ref, str):
+            return ref
+        with self._lock:
+            if ref not in self._signatures:
+                module_name, _, class_name = ref.partition(":")
+                self._signatures[ref] = getattr(import_module(module_name), class_name)
+            return self._signatures[ref]
+
+    def program(self, module_type: str, signature_ref):
+        """The dspy module (e.g. ChainOfThought) answering a signature, built on first use"""
+        key = (module_type, signature_ref)
+        with self._lock:
+            if key not in self._programs:
+                lm = self.get_lm()
+                signature = self.signature(signature_ref)
+                if self.is_mock:
+                    self._programs[key] = adapter_program(lm, module_type, signature) or MockProgram(
+                        lm, signature.__name__, getattr(signature, "instructions", "")
+                    )
+                else:
+                    import dspy
+                    self._programs[key] = getattr(dspy, module_type)(signature)
+            return self._programs[key]
+
+    def usage(self) -> dict:
+        """Call/error/token counters of the mock LM; empty for real providers or before first use"""
+        return dict(getattr(self._lm, "stats", None) or {})
+
+    def prediction(self, **fields):
+        """Wrap cached outputs like a fresh program result"""
+        if self.is_mock:
+            return MockPrediction(**fields)
+        import dspy
+        return dspy.Prediction(**fields)
+
+
+lm_registry = LMRegistry()
+
+
+def add_model_argument(parser):
+    """Shared `--model` CLI option for commands that call the LLM"""
+    parser.add_argument(
+        "--model",
+        default=DEFAULT_MODEL,
+        help=f"LiteLLM model name for every LLM stage, or 'mock' for the offline test backend (default: {DEFAULT_MODEL}; env LLM_MODEL)"
+    )
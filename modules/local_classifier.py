@@ -0,0 +1,217 @@
+import os
+import json
+import math
+import threading
+from datetime import datetime
+from modules.comparison import normalize_answer
+from modules.jsonl_store import JsonlWriter, iter_jsonl
+
+# ------------------- CLASSIFIER SETTINGS -------------------
+MODEL_PATH = os.getenv("LOCAL_CLASSIFIER_PATH", "outputs/local_classifier.json")
+LABELS_PATH = os.getenv("LOCAL_CLASSIFIER_LABELS", "outputs/classifier_labels.jsonl")
+CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9"))
+LOCAL_CLASSIFIER_DISABLED = os.getenv("LOCAL_CLASSIFIER_DISABLE", "0") == "1"
+MODEL_VERSION = 1
+
+
+# ------------------- FEATURES -------------------
+def ngram_features(text: str) -> list:
+    """Word unigrams and bigrams of the normalized text, plus a leading-word marker"""
+    words = normalize_answer(text).split()
+    features = list(words)
+    features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    if words:
+        features.append(f"^{words[0]}")
+    return features
+
+
+# ------------------- NAIVE BAYES -------------------
+class NaiveBayesClassifier:
+    """
+    Multinomial naive Bayes over word n-grams with Laplace smoothing.
+
+    Trained from the labels the LLM classifier produced for earlier cases.
+    Prediction is a handful of dict lookups, so it is cheap enough to try on
+    every input before paying for an LLM call.
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.labels = []
+        self.log_priors = {}
+        self.log_likelihoods = {}
+        self.log_unseen = {}
+        self.trained_on = 0
+        self.trained_at = None
+
+    def fit(self, texts, labels):
+        texts = list(texts)
+        labels = list(labels)
+        self.labels = sorted(set(labels))
+        doc_counts = {label: 0 for label in self.labels}
+        feature_counts = {label: {} for label in self.labels}
+        vocabulary = set()
+
+        for text, label in zip(texts, labels):
+            doc_counts[label] += 1
+            counts = feature_counts[label]
+            for feature in ngram_features(text):
+                counts[feature] = counts.get(feature, 0) + 1
+                vocabulary.add(feature)
+
+        vocab_size = len(vocabulary) or 1
+        self.log_priors = {label: math.log(doc_counts[label] / len(texts)) for label in self.labels}
+        self.log_likelihoods = {}
+        self.log_unseen = {}
+        for label in self.labels:
+            counts = feature_counts[label]
+            denominator = sum(counts.values()) + self.alpha * vocab_size
+            self.log_unseen[label] = math.log(self.alpha / denominator)
+            self.log_likelihoods[label] = {
+                feature: math.log((count + self.alpha) / denominator) for feature, count in counts.items()
+            }
+        self.trained_on = len(texts)
+        self.trained_at = datetime.now().isoformat()
+        return self
+
+    def predict_proba(self, text: str) -> dict:
+        features = ngram_features(text)
+        scores = {}
+        for label in self.labels:
+            likelihoods = self.log_likelihoods[label]
+            unseen = self.log_unseen[label]
+            scores[label] = self.log_priors[label] + sum(likelihoods.get(f, unseen) for f in features)
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def predict(self, text: str) -> tuple:
+        """(label, confidence) of the most probable class"""
+        probabilities = self.predict_proba(text)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    # ------------------- PERSISTENCE -------------------
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        payload = {
+            "version": MODEL_VERSION,
+            "alpha": self.alpha,
+            "labels": self.labels,
+            "trained_on": self.trained_on,
+            "trained_at": self.trained_at,
+            "log_priors": self.log_priors,
+            "log_unseen": self.log_unseen,
+            "log_likelihoods": self.log_likelihoods,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH):
+        """Load a saved model, or return None if there is none (or it is from another version)"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if payload.get("version") != MODEL_VERSION or len(payload.get("labels", [])) < 2:
+            return None
+        model = cls(payload["alpha"])
+        model.labels = payload["labels"]
+        model.trained_on = payload["trained_on"]
+        model.trained_at = payload["trained_at"]
+        model.log_priors = payload["log_priors"]
+        model.log_unseen = payload["log_unseen"]
+        model.log_likelihoods = payload["log_likelihoods"]
+        return model
+
+
+# ------------------- TRAINING DATA -------------------
+class LabelLog:
+    """
+    Append-only JSONL log of the labels the LLM classifier assigned, i.e. the
+    training set for the local model. Each text is logged once per process.
+    """
+
+    def __init__(self, path: str = LABELS_PATH):
+        self.path = path
+        self._writer = None
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def record(self, text: str, label: str):
+        with self._lock:
+            if text in self._seen:
+                return
+            self._seen.add(text)
+            if self._writer is None:
+                self._writer = JsonlWriter(self.path, append=True)
+            self._writer.write({"text": text, "test_case_type": label})
+
+    def load(self) -> tuple:
+        """(texts, labels) with one entry per distinct text; the latest label wins"""
+        if not os.path.exists(self.path):
+            return [], []
+        latest = {}
+        for row in iter_jsonl(self.path):
+            if row.get("text") and row.get("test_case_type"):
+                latest[row["text"]] = row["test_case_type"]
+        return list(latest.keys()), list(latest.values())
+
+
+label_log = LabelLog()
+
+
+# ------------------- ROUTING STATS -------------------
+class ClassificationStats:
+    """Counts of which tier classified each input: rules, the local model or the LLM"""
+
+    def __init__(self):
+        self.counts = {"rules": 0, "local": 0, "llm": 0}
+        self._lock = threading.Lock()
+
+    def count(self, tier: str):
+        with self._lock:
+            self.counts[tier] += 1
+
+    def llm_avoidance_rate(self) -> float:
+        total = sum(self.counts.values())
+        return (total - self.counts["llm"]) / total * 100 if total else 0.0
+
+    def format_stats(self) -> str:
+        """One-line routing summary for console output"""
+        total = sum(self.counts.values())
+        if not total:
+            return "no cases classified"
+        c = self.counts
+        return (
+            f"rules: {c['rules']}, local model: {c['local']}, LLM: {c['llm']} "
+            f"(LLM avoided for {self.llm_avoidance_rate():.0f}%)"
+        )
+
+
+classification_stats = ClassificationStats()
+
+
+# ------------------- LAZY MODEL ACCESS -------------------
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def get_local_model():
+    """The saved local model (loaded once per process), or None when disabled or untrained"""
+    global _model, _model_loaded
+    if LOCAL_CLASSIFIER_DISABLED:
+        return None
+    with _model_lock:
+        if not _model_loaded:
+            _model = NaiveBayesClassifier.load(MODEL_PATH)
+            _model_loaded = True
+    return _model
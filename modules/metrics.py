@@ -0,0 +1,189 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# ------------------- PRICING -------------------
+# USD per 1M (prompt, completion) tokens; override with LLM_PRICE_PROMPT_PER_1M / LLM_PRICE_COMPLETION_PER_1M
+PRICES_PER_1M = {
+    "openai/gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o-mini": (0.15, 0.60),
+    "openai/gpt-4o": (2.50, 10.00),
+    "gpt-4o": (2.50, 10.00),
+}
+PRICE_OVERRIDE = (os.getenv("LLM_PRICE_PROMPT_PER_1M"), os.getenv("LLM_PRICE_COMPLETION_PER_1M"))
+
+METRIC_FIELDS = ["latency_ms", "llm_calls", "cache_hits", "prompt_tokens", "completion_tokens", "cost_usd", "retries"]
+PERCENTILES = [50, 95, 99]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one call (0 for unknown and mock models)"""
+    if PRICE_OVERRIDE[0] is not None or PRICE_OVERRIDE[1] is not None:
+        prompt_price, completion_price = (float(p or 0) for p in PRICE_OVERRIDE)
+    else:
+        prompt_price, completion_price = PRICES_PER_1M.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+# ------------------- PER-TEST COLLECTION -------------------
+_local = threading.local()
+
+
+def empty_metrics() -> dict:
+    return {
+        "latency_ms": 0.0,
+        "llm_calls": 0,
+        "cache_hits": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost_usd": 0.0,
+        "retries": 0,
+    }
+
+
+def reused_metrics() -> dict:
+    """Metrics for a row reused from a previous run: nothing was spent on it this run"""
+    return {**empty_metrics(), "reused": True}
+
+
+@contextmanager
+def track():
+    """
+    Collect the LLM activity of the current thread inside the block.
+
+    Yields the metrics dict; `latency_ms` is filled in when the block exits.
+    Blocks may nest (e.g. a stage around a retrying call); inner counts are
+    added to the enclosing block as well.
+    """
+    metrics = empty_metrics()
+    outer = getattr(_local, "stack", None)
+    if outer is None:
+        outer = _local.stack = []
+    outer.append(metrics)
+    start = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        metrics["cost_usd"] = round(metrics["cost_usd"], 6)
+        outer.pop()
+        if outer:
+            parent = outer[-1]
+            for field in METRIC_FIELDS[1:]:
+                parent[field] += metrics[field]
+
+
+def _current():
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+def record_cache_hit():
+    metrics = _current()
+    if metrics is not None:
+        metrics["cache_hits"] += 1
+
+
+def record_llm_call(model: str, prompt_tokens: int, completion_tokens: int):
+    metrics = _current()
+    if metrics is not None:
+        metrics["llm_calls"] += 1
+        metrics["prompt_tokens"] += prompt_tokens
+        metrics["completion_tokens"] += completion_tokens
+        metrics["cost_usd"] += estimate_cost(model, prompt_tokens, completion_tokens)
+
+
+def record_retry():
+    metrics = _current()
+    if metrics is not None:
+        metrics["retries"] += 1
+
+
+def prediction_usage(prediction, prompt_text: str, completion_text: str) -> tuple:
+    """
+    (prompt_tokens, completion_tokens) of one program call: dspy's tracked usage
+    when available, otherwise a ~4 characters/token estimate of the texts.
+    """
+    get_usage = getattr(prediction, "get_lm_usage", None)
+    usage = None
+    if callable(get_usage):
+        try:
+            usage = get_usage()
+        except Exception:
+            usage = None
+    if usage:
+        prompt = sum(int(u.get("prompt_tokens", 0) or 0) for u in usage.values())
+        completion = sum(int(u.get("completion_tokens", 0) or 0) for u in usage.values())
+        if prompt or completion:
+            return prompt, completion
+    return max(1, len(prompt_text) // 4), max(1, len(completion_text) // 4)
+
+
+# ------------------- AGGREGATION -------------------
+def percentile(values: list, q: float) -> float:
+    """Linear-interpolated percentile of a sorted or unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize_stage(entries: list, wall_s: float = None) -> dict:
+    """Aggregate per-test metrics of one stage; reused rows count as reused, not in the percentiles"""
+    fresh = [m for m in entries if m and not m.get("reused")]
+    latencies = [m.get("latency_ms", 0.0) for m in fresh]
+    summary = {
+        "tests": len(fresh),
+        "reused": sum(1 for m in entries if m and m.get("reused")),
+        "latency_ms": {f"p{q}": round(percentile(latencies, q), 1) for q in PERCENTILES},
+    }
+    summary["latency_ms"]["mean"] = round(sum(latencies) / len(latencies), 1) if latencies else 0.0
+    for field in METRIC_FIELDS[1:]:
+        summary[field] = sum(m.get(field, 0) for m in fresh)
+    summary["cost_usd"] = round(summary["cost_usd"], 6)
+    if wall_s is not None:
+        summary["wall_s"] = round(wall_s, 3)
+    return summary
+
+
+def summarize_metrics(rows, stages=("ask", "judge")) -> dict:
+    """The `summary.performance` block: per-stage aggregates plus run totals"""
+    performance = {}
+    for stage in stages:
+        entries = [r.get("metrics", {}).get(stage) for r in rows if r.get("metrics", {}).get(stage)]
+        if entries:
+            performance[stage] = summarize_stage(entries)
+    performance["total"] = {
+        field: round(sum(s[field] for s in performance.values()), 6) if field == "cost_usd"
+        else sum(s[field] for s in performance.values())
+        for field in METRIC_FIELDS[1:]
+    }
+    return performance
+
+
+def format_stage(name: str, summary: dict) -> str:
+    """One-line console rendering of a stage aggregate"""
+    latency = summary["latency_ms"]
+    return (
+        f"{name}: p50 {latency['p50']:.0f} ms · p95 {latency['p95']:.0f} ms · p99 {latency['p99']:.0f} ms · "
+        f"{summary['llm_calls']} LLM calls · {summary['cache_hits']} cache hits · "
+        f"{summary['prompt_tokens'] + summary['completion_tokens']} tokens · ${summary['cost_usd']:.4f} · "
+        f"{summary['retries']} retries"
+    )
+
+
+def format_performance(performance: dict) -> str:
+    """Console lines for a `summary.performance` block"""
+    lines = [format_stage(stage, s) for stage, s in performance.items() if stage != "total"]
+    total = performance.get("total")
+    if total:
+        lines.append(
+            f"total: {total['llm_calls']} LLM calls · {total['cache_hits']} cache hits · "
+            f"{total['prompt_tokens']} prompt + {total['completion_tokens']} completion tokens · "
+            f"${total['cost_usd']:.4f} estimated · {total['retries']} retries"
+        )
+    return "\n".join(lines)
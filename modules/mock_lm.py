@@ -0,0 +1,326 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from types import SimpleNamespace
+from functools import lru_cache
+from collections import OrderedDict
+from modules.comparison import word_overlap_score
+
+# ------------------- MOCK SETTINGS -------------------
+MOCK_MODEL_PREFIX = "mock"
+MOCK_LATENCY_MS = float(os.getenv("MOCK_LM_LATENCY_MS", "200"))
+MOCK_JITTER_MS = float(os.getenv("MOCK_LM_JITTER_MS", "50"))
+MOCK_ERROR_RATE = float(os.getenv("MOCK_LM_ERROR_RATE", "0"))
+MOCK_SEED = os.getenv("MOCK_LM_SEED", "0")
+# Answer through dspy's ChatAdapter (prompt formatting + output parsing) when dspy is installed
+MOCK_ADAPTER = os.getenv("MOCK_LM_ADAPTER", "1") == "1"
+# Retry counters kept for calls that have not succeeded yet
+MAX_PENDING_ATTEMPTS = 10_000
+
+
+def is_mock_model(model: str) -> bool:
+    """`mock` or `mock/<anything>` selects the local stand-in backend"""
+    return model == MOCK_MODEL_PREFIX or model.startswith(MOCK_MODEL_PREFIX + "/")
+
+
+class MockLMError(RuntimeError):
+    """Injected failure, raised like a provider error would be"""
+
+
+def _unit(*parts) -> float:
+    """Deterministic number in [0, 1) derived from `parts`"""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def _pick(options: list, *parts):
+    return options[int(_unit(*parts) * len(options))]
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# ------------------- PREDICTION -------------------
+class MockPrediction:
+    """The subset of dspy.Prediction the pipeline uses: attribute/item access and keys()"""
+
+    def __init__(self, **fields):
+        self._fields = fields
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __getitem__(self, name):
+        return self._fields[name]
+
+    def get_lm_usage(self):
+        """Token usage keyed by model, shaped like dspy's tracked usage; None for cached outputs"""
+        return getattr(self, "_usage", None)
+
+    def keys(self):
+        return self._fields.keys()
+
+    def __repr__(self):
+        return f"MockPrediction({self._fields!r})"
+
+
+# ------------------- ANSWER GENERATORS -------------------
+def classify(text: str) -> dict:
+    t = text.lower()
+    if "?" in t or "answer" in t or t.startswith(("q:", "question")):
+        return {"test_case_type": "qa_test", "reasoning": "Mock: the text states a question and its answer."}
+    return {"test_case_type": "behavioral_test", "reasoning": "Mock: the text describes expected agent behavior."}
+
+
+def extract(raw_text: str) -> dict:
+    text = raw_text.strip()
+    cut = text.find("?")
+    question = text[:cut + 1] if cut >= 0 else text
+    answer = text[cut + 1:].strip(" :-") if cut >= 0 else ""
+    for marker in ("answer:", "a:", "expected:"):
+        if answer.lower().startswith(marker):
+            answer = answer[len(marker):].strip()
+    return {
+        "input_prompt": f"User: {question}",
+        "expected_output": f"Agent: {answer or 'I can help you with that booking.'}"
+    }
+
+
+def synthesize(description: str) -> dict:
+    request = _pick(
+        ["I would like to book a venue.", "Can I reserve a room for tomorrow?", "I need a meeting space."],
+        "synth", description
+    )
+    return {
+        "synthetic_input": f"User: {request}",
+        "synthetic_expected_output": f"Agent: {description.strip().rstrip('.')}."
+    }
+
+
+AGENT_REPLIES = [
+    "Agent: Which campus would you like to book at?",
+    "Agent: Sure, what date and time do you need the room?",
+    "Agent: To help you, please provide the campus, date, time and room type.",
+    "Agent: Your booking is confirmed.",
+]
+
+
+def agent_reply(user_query: str) -> str:
+    # Mostly canned replies; some echo the query so the judge sees both passes and failures
+    if _unit("agent-echo", user_query) < 0.3:
+        return f"Agent: {user_query.strip()}"
+    return _pick(AGENT_REPLIES, "agent", user_query)
+
+
+def judge(question: str, expected_answer: str, actual_answer: str) -> dict:
+    similarity = round(word_overlap_score(expected_answer, actual_answer), 2)
+    return {
+        "are_equivalent": similarity >= 70,
+        "similarity_score": similarity,
+        "reasoning": f"Mock: {similarity:.0f}% of the expected words appear in the actual answer."
+    }
+
+
+def fused(raw_text: str) -> dict:
+    cls = classify(raw_text)
+    if cls["test_case_type"] == "qa_test":
+        structured = extract(raw_text)
+    else:
+        synth = synthesize(raw_text)
+        structured = {"input_prompt": synth["synthetic_input"], "expected_output": synth["synthetic_expected_output"]}
+    return {**cls, **structured}
+
+
+def _batch(item_fn):
+    def answer(items_json: str) -> str:
+        items = json.loads(items_json)
+        return json.dumps([{"id": item.get("id"), **item_fn(item)} for item in items], ensure_ascii=False)
+    return answer
+
+
+# Signature class name -> (output field, fn(**inputs) -> str)
+RESPONDERS = {
+    "TestCaseTypeClassifierSignature": ("classification_json", lambda test_input: json.dumps(classify(test_input))),
+    "UnifiedTestCaseExtractorSignature": ("structured_json", lambda test_case_type, raw_text: json.dumps(extract(raw_text))),
+    "BehavioralSynthesizerSignature": ("synthesized_json", lambda behavior_description: json.dumps(synthesize(behavior_description))),
+    "FusedTestCaseSignature": ("result_json", lambda raw_text: json.dumps(fused(raw_text))),
+    "BookingAgentSignature": ("agent_response", lambda user_query: agent_reply(user_query)),
+    "SemanticComparisonSignature": (
+        "comparison_json",
+        lambda question, expected_answer, actual_answer: json.dumps(judge(question, expected_answer, actual_answer))
+    ),
+    "BatchTestCaseTypeClassifierSignature": ("results_json", _batch(lambda item: classify(item["test_input"]))),
+    "BatchUnifiedTestCaseExtractorSignature": ("results_json", _batch(lambda item: extract(item["raw_text"]))),
+    "BatchBehavioralSynthesizerSignature": ("results_json", _batch(lambda item: synthesize(item["behavior_description"]))),
+}
+
+
+# ------------------- MOCK LM -------------------
+class MockLM:
+    """
+    Deterministic, offline stand-in for `dspy.LM("openai/gpt-4o-mini")`.
+
+    Every pipeline signature gets schema-valid output computed from its inputs,
+    so identical inputs always produce identical answers. Each call sleeps for
+    `latency_ms ± jitter_ms` (releasing the GIL, like a network wait) and fails
+    with MockLMError at `error_rate`. Both the jitter and the failures are
+    derived from the inputs and the attempt number, so a retried call can
+    succeed and reruns behave the same. A call's attempt counter is dropped
+    once it succeeds, and at most MAX_PENDING_ATTEMPTS failing calls are tracked.
+    """
+
+    def __init__(self, model: str = MOCK_MODEL_PREFIX, latency_ms: float = MOCK_LATENCY_MS,
+                 jitter_ms: float = MOCK_JITTER_MS, error_rate: float = MOCK_ERROR_RATE, seed: str = MOCK_SEED):
+        self.model = model
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self.stats = {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._attempts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def complete(self, signature_name: str, instructions: str, inputs: dict) -> tuple:
+        """(outputs, usage) of one call; usage is {"prompt_tokens", "completion_tokens"}"""
+        if signature_name not in RESPONDERS:
+            raise MockLMError(f"Mock LM has no responder for {signature_name}")
+        call_key = (signature_name, json.dumps(inputs, sort_keys=True, default=str))
+        with self._lock:
+            attempt = self._attempts.get(call_key, 0)
+            self._attempts[call_key] = attempt + 1
+            self._attempts.move_to_end(call_key)
+            if len(self._attempts) > MAX_PENDING_ATTEMPTS:
+                self._attempts.popitem(last=False)
+            self.stats["calls"] += 1
+
+        delay_ms = self.latency_ms + (2 * _unit(self.seed, "jitter", call_key, attempt) - 1) * self.jitter_ms
+        time.sleep(max(delay_ms, 0) / 1000)
+
+        if _unit(self.seed, "error", call_key, attempt) < self.error_rate:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise MockLMError(f"Injected mock LM failure ({signature_name}, attempt {attempt + 1})")
+
+        with self._lock:
+            self._attempts.pop(call_key, None)
+
+        output_field, respond = RESPONDERS[signature_name]
+        outputs = {
+            "reasoning": f"Mock reasoning for {signature_name}.",
+            output_field: respond(**inputs),
+        }
+        prompt = instructions + "".join(str(v) for v in inputs.values())
+        usage = {
+            "prompt_tokens": _approx_tokens(prompt),
+            "completion_tokens": sum(_approx_tokens(str(v)) for v in outputs.values()),
+        }
+        with self._lock:
+            self.stats["prompt_tokens"] += usage["prompt_tokens"]
+            self.stats["completion_tokens"] += usage["completion_tokens"]
+        return outputs, usage
+
+
+class MockProgram:
+    """ChainOfThought-shaped program answering one signature through a MockLM"""
+
+    def __init__(self, lm: MockLM, signature_name: str, instructions: str = ""):
+        self.lm = lm
+        self.signature_name = signature_name
+        self.instructions = instructions
+
+    def __call__(self, config=None, **inputs):
+        # `config` carries per-call LM settings (e.g. {"cache": False}); the mock has nothing to configure
+        outputs, usage = self.lm.complete(self.signature_name, self.instructions, inputs)
+        prediction = MockPrediction(**outputs)
+        prediction._usage = {self.lm.model: usage}
+        return prediction
+
+
+# ------------------- DSPY ADAPTER PATH -------------------
+FIELD_HEADER = re.compile(r"\[\[ ## (\w+) ## \]\]")
+# ChatAdapter and JSONAdapter end the user message with one of these output reminders
+OUTPUT_REMINDERS = ("Respond with the corresponding output fields", "Respond with a JSON object")
+JSON_ADAPTER_MARKER = "Outputs will be a JSON object"
+
+
+def mock_dspy():
+    """The dspy module when mock calls should go through its adapters, else None (not installed or MOCK_LM_ADAPTER=0)"""
+    if not MOCK_ADAPTER:
+        return None
+    try:
+        import dspy
+    except ImportError:
+        return None
+    return dspy
+
+
+def parse_fields(message: str) -> dict:
+    """`[[ ## name ## ]]` sections of an adapter-formatted user message -> {name: value}"""
+    fields = {}
+    name = None
+    for line in message.splitlines():
+        match = FIELD_HEADER.match(line.strip())
+        if match:
+            name = match.group(1)
+            fields[name] = []
+        elif line.startswith(OUTPUT_REMINDERS):
+            break
+        elif name is not None:
+            fields[name].append(line)
+    return {name: "\n".join(lines).strip() for name, lines in fields.items()}
+
+
+def format_fields(outputs: dict) -> str:
+    """A ChatAdapter-style completion carrying `outputs`"""
+    return "\n\n".join([f"[[ ## {name} ## ]]\n{value}" for name, value in outputs.items()] + ["[[ ## completed ## ]]"])
+
+
+@lru_cache(maxsize=None)
+def _backend_class():
+    dspy = mock_dspy()
+
+    class MockBackend(dspy.BaseLM):
+        """dspy LM answering one signature's adapter-formatted prompts with MockLM.complete()"""
+
+        def __init__(self, lm: MockLM, signature_name: str, input_names):
+            super().__init__(model=lm.model, cache=False)
+            self.lm = lm
+            self.signature_name = signature_name
+            self.input_names = list(input_names)
+
+        def forward(self, prompt=None, messages=None, **kwargs):
+            messages = messages or [{"role": "user", "content": prompt}]
+            system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+            fields = parse_fields(messages[-1]["content"])
+            inputs = {name: fields.get(name, "") for name in self.input_names}
+            # The whole system prompt counts as instructions, so usage reflects the formatted prompt
+            outputs, usage = self.lm.complete(self.signature_name, system, inputs)
+            if kwargs.get("response_format") or JSON_ADAPTER_MARKER in system:
+                completion = json.dumps(outputs, ensure_ascii=False)
+            else:
+                completion = format_fields(outputs)
+            if dspy.settings.usage_tracker is not None:
+                dspy.settings.usage_tracker.add_usage(self.model, dict(usage))
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=completion))],
+                usage=usage,
+                model=self.model,
+            )
+
+    return MockBackend
+
+
+def adapter_program(lm: MockLM, module_type: str, signature):
+    """
+    `dspy.<module_type>(signature)` answered by `lm`, so mock runs pay for dspy's prompt
+    formatting and output parsing like a real provider; None when mock_dspy() is None.
+    """
+    dspy = mock_dspy()
+    if dspy is None:
+        return None
+    program = getattr(dspy, module_type)(signature)
+    program.set_lm(_backend_class()(lm, signature.__name__, signature.input_fields))
+    return program
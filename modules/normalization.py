@@ -0,0 +1,103 @@
+import re
+from functools import lru_cache
+
+# ------------------- DEFAULTS -------------------
+DEFAULT_ALLOWED_PUNCT = ".,?:-()"
+
+_DASH_RE = re.compile(r"[\u2012\u2013\u2014\u2015]")
+_SPEAKER_PREFIX_RE = re.compile(r"^(user|agent)\s*:\s*", re.IGNORECASE)
+_AGENT_PREFIX_RE = re.compile(r"^\s*agent\s*[:\-]\s*", re.IGNORECASE)
+_COMMA_RE = re.compile(r"\s*,\s*")
+_SPACE_RE = re.compile(r"\s+")
+_FILLER_VERBS_RE = re.compile(r"\b(ask|please|provide|give|send|enter)\b", re.IGNORECASE)
+_LIST_SEPARATOR_RE = re.compile(r"[:;]+")
+
+
+@lru_cache(maxsize=32)
+def _cleaner(allowed_punct: str, normalize_dashes: bool):
+    """
+    Compiled patterns for one option set: (dash regex or None, disallowed-character
+    regex, sentence-end regex or None).
+
+    Only terminators in `allowed_punct` survive cleaning, and cleaning never creates
+    one, so the first surviving terminator can be found in the raw text and
+    everything after it dropped before the more expensive steps run.
+    """
+    dashes = _DASH_RE if normalize_dashes else None
+    disallowed = re.compile(rf"[^A-Za-z0-9\s{re.escape(allowed_punct)}]+")
+    terminators = "".join(c for c in ".?!" if c in allowed_punct)
+    sentence_end = re.compile(f"[{re.escape(terminators)}]") if terminators else None
+    return dashes, disallowed, sentence_end
+
+
+# ------------------- ONE-SENTENCE CLEANER -------------------
+def clean_to_one_sentence(text,
+                          allowed_punct=DEFAULT_ALLOWED_PUNCT,
+                          normalize_dashes=True):
+    """Clean text to a single sentence with normalized punctuation"""
+    return _clean(text, *_cleaner(allowed_punct, normalize_dashes))
+
+
+def _clean(text, dashes, disallowed, sentence_end):
+    # 1) keep up to the first (surviving) sentence terminator
+    if sentence_end is not None:
+        m = sentence_end.search(text)
+        if m:
+            text = text[: m.end()]
+
+    # 2) normalize common dash characters to ascii hyphen
+    if dashes is not None:
+        text = dashes.sub("-", text)
+
+    # 3) remove characters NOT in allowed set (letters, digits, whitespace, allowed punctuation)
+    text = disallowed.sub("", text)
+
+    # 4) collapse all whitespace (newlines and tabs included) to single spaces, trim ends
+    return " ".join(text.split())
+
+
+def clean_many(texts,
+               allowed_punct=DEFAULT_ALLOWED_PUNCT,
+               normalize_dashes=True) -> list:
+    """`clean_to_one_sentence` over an iterable, resolving the compiled patterns once for the whole batch"""
+    dashes, disallowed, sentence_end = _cleaner(allowed_punct, normalize_dashes)
+    return [_clean(text, dashes, disallowed, sentence_end) for text in texts]
+
+
+def clean_text(text: str) -> str:
+    """Remove 'User:', 'Agent:' prefixes and clean whitespace"""
+    if not text:
+        return text
+    return _SPEAKER_PREFIX_RE.sub("", text.strip()).strip()
+
+
+# ------------------- EXPECTED-OUTPUT CANONICALIZATION -------------------
+def normalize_text_sentence(s: str) -> str:
+    s = s.strip()
+    if "," in s:
+        s = _COMMA_RE.sub(", ", s)
+    s = _SPACE_RE.sub(" ", s)
+    if not s:
+        return s
+    if not s.endswith((".", "?", "!")):
+        s += "."
+    return s[0].upper() + s[1:]
+
+
+def canonicalize_expected_output(raw_expected: str) -> (str, dict):
+    text = raw_expected.strip()
+    prefix = _AGENT_PREFIX_RE.match(text)
+    if prefix:
+        clean = text[prefix.end():].strip()
+        return "Agent: " + normalize_text_sentence(clean), {"normalization": "agent_prefix_preserved"}
+
+    lowered = text.lower()
+    if "ask" in lowered or "," in text or "and" in lowered:
+        t = _FILLER_VERBS_RE.sub("", text)
+        t = _LIST_SEPARATOR_RE.sub(",", t)
+        t = _COMMA_RE.sub(", ", t)
+        t = _SPACE_RE.sub(" ", t).strip(" ,.")
+        canonical = f"Agent: To help you, please provide {t}."
+        return normalize_text_sentence(canonical), {"normalization": "list_to_agent_reply"}
+
+    return "Agent: " + normalize_text_sentence(text), {"normalization": "fallback_agent_prefix"}
@@ -0,0 +1,192 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ------------------- STAGE -------------------
+class Stage:
+    """
+    One node of the pipeline DAG.
+
+    Args:
+        name: Stage name; also the key under which errors are reported
+        fn: Callable(record) -> dict of fields to merge into the record,
+            or None to leave the record unchanged
+        workers: Thread-pool size for this stage (0 = run inline, for cheap CPU-only stages)
+        after: Names of the stages that must finish for a record before this one starts
+    """
+
+    def __init__(self, name: str, fn, workers: int = 0, after=None):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.after = list(after or [])
+
+
+# ------------------- DAG RUNNER -------------------
+class Pipeline:
+    """
+    Run records through a DAG of stages in one process, passing them in memory.
+
+    Stages are pipelined per record: as soon as a record finishes a stage, every
+    stage whose dependencies are now satisfied for that record is scheduled on its
+    own pool. So judging row 1 overlaps asking row 2, and one slow row never holds
+    up the rest. At most `max_in_flight` records are admitted at once.
+
+    A stage that raises marks the record with `errors[stage]` and skips its
+    dependents for that record; the other records are unaffected.
+    """
+
+    def __init__(self, stages, max_in_flight: int = 64):
+        self.stages = {s.name: s for s in stages}
+        for stage in stages:
+            missing = [dep for dep in stage.after if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {missing}")
+        self.order = self._topological_order()
+        self.children = {name: [] for name in self.order}
+        for stage in stages:
+            for dep in stage.after:
+                self.children[dep].append(stage.name)
+        self.max_in_flight = max_in_flight
+
+    def _topological_order(self) -> list:
+        order = []
+        state = {}
+
+        def visit(name):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Pipeline has a cycle through stage '{name}'")
+            state[name] = "visiting"
+            for dep in self.stages[name].after:
+                visit(dep)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def run(self, records, on_record=None, on_stage=None, should_stop=None) -> list:
+        """
+        Push every record through the DAG and return the finished records in input order.
+
+        `on_stage(stage_name, index, record)` fires after each stage completes for a
+        record; `on_record(index, record)` fires once a record has left every stage.
+        Both are called under a lock, so they may update shared state directly.
+        `should_stop()` is checked before each record is admitted; once it returns True
+        no further records are admitted, admitted ones finish, and the rest stay None.
+        A callback that raises abandons its record and stops admission the same way;
+        once the admitted records are done, run() re-raises the first such exception.
+        """
+        records = [dict(r) for r in records]
+        results = [None] * len(records)
+        lock = threading.Lock()
+        admission = threading.Semaphore(self.max_in_flight)
+        all_done = threading.Event()
+        remaining = [len(records)]
+        callback_errors = []
+        if not records:
+            return results
+
+        pools = {
+            name: ThreadPoolExecutor(max_workers=stage.workers, thread_name_prefix=f"stage-{name}")
+            for name, stage in self.stages.items()
+            if stage.workers > 0
+        }
+        roots = [name for name in self.order if not self.stages[name].after]
+        pending_deps = [None] * len(records)
+        unfinished = [None] * len(records)
+
+        def finish_record(idx):
+            results[idx] = records[idx]
+            try:
+                if on_record:
+                    on_record(idx, records[idx])
+            except Exception as e:
+                callback_errors.append(e)
+            finally:
+                remaining[0] -= 1
+                admission.release()
+                if remaining[0] == 0:
+                    all_done.set()
+
+        def skip_stage(idx, name):
+            """Mark a stage (and transitively its dependents) as skipped for one record"""
+            if name not in unfinished[idx]:
+                return
+            unfinished[idx].discard(name)
+            for child in self.children[name]:
+                skip_stage(idx, child)
+
+        def run_stage(name, idx):
+            stage = self.stages[name]
+            record = records[idx]
+            try:
+                update = stage.fn(record)
+                error = None
+            except Exception as e:
+                update = None
+                error = e
+
+            ready = []
+            with lock:
+                try:
+                    if error is not None:
+                        record.setdefault("errors", {})[name] = str(error)
+                        unfinished[idx].discard(name)
+                        for child in self.children[name]:
+                            skip_stage(idx, child)
+                    else:
+                        if update:
+                            record.update(update)
+                        unfinished[idx].discard(name)
+                        if on_stage:
+                            on_stage(name, idx, record)
+                        for child in self.children[name]:
+                            deps = pending_deps[idx][child]
+                            deps.discard(name)
+                            if not deps and child in unfinished[idx]:
+                                ready.append(child)
+                except Exception as e:
+                    # Abandon the record rather than leave it unfinished: run() would wait forever
+                    callback_errors.append(e)
+                    unfinished[idx].clear()
+                    ready = []
+                finally:
+                    # A stage still running for an abandoned record must not finish it twice
+                    if not unfinished[idx] and results[idx] is None:
+                        finish_record(idx)
+            for child in ready:
+                schedule(child, idx)
+
+        def schedule(name, idx):
+            pool = pools.get(name)
+            if pool is None:
+                run_stage(name, idx)
+            else:
+                pool.submit(run_stage, name, idx)
+
+        try:
+            for idx in range(len(records)):
+                admission.acquire()
+                if callback_errors or (should_stop and should_stop()):
+                    with lock:
+                        remaining[0] -= len(records) - idx
+                        if remaining[0] == 0:
+                            all_done.set()
+                    break
+                with lock:
+                    pending_deps[idx] = {name: set(self.stages[name].after) for name in self.order}
+                    unfinished[idx] = set(self.order)
+                for name in roots:
+                    schedule(name, idx)
+            all_done.wait()
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        if callback_errors:
+            raise callback_errors[0]
+        return results
@@ -0,0 +1,41 @@
+from rich.progress import (
+    Progress,
+    SpinnerColumn,
+    TextColumn,
+    BarColumn,
+    MofNCompleteColumn,
+    TimeElapsedColumn,
+    TimeRemainingColumn,
+    ProgressColumn,
+)
+from rich.text import Text
+
+
+# ------------------- THROUGHPUT COLUMN -------------------
+class ThroughputColumn(ProgressColumn):
+    """Show completed items per second, measured over the task's recent samples."""
+
+    def __init__(self, unit: str = "it"):
+        super().__init__()
+        self.unit = unit
+
+    def render(self, task) -> Text:
+        speed = task.finished_speed or task.speed
+        if speed is None:
+            return Text(f"-- {self.unit}/s", style="progress.data.speed")
+        return Text(f"{speed:.2f} {self.unit}/s", style="progress.data.speed")
+
+
+# ------------------- PROGRESS FACTORY -------------------
+def make_progress(console, unit: str = "it") -> Progress:
+    """Progress bar shared by the pipeline stages: bar, count, throughput and ETA."""
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        ThroughputColumn(unit),
+        TimeElapsedColumn(),
+        TimeRemainingColumn(),
+        console=console,
+    )
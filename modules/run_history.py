@@ -0,0 +1,201 @@
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from datetime import datetime
+from modules.fingerprints import record_test_key
+
+# ------------------- HISTORY SETTINGS -------------------
+HISTORY_PATH = os.getenv("RUN_HISTORY_PATH", "outputs/run_history.sqlite")
+HISTORY_DISABLED = os.getenv("RUN_HISTORY_DISABLE", "0") == "1"
+
+PASSING = ("PASS", "PARTIAL")
+
+
+def new_run_id() -> str:
+    """Sortable, unique run id: local timestamp plus a short random suffix"""
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def _stage_latency(summary: dict, stage: str, q: str):
+    return summary.get("performance", {}).get(stage, {}).get("latency_ms", {}).get(q)
+
+
+# ------------------- SQLITE STORE -------------------
+class RunHistory:
+    """
+    Append-only store of every comparison run, indexed for trends and run diffs.
+
+    `runs` holds one row per run (summary numbers as columns, the full summary as
+    JSON); `results` holds one row per (run, test key) with the test's status,
+    score and latencies; `tests` holds each test's text once. Results are keyed
+    by (run_id, test_key), so diffing two runs is two index range scans joined
+    on the test key, however many runs are stored.
+    """
+
+    def __init__(self, path: str = HISTORY_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    comparison_method TEXT,
+                    total_tests INTEGER NOT NULL,
+                    passed INTEGER NOT NULL,
+                    failed INTEGER NOT NULL,
+                    pass_rate REAL NOT NULL,
+                    ask_p50_ms REAL,
+                    ask_p95_ms REAL,
+                    judge_p50_ms REAL,
+                    judge_p95_ms REAL,
+                    cost_usd REAL,
+                    summary TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs(timestamp);
+                CREATE TABLE IF NOT EXISTS tests (
+                    test_key TEXT PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    expected_answer TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS results (
+                    run_id TEXT NOT NULL,
+                    test_key TEXT NOT NULL,
+                    test_id INTEGER,
+                    status TEXT NOT NULL,
+                    similarity_score REAL,
+                    decided_by TEXT,
+                    ask_latency_ms REAL,
+                    judge_latency_ms REAL,
+                    PRIMARY KEY (run_id, test_key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_results_test ON results(test_key, run_id);
+            """)
+        return self._conn
+
+    def record_run(self, header: dict, rows, run_id: str = None) -> str:
+        """Append one report (header + comparison rows) and return its run id"""
+        run_id = run_id or header.get("run_id") or new_run_id()
+        summary = header.get("summary", {})
+        tests, results = [], []
+        for row in rows:
+            key = record_test_key(row)
+            metrics = row.get("metrics") or {}
+            tests.append((key, row["question"], row.get("expected_answer", "")))
+            results.append((
+                run_id,
+                key,
+                row.get("test_id"),
+                row["status"],
+                row.get("similarity_score"),
+                row.get("decided_by"),
+                (metrics.get("ask") or {}).get("latency_ms"),
+                (metrics.get("judge") or {}).get("latency_ms"),
+            ))
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        header.get("timestamp") or datetime.now().isoformat(),
+                        header.get("comparison_method"),
+                        summary.get("total_tests", len(results)),
+                        summary.get("passed", 0),
+                        summary.get("failed", 0),
+                        summary.get("pass_rate", 0),
+                        _stage_latency(summary, "ask", "p50"),
+                        _stage_latency(summary, "ask", "p95"),
+                        _stage_latency(summary, "judge", "p50"),
+                        _stage_latency(summary, "judge", "p95"),
+                        summary.get("performance", {}).get("total", {}).get("cost_usd"),
+                        json.dumps(summary, ensure_ascii=False),
+                    )
+                )
+                conn.executemany("INSERT OR IGNORE INTO tests VALUES (?, ?, ?)", tests)
+                conn.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+                conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)", results)
+        return run_id
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            cursor = self._connect().execute(sql, params)
+            names = [d[0] for d in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def runs(self, limit: int = None) -> list:
+        """Runs oldest first (the most recent `limit` when given), without the summary JSON"""
+        columns = (
+            "run_id, timestamp, comparison_method, total_tests, passed, failed, pass_rate, "
+            "ask_p50_ms, ask_p95_ms, judge_p50_ms, judge_p95_ms, cost_usd"
+        )
+        if limit:
+            rows = self._query(f"SELECT {columns} FROM runs ORDER BY timestamp DESC LIMIT ?", (limit,))
+            return rows[::-1]
+        return self._query(f"SELECT {columns} FROM runs ORDER BY timestamp")
+
+    def diff(self, base_run: str, run: str) -> dict:
+        """
+        Tests whose outcome changed between two runs.
+
+        Returns {"newly_failing", "newly_passing"} (tests judged in both runs that
+        crossed the pass/fail line; ERROR rows were not judged and never count) and
+        {"added", "removed"} counts of tests in only one run.
+        """
+        passing = ", ".join("?" * len(PASSING))
+        changed_sql = f"""
+            SELECT cur.test_key, cur.test_id, t.question, t.expected_answer,
+                   base.status AS base_status, cur.status AS status,
+                   base.similarity_score AS base_score, cur.similarity_score AS score,
+                   cur.decided_by
+            FROM results AS cur
+            JOIN results AS base ON base.run_id = ? AND base.test_key = cur.test_key
+            JOIN tests AS t ON t.test_key = cur.test_key
+            WHERE cur.run_id = ?
+              AND cur.status != 'ERROR' AND base.status != 'ERROR'
+              AND (cur.status IN ({passing})) != (base.status IN ({passing}))
+            ORDER BY cur.test_id
+        """
+        changed = self._query(changed_sql, (base_run, run, *PASSING, *PASSING))
+        only_in_sql = """
+            SELECT COUNT(*) AS n FROM results AS a
+            WHERE a.run_id = ? AND NOT EXISTS (
+                SELECT 1 FROM results AS b WHERE b.run_id = ? AND b.test_key = a.test_key
+            )
+        """
+        return {
+            "newly_failing": [r for r in changed if r["status"] not in PASSING],
+            "newly_passing": [r for r in changed if r["status"] in PASSING],
+            "added": self._query(only_in_sql, (run, base_run))[0]["n"],
+            "removed": self._query(only_in_sql, (base_run, run))[0]["n"],
+        }
+
+    def test_history(self, key: str) -> list:
+        """Status of one test across every run it appeared in, oldest first"""
+        return self._query("""
+            SELECT r.run_id, runs.timestamp, r.status, r.similarity_score, r.decided_by
+            FROM results AS r JOIN runs ON runs.run_id = r.run_id
+            WHERE r.test_key = ?
+            ORDER BY runs.timestamp
+        """, (key,))
+
+
+run_history = RunHistory()
+
+
+def record_run(header: dict, rows) -> str:
+    """Append a report to the shared history unless RUN_HISTORY_DISABLE=1; returns the run id"""
+    if HISTORY_DISABLED:
+        return header.get("run_id")
+    return run_history.record_run(header, rows)
@@ -0,0 +1,188 @@
+import os
+import math
+import random
+import argparse
+from modules.fingerprints import record_test_key
+
+# ------------------- SAMPLING DEFAULTS -------------------
+SAMPLE_SEED = int(os.getenv("SAMPLE_SEED", "0"))
+CONFIDENCE = 0.95
+Z_SCORES = {0.90: 1.6449, 0.95: 1.96, 0.99: 2.5758}
+PASSING = ("PASS", "PARTIAL")
+
+
+def parse_sample_size(value: str) -> float:
+    """'200' -> 200 tests; '0.1' -> 10% of the suite"""
+    try:
+        size = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a test count or a fraction below 1, got {value!r}")
+    if size <= 0 or (size >= 1 and size != int(size)):
+        raise argparse.ArgumentTypeError(f"expected a test count or a fraction below 1, got {value!r}")
+    return size
+
+
+def add_sample_arguments(parser):
+    """Shared --sample / --sample-seed options for the stage scripts"""
+    parser.add_argument(
+        "--sample",
+        type=parse_sample_size,
+        default=None,
+        metavar="SIZE",
+        help=(
+            "Smoke mode: run a stratified random sample of SIZE tests (or a fraction, e.g. 0.1) "
+            "instead of the suite; strata are test case type x previous status. Outputs go to *.sample.* "
+            "files, so the full suite's answers, report and manifest are left untouched"
+        )
+    )
+    parser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=SAMPLE_SEED,
+        help=f"Seed for --sample (default: {SAMPLE_SEED}, env SAMPLE_SEED); use the same one for ask and compare"
+    )
+
+
+# ------------------- STRATIFIED SAMPLE -------------------
+def stratum_of(record: dict, statuses: dict) -> str:
+    """'qa_test/FAIL' style stratum: test case type x status in the previous report"""
+    test_type = record.get("test_case_type") or "unknown"
+    status = statuses.get(record_test_key(record)) or "NEW"
+    return f"{test_type}/{status}"
+
+
+def allocate(populations: dict, size: int) -> dict:
+    """
+    Proportional allocation of `size` draws across strata (largest remainder), with
+    at least one draw per stratum while the sample is big enough to afford it.
+    """
+    total = sum(populations.values())
+    size = min(size, total)
+    if size >= len(populations):
+        floor = {name: 1 for name in populations}
+    else:
+        floor = {name: 0 for name in populations}
+    spare = size - sum(floor.values())
+    shares = {name: spare * (n - floor[name]) / max(total - sum(floor.values()), 1) for name, n in populations.items()}
+    counts = {name: floor[name] + int(share) for name, share in shares.items()}
+    by_remainder = sorted(populations, key=lambda name: (shares[name] - int(shares[name]), populations[name]), reverse=True)
+    for name in by_remainder[:size - sum(counts.values())]:
+        counts[name] += 1
+    return {name: min(count, populations[name]) for name, count in counts.items()}
+
+
+def stratified_sample(records, statuses: dict, size: float, seed: int = SAMPLE_SEED) -> tuple:
+    """
+    Pick a stratified random subset of `records`.
+
+    `size` is a number of tests, or a fraction of the suite when below 1. The same
+    records, previous statuses and seed always give the same sample, so separate
+    ask and compare runs select identical tests.
+    Returns (positions of the chosen records in suite order, the sample plan).
+    """
+    records = list(records)
+    target = round(size * len(records)) if size < 1 else int(size)
+    strata = {}
+    for position, record in enumerate(records):
+        strata.setdefault(stratum_of(record, statuses), []).append(position)
+
+    counts = allocate({name: len(positions) for name, positions in strata.items()}, max(target, 1))
+    rng = random.Random(seed)
+    chosen = []
+    for name in sorted(strata):
+        chosen.extend(rng.sample(strata[name], counts[name]))
+
+    plan = {
+        "population": len(records),
+        "size": len(chosen),
+        "seed": seed,
+        "strata": {name: {"population": len(strata[name]), "sampled": counts[name]} for name in sorted(strata)},
+    }
+    return sorted(chosen), plan
+
+
+def sample_records(records, statuses: dict, size: float, seed: int = SAMPLE_SEED) -> tuple:
+    """stratified_sample() returning the chosen records themselves, each tagged with its `stratum`"""
+    records = list(records)
+    positions, plan = stratified_sample(records, statuses, size, seed)
+    return [{**records[p], "stratum": stratum_of(records[p], statuses)} for p in positions], plan
+
+
+# ------------------- SAMPLE FILES -------------------
+def sample_path(path: str, sample) -> str:
+    """outputs/comparison_report.json -> outputs/comparison_report.sample.json (unchanged for full runs)"""
+    if not sample:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.sample{ext}"
+
+
+# ------------------- ESTIMATE -------------------
+def wilson_interval(passed: float, n: float, z: float = Z_SCORES[CONFIDENCE]) -> tuple:
+    """Wilson score interval for a pass proportion (works near 0% and 100%, unlike p ± z·se)"""
+    if n <= 0:
+        return 0.0, 1.0
+    p = passed / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def summarize_sample(rows, plan: dict, confidence: float = CONFIDENCE) -> dict:
+    """
+    The report's `summary.sample` block: the plan plus a suite-wide pass-rate estimate.
+
+    Each row must carry its `stratum`. Stratum pass rates are weighted by stratum
+    size, so over-represented strata do not skew the estimate. The interval is a
+    Wilson interval on the effective sample size of the stratified estimate, with
+    the finite-population correction (sampling the whole suite gives zero width).
+    ERROR rows were not judged and are left out, as in the plain pass rate.
+    """
+    judged = {}
+    for row in rows:
+        if row["status"] == "ERROR":
+            continue
+        passed, n = judged.get(row["stratum"], (0, 0))
+        judged[row["stratum"]] = (passed + (row["status"] in PASSING), n + 1)
+
+    population = sum(plan["strata"][name]["population"] for name in judged) or 1
+    estimate = 0.0
+    variance = 0.0
+    for name, (passed, n) in judged.items():
+        size = plan["strata"][name]["population"]
+        weight = size / population
+        p = passed / n
+        estimate += weight * p
+        fpc = (size - n) / (size - 1) if size > 1 else 0.0
+        variance += weight * weight * p * (1 - p) / n * fpc
+
+    n_judged = sum(n for _, n in judged.values())
+    if variance > 0:
+        n_effective = estimate * (1 - estimate) / variance
+    elif n_judged and all(n >= plan["strata"][name]["population"] for name, (_, n) in judged.items()):
+        n_effective = math.inf
+    else:
+        n_effective = n_judged
+
+    if n_effective == math.inf:
+        low = high = estimate
+    else:
+        low, high = wilson_interval(estimate * n_effective, n_effective, Z_SCORES[confidence])
+
+    return {
+        **plan,
+        "judged": n_judged,
+        "pass_rate_estimate": round(estimate * 100, 2),
+        "confidence": confidence,
+        "pass_rate_ci": [round(low * 100, 2), round(high * 100, 2)],
+    }
+
+
+def format_sample(sample: dict) -> str:
+    """One-line console rendering of a `summary.sample` block"""
+    low, high = sample["pass_rate_ci"]
+    return (
+        f"sampled {sample['size']} of {sample['population']} tests across {len(sample['strata'])} strata (seed {sample['seed']}) · "
+        f"suite pass rate ≈ {sample['pass_rate_estimate']}% ({sample['confidence']:.0%} CI {low}–{high}%)"
+    )
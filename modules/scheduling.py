@@ -0,0 +1,111 @@
+import os
+import json
+from modules.fingerprints import record_test_key
+from modules.jsonl_store import read_records
+
+# ------------------- SCHEDULING DEFAULTS -------------------
+ABORT_MIN_TESTS = int(os.getenv("EARLY_ABORT_MIN_TESTS", "20"))
+
+# Lower runs sooner: likely regressions first, tests that passed last time last
+PRIORITY = {"FAIL": 0, "PARTIAL": 1, "ERROR": 2}
+PRIORITY_NEW = 3
+PRIORITY_PASS = 4
+
+
+def add_scheduling_arguments(parser, abort: bool = True):
+    """Shared --no-failure-first / --abort-below / --abort-after options for the stage scripts"""
+    parser.add_argument(
+        "--no-failure-first",
+        action="store_true",
+        help="Run tests in suite order instead of FAIL/PARTIAL/ERROR tests of the previous report first"
+    )
+    if abort:
+        parser.add_argument(
+            "--abort-below",
+            type=float,
+            default=None,
+            metavar="PCT",
+            help="Stop early once the pass rate of the tests judged so far is below PCT percent"
+        )
+        parser.add_argument(
+            "--abort-after",
+            type=int,
+            default=ABORT_MIN_TESTS,
+            metavar="N",
+            help=f"Judge at least N tests before --abort-below may stop the run (default: {ABORT_MIN_TESTS}, env EARLY_ABORT_MIN_TESTS)"
+        )
+
+
+# ------------------- FAILURE-FIRST ORDER -------------------
+def previous_statuses(report_path: str) -> dict:
+    """test key -> status in the last comparison report ({} when there is none)"""
+    try:
+        return {record_test_key(row): row.get("status") for row in read_records(report_path)}
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return {}
+
+
+def failure_first(keys, statuses: dict) -> list:
+    """
+    Positions of `keys` in run order: tests that failed, were PARTIAL or errored in
+    the previous report first, then tests it has not seen, then tests that passed.
+    Order within each group is the suite order, so the schedule is deterministic.
+    """
+    def priority(position):
+        status = statuses.get(keys[position])
+        if status is None:
+            return PRIORITY_NEW
+        return PRIORITY.get(status, PRIORITY_PASS)
+
+    return sorted(range(len(keys)), key=priority)
+
+
+def count_failing(keys, statuses: dict) -> int:
+    """How many of `keys` failure_first() moves ahead of the rest"""
+    return sum(1 for key in keys if statuses.get(key) in PRIORITY)
+
+
+# ------------------- EARLY ABORT -------------------
+class EarlyAbort:
+    """
+    Watches statuses as tests finish and trips once the pass rate is hopeless.
+
+    With `threshold` (percent) set, the run should stop when at least `min_tests`
+    tests have been judged and fewer than `threshold`% of them passed. ERROR rows
+    were not judged and count toward neither side, as in the report summary.
+    Feed it only tests judged in this run: reused rows say nothing about the build.
+    """
+
+    def __init__(self, threshold: float = None, min_tests: int = ABORT_MIN_TESTS, passing=("PASS", "PARTIAL")):
+        self.threshold = threshold
+        self.min_tests = max(min_tests, 1)
+        self.passing = tuple(passing)
+        self.passed = 0
+        self.judged = 0
+        self.triggered = False
+
+    def record(self, status: str):
+        if status == "ERROR":
+            return
+        self.judged += 1
+        if status in self.passing:
+            self.passed += 1
+        if self.threshold is not None and self.judged >= self.min_tests and self.pass_rate < self.threshold:
+            self.triggered = True
+
+    @property
+    def pass_rate(self) -> float:
+        return round(self.passed / self.judged * 100, 2) if self.judged else 0.0
+
+    def should_stop(self) -> bool:
+        return self.triggered
+
+    def describe(self) -> dict:
+        """The report header's `aborted` block"""
+        return {
+            "reason": f"pass rate {self.pass_rate}% below {self.threshold:g}% after {self.judged} judged tests",
+            "threshold": self.threshold,
+            "min_tests": self.min_tests,
+            "judged": self.judged,
+            "passed": self.passed,
+        }
@@ -0,0 +1,58 @@
+import os
+import argparse
+from modules.fingerprints import fingerprint, record_test_key
+
+# ------------------- SHARD SPEC -------------------
+def parse_shard(spec: str) -> tuple:
+    """'3/8' -> (3, 8): shard 3 of 8, numbered from 1"""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT such as 3/8, got {spec!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and COUNT, got {spec!r}")
+    return index, count
+
+
+def add_shard_argument(parser):
+    """Shared --shard option for the stage scripts"""
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="INDEX/COUNT",
+        help=(
+            "Run only shard INDEX of COUNT (e.g. 3/8). Tests are split by test key, so every runner "
+            "agrees on the split; outputs go to *.shard-INDEX-of-COUNT.* files for merge_shards.py"
+        )
+    )
+
+
+# ------------------- PARTITIONING -------------------
+def shard_of(key: str, count: int) -> int:
+    """1-based shard that owns a test key; depends only on the key, never on file order"""
+    return int(fingerprint("shard", key)[:12], 16) % count + 1
+
+
+def in_shard(record: dict, shard) -> bool:
+    """True when `shard` is None (unsharded run) or the record's test belongs to it"""
+    return shard is None or shard_of(record_test_key(record), shard[1]) == shard[0]
+
+
+def select_shard(records, shard) -> list:
+    """The records of one shard, in their original order"""
+    return [record for record in records if in_shard(record, shard)]
+
+
+# ------------------- SHARD FILES -------------------
+def shard_path(path: str, shard) -> str:
+    """outputs/agent_responses.json -> outputs/agent_responses.shard-3-of-8.json (unchanged when unsharded)"""
+    if shard is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+
+def shard_paths(path: str, count: int) -> list:
+    """Every shard's file for a stage output, in shard order"""
+    return [shard_path(path, (index, count)) for index in range(1, count + 1)]
@@ -0,0 +1,119 @@
+import zlib
+import numpy as np
+from modules.comparison import normalize_answer
+
+# ------------------- VECTORIZER SETTINGS -------------------
+N_FEATURES = 2 ** 20
+# Cosine similarity (0-100) at or above which the vector method calls a pair equivalent
+VECTOR_PASS_SCORE = 80.0
+
+
+# ------------------- HASHED N-GRAM FEATURES -------------------
+# Odd 64-bit multiplier used to mix two word hashes into one bigram hash
+_BIGRAM_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class HashingTfidfVectorizer:
+    """
+    Offline TF-IDF embeddings over hashed word unigrams and bigrams, held as sparse COO arrays.
+
+    Words are hashed with crc32 (stable across runs and processes) once per distinct
+    word; bigram features are then derived for the whole batch at once in NumPy.
+    The vectorizer is fit and applied to one batch at a time, so IDF weights come
+    from the documents being compared and nothing needs to be downloaded or stored.
+    """
+
+    def __init__(self, n_features: int = N_FEATURES):
+        if n_features & (n_features - 1):
+            raise ValueError("n_features must be a power of two")
+        self.n_features = n_features
+
+    def _hash_words(self, texts):
+        """crc32 of every normalized word, flattened, plus per-text word counts"""
+        word_hashes = {}
+        lengths = []
+        hashes = []
+        for text in texts:
+            words = normalize_answer(text).split()
+            lengths.append(len(words))
+            for word in words:
+                h = word_hashes.get(word)
+                if h is None:
+                    h = word_hashes[word] = zlib.crc32(word.encode("utf-8"))
+                hashes.append(h)
+        return np.asarray(hashes, dtype=np.uint64), np.asarray(lengths, dtype=np.int64)
+
+    def fit_transform(self, texts):
+        """
+        Embed every text; returns (rows, cols, weights) with L2-normalized rows.
+
+        Duplicate (row, col) entries are merged, so each row holds unique features.
+        """
+        hashes, lengths = self._hash_words(texts)
+        n_docs = len(lengths)
+        mask = np.uint64(self.n_features - 1)
+
+        word_rows = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        same_doc = word_rows[1:] == word_rows[:-1]
+        bigrams = (hashes[:-1][same_doc] * _BIGRAM_MIX) ^ hashes[1:][same_doc]
+
+        rows = np.concatenate([word_rows, word_rows[:-1][same_doc]])
+        cols = (np.concatenate([hashes, bigrams]) & mask).astype(np.int64)
+
+        # Merge repeated features within a document into raw term counts
+        keys, counts = np.unique(rows * self.n_features + cols, return_counts=True)
+        rows = keys // self.n_features
+        cols = keys % self.n_features
+
+        # Sublinear TF x smoothed IDF
+        df = np.bincount(cols, minlength=self.n_features)
+        idf = np.log((1 + n_docs) / (1 + df[cols])) + 1.0
+        weights = (1.0 + np.log(counts)) * idf
+
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+        weights = weights / np.where(norms[rows] > 0, norms[rows], 1.0)
+        return rows, cols, weights
+
+
+# ------------------- BATCH PAIR SIMILARITY -------------------
+def pairwise_cosine(pairs, n_features: int = N_FEATURES) -> np.ndarray:
+    """
+    Cosine similarity (0-100) for every aligned (expected, actual) pair.
+
+    Both sides are embedded in one batch and all row-wise dot products are
+    computed together: matching (row, feature) keys are joined with a single
+    sorted intersection and summed per row with bincount.
+    """
+    pairs = list(pairs)
+    n = len(pairs)
+    if n == 0:
+        return np.zeros(0)
+
+    texts = [expected for expected, _ in pairs] + [actual for _, actual in pairs]
+    rows, cols, weights = HashingTfidfVectorizer(n_features).fit_transform(texts)
+
+    is_actual = rows >= n
+    pair_rows = np.where(is_actual, rows - n, rows)
+    keys = pair_rows * n_features + cols
+
+    _, e_idx, a_idx = np.intersect1d(keys[~is_actual], keys[is_actual], assume_unique=True, return_indices=True)
+    e_weights = weights[~is_actual][e_idx]
+    a_weights = weights[is_actual][a_idx]
+    e_rows = pair_rows[~is_actual][e_idx]
+
+    dots = np.bincount(e_rows, weights=e_weights * a_weights, minlength=n)
+    return np.round(np.clip(dots, 0.0, 1.0) * 100, 2)
+
+
+def vector_decisions(pairs, pass_score: float = VECTOR_PASS_SCORE) -> list:
+    """Full-replacement comparator: one comparison dict per pair, no LLM involved"""
+    scores = pairwise_cosine(pairs)
+    return [
+        {
+            "are_equivalent": bool(score >= pass_score),
+            "similarity_score": float(score),
+            "reasoning": f"Offline TF-IDF cosine similarity {score}% (pass at {pass_score:g}%)",
+            "decided_by": "vector"
+        }
+        for score in scores
+    ]
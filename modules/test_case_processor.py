@@ -1,90 +1,125 @@
 import os
 import re
 import json
-import dspy
-from dspy import LM
-from signatures.test_case_classifier import TestCaseTypeClassifierSignature
-from signatures.unified_test_extractor import UnifiedTestCaseExtractorSignature
-from signatures.behavioral_synthesizer import BehavioralSynthesizerSignature
-
-# ------------------- SETUP OPENAI MODEL -------------------
+from modules.llm_cache import CachedPredictor, json_output
+from modules.batching import BatchedPredictor, BATCH_SIZE, chunked
+from modules.normalization import canonicalize_expected_output
+from modules.local_classifier import (
+    CONFIDENCE_THRESHOLD,
+    classification_stats,
+    get_local_model,
+    label_log,
+)
+
+# ------------------- LLM PROGRAMS -------------------
+# The LM is created by modules.lm_registry on first use (model: --model / env LLM_MODEL)
 #os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "sk-proj-xxx")
-lm = LM("openai/gpt-4o-mini")
-dspy.configure(lm=lm)
-
-# ✅ Use ChainOfThought instead of Predict
-classifier_llm = dspy.ChainOfThought(TestCaseTypeClassifierSignature)
-extractor_llm = dspy.ChainOfThought(UnifiedTestCaseExtractorSignature)
-synthesizer_llm = dspy.ChainOfThought(BehavioralSynthesizerSignature)
-
-
-# ------------------- NORMALIZATION HELPERS -------------------
-def normalize_text_sentence(s: str) -> str:
-    s = re.sub(r"\s*,\s*", ", ", s.strip())
-    s = re.sub(r"\s+", " ", s)
-    if not s:
-        return s
-    if not s.endswith((".", "?", "!")):
-        s += "."
-    return s[0].upper() + s[1:]
-
 
-def canonicalize_expected_output(raw_expected: str) -> (str, dict):
-    text = raw_expected.strip()
-    if re.match(r"^\s*agent\s*[:\-]\s*", text, re.I):
-        clean = re.sub(r"^\s*agent\s*[:\-]\s*", "", text, flags=re.I).strip()
-        return "Agent: " + normalize_text_sentence(clean), {"normalization": "agent_prefix_preserved"}
-
-    if "ask" in text.lower() or "," in text or "and" in text.lower():
-        t = re.sub(r"\b(ask|please|provide|give|send|enter)\b", "", text, flags=re.I)
-        t = re.sub(r"[:;]+", ",", t)
-        t = re.sub(r"\s*,\s*", ", ", t)
-        t = re.sub(r"\s+", " ", t).strip(" ,.")
-        canonical = f"Agent: To help you, please provide {t}."
-        return normalize_text_sentence(canonical), {"normalization": "list_to_agent_reply"}
-
-    return "Agent: " + normalize_text_sentence(text), {"normalization": "fallback_agent_prefix"}
+# ✅ Use ChainOfThought instead of Predict (served from the persistent LLM cache when possible)
+classifier_llm = CachedPredictor(
+    "classifier", "signatures.test_case_classifier:TestCaseTypeClassifierSignature", validate=json_output("classification_json")
+)
+extractor_llm = CachedPredictor(
+    "extractor", "signatures.unified_test_extractor:UnifiedTestCaseExtractorSignature", validate=json_output("structured_json")
+)
+synthesizer_llm = CachedPredictor(
+    "synthesizer", "signatures.behavioral_synthesizer:BehavioralSynthesizerSignature", validate=json_output("synthesized_json")
+)
+
+# One-call classify + structure path for inputs the rules can't decide (opt-in per run)
+fused_llm = CachedPredictor(
+    "fused", "signatures.fused_test_case_processor:FusedTestCaseSignature", validate=json_output("result_json")
+)
+FUSED_DEFAULT = os.getenv("FUSED_PROCESSING", "0") == "1"
+
+# Multi-item variants for bulk ingest; dropped or mangled items fall back to the programs above
+TEST_CASE_TYPES = ("qa_test", "behavioral_test")
+batch_classifier_llm = BatchedPredictor(
+    "classifier",
+    "signatures.batch_test_case_classifier:BatchTestCaseTypeClassifierSignature",
+    classifier_llm,
+    "classification_json",
+    required=["test_case_type"], validate=lambda r: r["test_case_type"] in TEST_CASE_TYPES
+)
+batch_extractor_llm = BatchedPredictor(
+    "extractor",
+    "signatures.batch_unified_test_extractor:BatchUnifiedTestCaseExtractorSignature",
+    extractor_llm,
+    "structured_json",
+    required=["input_prompt", "expected_output"]
+)
+batch_synthesizer_llm = BatchedPredictor(
+    "synthesizer",
+    "signatures.batch_behavioral_synthesizer:BatchBehavioralSynthesizerSignature",
+    synthesizer_llm,
+    "synthesized_json",
+    required=["synthetic_input", "synthetic_expected_output"]
+)
 
 
 # ------------------- CLASSIFICATION -------------------
-def classify_with_rules(text: str):
+def classify_locally(text: str, confidence_threshold: float = CONFIDENCE_THRESHOLD):
+    """Rules first, then the local model; None when neither is confident and the LLM must decide"""
     t = text.strip().lower()
     if ("question" in t and "answer" in t) or ("?" in t and "answer" in t):
+        classification_stats.count("rules")
         return {
             "test_case_type": "qa_test",
             "reasoning": "Contains explicit Q&A pattern with a question and answer."
         }
     if re.match(r"^(when|if)\b", t) or "should" in t or "first ask" in t:
+        classification_stats.count("rules")
         return {
             "test_case_type": "behavioral_test",
             "reasoning": "Rule-based: starts with behavioral cue (when/if/should/first ask)."
         }
 
+    # 🧮 Local n-gram model trained on earlier LLM labels; only confident predictions are used
+    model = get_local_model()
+    if model is not None:
+        label, confidence = model.predict(text)
+        if confidence >= confidence_threshold:
+            classification_stats.count("local")
+            return {
+                "test_case_type": label,
+                "reasoning": f"Local classifier: {confidence:.2f} confidence."
+            }
+    return None
+
+
+def record_llm_classification(text: str, result: dict):
+    classification_stats.count("llm")
+    if result.get("test_case_type") in TEST_CASE_TYPES:
+        label_log.record(text, result["test_case_type"])
+
+
+def classify_with_llm(text: str):
     # ⚙️ LLM reasoning using ChainOfThought
     llm_resp = classifier_llm(test_input=text)
-    return json.loads(llm_resp.classification_json)
+    result = json.loads(llm_resp.classification_json)
+    record_llm_classification(text, result)
+    return result
 
 
-# ------------------- MAIN PROCESS -------------------
-def process_test_case(raw_text: str):
-    cls = classify_with_rules(raw_text)
-    test_type = cls["test_case_type"]
+def classify_with_rules(text: str, confidence_threshold: float = CONFIDENCE_THRESHOLD):
+    local = classify_locally(text, confidence_threshold)
+    if local is not None:
+        return local
+    return classify_with_llm(text)
 
-    if test_type == "qa_test":
-        out = extractor_llm(test_case_type=test_type, raw_text=raw_text)
-        structured = json.loads(out.structured_json)
 
-    elif test_type == "behavioral_test":
-        synth = synthesizer_llm(behavior_description=raw_text)
-        temp = json.loads(synth.synthesized_json)
-        structured = {
-            "input_prompt": temp.get("synthetic_input"),
-            "expected_output": temp.get("synthetic_expected_output"),
-            "metadata": {"generated_from": "behavioral_synthesizer"}
-        }
-    else:
-        structured = {"error": "Unknown test case type."}
+# ------------------- MAIN PROCESS -------------------
+def synthesized_to_structured(temp: dict) -> dict:
+    return {
+        "input_prompt": temp.get("synthetic_input"),
+        "expected_output": temp.get("synthetic_expected_output"),
+        "metadata": {"generated_from": "behavioral_synthesizer"}
+    }
+
 
+def finish_test_case(raw_text: str, cls: dict, structured: dict) -> dict:
+    """Canonicalize the expected output and assemble the processed test case"""
+    test_type = cls["test_case_type"]
     raw_expected = structured.get("expected_output") or structured.get("synthetic_expected_output")
     if raw_expected:
         canonical, meta = canonicalize_expected_output(raw_expected)
@@ -101,3 +136,105 @@ def process_test_case(raw_text: str):
         "expected_output": structured.get("expected_output"),
         "metadata": structured.get("metadata", {})
     }
+
+
+def process_fused(raw_text: str):
+    """
+    Classify and structure in one LLM call. Returns (cls, structured), or None if the
+    answer is unusable so the caller can fall back to the two-call path.
+    """
+    try:
+        result = json.loads(fused_llm(raw_text=raw_text).result_json)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if (
+        not isinstance(result, dict)
+        or result.get("test_case_type") not in TEST_CASE_TYPES
+        or not result.get("input_prompt")
+        or not result.get("expected_output")
+    ):
+        return None
+
+    cls = {"test_case_type": result["test_case_type"], "reasoning": result.get("reasoning", "")}
+    record_llm_classification(raw_text, cls)
+    structured = {"input_prompt": result["input_prompt"], "expected_output": result["expected_output"]}
+    if cls["test_case_type"] == "behavioral_test":
+        structured["metadata"] = {"generated_from": "fused_processor"}
+    return cls, structured
+
+
+def process_test_case(raw_text: str, fused: bool = FUSED_DEFAULT):
+    cls = classify_locally(raw_text)
+    if cls is None and fused:
+        fused_result = process_fused(raw_text)
+        if fused_result is not None:
+            return finish_test_case(raw_text, *fused_result)
+    if cls is None:
+        cls = classify_with_llm(raw_text)
+    test_type = cls["test_case_type"]
+
+    if test_type == "qa_test":
+        out = extractor_llm(test_case_type=test_type, raw_text=raw_text)
+        structured = json.loads(out.structured_json)
+
+    elif test_type == "behavioral_test":
+        synth = synthesizer_llm(behavior_description=raw_text)
+        structured = synthesized_to_structured(json.loads(synth.synthesized_json))
+    else:
+        structured = {"error": "Unknown test case type."}
+
+    return finish_test_case(raw_text, cls, structured)
+
+
+def process_test_cases(raw_texts, batch_size: int = BATCH_SIZE) -> list:
+    """
+    Batched `process_test_case` for bulk ingest.
+
+    Each stage (classification of the inputs the rules and local model can't
+    settle, then extraction and synthesis) sends `batch_size` items per LLM call.
+    Returns one entry per input, in order: {"result": processed_case} or
+    {"error": message}, so one bad item never fails the rest.
+    """
+    raw_texts = list(raw_texts)
+    outcomes = [None] * len(raw_texts)
+    classes = [classify_locally(text) for text in raw_texts]
+
+    # 1) LLM classification for whatever the rules and local model left open
+    pending = [i for i, cls in enumerate(classes) if cls is None]
+    for chunk in chunked(pending, batch_size):
+        for i, result in zip(chunk, batch_classifier_llm([{"test_input": raw_texts[i]} for i in chunk])):
+            if isinstance(result, Exception):
+                outcomes[i] = {"error": f"{type(result).__name__}: {result}"}
+            else:
+                record_llm_classification(raw_texts[i], result)
+                classes[i] = result
+
+    # 2) Structure each type with its own batched program
+    structured = [None] * len(raw_texts)
+    qa = [i for i, cls in enumerate(classes) if cls and cls["test_case_type"] == "qa_test"]
+    behavioral = [i for i, cls in enumerate(classes) if cls and cls["test_case_type"] == "behavioral_test"]
+    for i, cls in enumerate(classes):
+        if cls and cls["test_case_type"] not in TEST_CASE_TYPES:
+            structured[i] = {"error": "Unknown test case type."}
+
+    for chunk in chunked(qa, batch_size):
+        items = [{"test_case_type": "qa_test", "raw_text": raw_texts[i]} for i in chunk]
+        for i, result in zip(chunk, batch_extractor_llm(items)):
+            if isinstance(result, Exception):
+                outcomes[i] = {"error": f"{type(result).__name__}: {result}"}
+            else:
+                structured[i] = result
+
+    for chunk in chunked(behavioral, batch_size):
+        items = [{"behavior_description": raw_texts[i]} for i in chunk]
+        for i, result in zip(chunk, batch_synthesizer_llm(items)):
+            if isinstance(result, Exception):
+                outcomes[i] = {"error": f"{type(result).__name__}: {result}"}
+            else:
+                structured[i] = synthesized_to_structured(result)
+
+    # 3) Canonicalize and assemble
+    for i, raw_text in enumerate(raw_texts):
+        if outcomes[i] is None:
+            outcomes[i] = {"result": finish_test_case(raw_text, classes[i], structured[i])}
+    return outcomes
@@ -0,0 +1,297 @@
+import argparse
+import os
+from datetime import datetime
+from booking_agent import BookingAgent, BYPASS_AGENT_CACHE
+from modules.concurrency import DEFAULT_WORKERS
+from modules.llm_cache import llm_cache
+from modules.comparison import LEXICAL_LOW, LEXICAL_HIGH
+from modules.similarity import VECTOR_PASS_SCORE
+from modules.judge import (
+    COMPARISON_METHODS,
+    build_comparison_row,
+    error_row,
+    fast_decisions,
+    summarize,
+)
+from modules.jsonl_store import read_records, jsonl_path, export_json, export_report
+from modules.pipeline import Pipeline, Stage
+from modules.run_history import new_run_id, record_run
+from modules.fingerprints import record_test_key
+from modules.progress import make_progress
+from modules.lm_registry import lm_registry, add_model_argument
+from modules.call_layer import call_layer
+from modules.metrics import track, format_performance
+from modules.scheduling import add_scheduling_arguments, previous_statuses, failure_first, count_failing, EarlyAbort
+from modules.sampling import add_sample_arguments, stratified_sample, stratum_of, summarize_sample, format_sample, sample_path
+from rich.console import Console
+from rich.panel import Panel
+
+# ------------------- CLI OPTIONS -------------------
+parser = argparse.ArgumentParser(
+    description=(
+        "Run convert → ask → judge in one process, pipelining each test through the stages. "
+        "Every run recomputes the whole suite: the manifest is neither read nor written and there is "
+        "no --resume (the LLM cache still answers repeated calls). Use the stage scripts for incremental runs."
+    )
+)
+parser.add_argument("--ask-workers", type=int, default=DEFAULT_WORKERS, help="Concurrent agent requests")
+parser.add_argument("--judge-workers", type=int, default=DEFAULT_WORKERS, help="Concurrent judge requests")
+parser.add_argument(
+    "--method",
+    choices=list(COMPARISON_METHODS),
+    default="tiered",
+    help="Comparison method, as in compare.py (vector scores each row as soon as its answer arrives)"
+)
+parser.add_argument("--lexical-scorer", choices=["overlap", "tfidf"], default="overlap")
+parser.add_argument("--lexical-band", nargs=2, type=float, metavar=("LOW", "HIGH"), default=[LEXICAL_LOW, LEXICAL_HIGH])
+parser.add_argument("--vector-pass-score", type=float, default=VECTOR_PASS_SCORE)
+parser.add_argument(
+    "--no-agent-cache",
+    action="store_true",
+    default=BYPASS_AGENT_CACHE,
+    help="Always query the live agent instead of reusing cached answers (env LLM_CACHE_BYPASS_AGENT=1)"
+)
+parser.add_argument(
+    "--save",
+    choices=["report", "all", "none"],
+    default="report",
+    help="report: write comparison_report.json only; all: also expected_results/agent_responses; none: print only"
+)
+add_scheduling_arguments(parser)
+add_sample_arguments(parser)
+add_model_argument(parser)
+args = parser.parse_args()
+lm_registry.configure(model=args.model)
+
+# ------------------- SETUP -------------------
+console = Console()
+TEST_CASES_PATH = "outputs/test_cases.json"
+COMPARISON_OUTPUT = "outputs/comparison_report.json"
+# Sampled runs save *.sample.* files, so a smoke run never replaces the full suite's artifacts
+EXPECTED_PATH = sample_path("outputs/expected_results.json", args.sample)
+ACTUAL_PATH = sample_path("outputs/agent_responses.json", args.sample)
+REPORT_PATH = sample_path(COMPARISON_OUTPUT, args.sample)
+
+os.makedirs("outputs", exist_ok=True)
+
+# ------------------- LOAD TEST CASES -------------------
+console.print("\n[bold cyan]📂 Loading Test Cases...[/bold cyan]")
+
+if not os.path.exists(TEST_CASES_PATH) and not os.path.exists(jsonl_path(TEST_CASES_PATH)):
+    console.print(f"[red]❌ Error: {TEST_CASES_PATH} not found![/red]")
+    console.print("[yellow]💡 Run main.py first to generate test cases.[/yellow]")
+    exit(1)
+
+test_cases = list(read_records(TEST_CASES_PATH))
+records = [{"test_id": idx, "test_case": tc} for idx, tc in enumerate(test_cases, 1)]
+console.print(f"[green]✅ Loaded {len(records)} test cases[/green]")
+statuses = previous_statuses(COMPARISON_OUTPUT)
+
+plan = None
+if args.sample:
+    # Smoke mode: only a stratified random subset goes through the agent and the judge
+    positions, plan = stratified_sample(test_cases, statuses, args.sample, args.sample_seed)
+    records = [{**records[p], "stratum": stratum_of(test_cases[p], statuses)} for p in positions]
+    console.print(f"[dim]🎲 Sampled {plan['size']} of {plan['population']} tests across {len(plan['strata'])} strata (seed {args.sample_seed})[/dim]")
+
+if not args.no_failure_first:
+    # Tests that failed last time enter the pipeline first; results are re-sorted by test id afterwards
+    keys = [record_test_key(r["test_case"]) for r in records]
+    records = [records[position] for position in failure_first(keys, statuses)]
+    if count_failing(keys, statuses):
+        console.print(f"[dim]⏩ {count_failing(keys, statuses)} previously failing test(s) scheduled first[/dim]")
+
+agent = BookingAgent(use_cache=not args.no_agent_cache)
+
+
+# ------------------- STAGES -------------------
+def convert_stage(record):
+    tc = record["test_case"]
+    return {
+        "test_key": record_test_key(tc),
+        "question": tc.get("input_prompt", ""),
+        "expected_answer": tc.get("expected_output", ""),
+        "test_case_type": tc.get("test_case_type")
+    }
+
+
+def ask_stage(record):
+    outcome = agent.respond_tracked(record["question"])
+    return {"agent_answer": outcome["agent_answer"], "ask_error": outcome.get("error"), "ask_metrics": outcome["metrics"]}
+
+
+def triage_stage(record):
+    """Deterministic tiers for one row; anything left undecided goes to the LLM judge"""
+    if record["ask_error"]:
+        return {"fast_decision": None}
+    decision = fast_decisions(
+        [(record["expected_answer"], record["agent_answer"])],
+        args.method,
+        args.lexical_band,
+        args.lexical_scorer,
+        args.vector_pass_score
+    )[0]
+    return {"fast_decision": decision}
+
+
+def judge_stage(record):
+    with track() as metrics:
+        if record["ask_error"]:
+            # No answer to judge: the row records the agent failure instead
+            row = error_row(
+                record["test_id"], record["question"], record["expected_answer"], None,
+                f"Agent failed: {record['ask_error']}"
+            )
+        else:
+            row = build_comparison_row(
+                record["test_id"],
+                record["question"],
+                record["expected_answer"],
+                record["agent_answer"],
+                record["fast_decision"]
+            )
+    row["test_key"] = record["test_key"]
+    if "stratum" in record:
+        row["stratum"] = record["stratum"]
+    row["metrics"] = {"ask": record["ask_metrics"], "judge": metrics}
+    return {"comparison": row}
+
+
+pipeline = Pipeline(
+    [
+        Stage("convert", convert_stage),
+        Stage("ask", ask_stage, workers=args.ask_workers, after=["convert"]),
+        Stage("triage", triage_stage, after=["ask"]),
+        Stage("judge", judge_stage, workers=args.judge_workers, after=["triage"]),
+    ],
+    max_in_flight=4 * max(args.ask_workers, args.judge_workers, 1)
+)
+
+# ------------------- RUN -------------------
+console.print(
+    f"\n[bold cyan]🚀 Running pipeline: convert → ask ({args.ask_workers}) → triage → judge ({args.judge_workers}) "
+    f"· {COMPARISON_METHODS[args.method]}[/bold cyan]\n"
+)
+
+def needs_lm(records) -> bool:
+    """
+    True when some test will reach an LLM: an answer missing from the agent cache, or
+    (as in compare.py) a cached answer the deterministic tiers cannot judge.
+    """
+    pairs = []
+    for record in records:
+        converted = convert_stage(record)
+        answer = agent.cached_response(converted["question"])
+        if answer is None:
+            return True
+        pairs.append((converted["expected_answer"], answer))
+    decisions = fast_decisions(pairs, args.method, args.lexical_band, args.lexical_scorer, args.vector_pass_score)
+    return any(decision is None for decision in decisions)
+
+
+if needs_lm(records):
+    # Configure dspy from the main thread before the stage pools start
+    lm_registry.get_lm()
+abort = EarlyAbort(args.abort_below, args.abort_after)
+
+with make_progress(console, unit="tests") as progress:
+    ask_task = progress.add_task("[cyan]Asking agent...", total=len(records))
+    judge_task = progress.add_task("[magenta]Judging...", total=len(records))
+    stage_tasks = {"ask": ask_task, "judge": judge_task}
+
+    def on_stage(name, idx, record):
+        if name in stage_tasks:
+            progress.update(stage_tasks[name], advance=1)
+        if name == "judge":
+            abort.record(record["comparison"]["status"])
+
+    # Once the abort check trips, no new tests are admitted; the ones in flight finish
+    finished = pipeline.run(records, on_stage=on_stage, should_stop=abort.should_stop)
+
+finished = sorted((r for r in finished if r is not None), key=lambda r: r["test_id"])
+if abort.triggered:
+    console.print(f"\n[bold red]🛑 Early abort: {abort.describe()['reason']}[/bold red]")
+    console.print(f"[dim]{len(records) - len(finished)} test(s) not run[/dim]")
+
+comparison_results = [r["comparison"] for r in finished if "comparison" in r]
+errored = [r for r in finished if r.get("errors")]
+summary = summarize(comparison_results)
+summary["llm_outcomes"] = call_layer.snapshot()
+if plan:
+    summary["sample"] = summarize_sample(comparison_results, plan)
+
+# ------------------- SAVE ARTIFACTS -------------------
+if args.save in ["report", "all"]:
+    report_header = {
+        "run_id": new_run_id(),
+        "timestamp": datetime.now().isoformat(),
+        "comparison_method": COMPARISON_METHODS[args.method],
+        "summary": summary
+    }
+    if abort.triggered:
+        report_header["aborted"] = {**abort.describe(), "not_run": len(records) - len(finished)}
+    export_report(report_header, comparison_results, REPORT_PATH)
+    if not abort.triggered and not plan:
+        # A partial run would skew the history's trends and diffs, so only complete runs are recorded
+        record_run(report_header, comparison_results)
+    console.print(f"[green]✅ Report saved to {REPORT_PATH}[/green]")
+
+if args.save == "all":
+    export_json(
+        (
+            {
+                "test_key": r["test_key"],
+                "question": r["question"],
+                "expected_answer": r["expected_answer"],
+                **({"test_case_type": r["test_case_type"]} if r["test_case_type"] else {})
+            }
+            for r in finished if "question" in r
+        ),
+        EXPECTED_PATH
+    )
+    export_json(
+        (
+            {
+                "test_key": r["test_key"],
+                "question": r["question"],
+                "agent_answer": r["agent_answer"],
+                **({"error": r["ask_error"]} if r["ask_error"] else {}),
+                "metrics": r["ask_metrics"]
+            }
+            for r in finished if "agent_answer" in r
+        ),
+        ACTUAL_PATH
+    )
+    console.print(f"[green]✅ Intermediate results saved to {EXPECTED_PATH} and {ACTUAL_PATH}[/green]")
+
+console.print(f"[dim]LLM cache: {llm_cache.format_stats()}[/dim]")
+console.print(f"[dim]LLM calls: {call_layer.format_stats()}[/dim]\n")
+
+# ------------------- DISPLAY STATISTICS -------------------
+decided_by = ", ".join(f"{tier}: {count}" for tier, count in summary["decided_by"].items()) or "-"
+sample_line = f"\n[bold yellow]Sample:[/bold yellow] {format_sample(summary['sample'])}" if plan else ""
+console.print(Panel(
+    f"""[bold]Total Tests:[/bold] {summary['total_tests']}
+[bold green]Passed:[/bold green] {summary['passed']}
+[bold red]Failed:[/bold red] {summary['failed']}
+[bold magenta]Errors:[/bold magenta] {summary['errors']} (not judged; excluded from the pass rate)
+[bold]Pass Rate:[/bold] {summary['pass_rate']}%{sample_line}
+[bold]Decided By:[/bold] {decided_by}
+
+[bold]Performance:[/bold]
+{format_performance(summary["performance"]) or "-"}
+
+[dim]Comparison Method: {COMPARISON_METHODS[args.method]}[/dim]""",
+    title="[bold cyan]Test Statistics[/bold cyan]",
+    border_style="cyan"
+))
+
+if errored:
+    console.print(f"\n[bold red]❌ {len(errored)} test(s) did not finish every stage:[/bold red]")
+    for r in errored[:10]:
+        for stage, error in r["errors"].items():
+            console.print(f"  Test #{r['test_id']} [{stage}]: {error}")
+
+if abort.triggered:
+    # Non-zero exit so CI marks the build as failed without waiting for the full suite
+    exit(1)
@@ -0,0 +1,22 @@
+import dspy
+
+class BatchBehavioralSynthesizerSignature(dspy.Signature):
+    """
+    Generate a synthetic Q&A pair for each behavioral description in a batch.
+
+    Handle every item independently and return exactly one result per input item,
+    echoing its "id" unchanged.
+
+    Example:
+    Input: [{"id": 0, "behavior_description": "When the user asks to book without details, ask for campus."}]
+    Output:
+    [
+        {
+            "id": 0,
+            "synthetic_input": "User: I would like to book a venue.",
+            "synthetic_expected_output": "Agent: Which campus would you like to book at?"
+        }
+    ]
+    """
+    items_json: str = dspy.InputField(desc='JSON array of {"id": int, "behavior_description": str} items.')
+    results_json: str = dspy.OutputField(desc="JSON array with one {id, synthetic_input, synthetic_expected_output} object per item.")
@@ -0,0 +1,22 @@
+import dspy
+
+class BatchTestCaseTypeClassifierSignature(dspy.Signature):
+    """
+    Detect, for each test case input in a batch, whether it is a Q&A-style test or a behavioral/expectation test.
+
+    Classify every item independently and return exactly one result per input item,
+    echoing its "id" unchanged.
+
+    OUTPUT FORMAT
+    -------------
+    [
+        {
+            "id": <id of the input item>,
+            "test_case_type": "qa_test" | "behavioral_test",
+            "reasoning": "Brief reasoning for classification"
+        },
+        ...
+    ]
+    """
+    items_json: str = dspy.InputField(desc='JSON array of {"id": int, "test_input": str} items.')
+    results_json: str = dspy.OutputField(desc="JSON array with one {id, test_case_type, reasoning} object per item.")
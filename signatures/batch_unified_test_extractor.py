@@ -0,0 +1,21 @@
+import dspy
+
+class BatchUnifiedTestCaseExtractorSignature(dspy.Signature):
+    """
+    Extracts question and expected answer from each Q&A-style test case in a batch.
+
+    Handle every item independently and return exactly one result per input item,
+    echoing its "id" unchanged.
+
+    Expected Output JSON:
+    [
+        {
+            "id": <id of the input item>,
+            "input_prompt": "<question>",
+            "expected_output": "<agent's expected answer>"
+        },
+        ...
+    ]
+    """
+    items_json: str = dspy.InputField(desc='JSON array of {"id": int, "test_case_type": str, "raw_text": str} items.')
+    results_json: str = dspy.OutputField(desc="JSON array with one {id, input_prompt, expected_output} object per item.")
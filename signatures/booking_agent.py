@@ -0,0 +1,13 @@
+import dspy
+
+class BookingAgentSignature(dspy.Signature):
+    """
+    A helpful booking agent that assists users with venue/room bookings.
+    
+    The agent should:
+    - Ask for missing information (campus, date, time, room type)
+    - Provide helpful responses
+    - Confirm bookings when all details are provided
+    """
+    user_query: str = dspy.InputField(desc="The user's booking-related query or request.")
+    agent_response: str = dspy.OutputField(desc="The agent's helpful response to the user.")
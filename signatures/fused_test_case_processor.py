@@ -0,0 +1,25 @@
+import dspy
+
+class FusedTestCaseSignature(dspy.Signature):
+    """
+    Classify a raw test case and turn it into a structured Q&A pair in one step.
+
+    1. Decide whether it is a Q&A-style test ("qa_test": it states a question and its
+       expected answer) or a behavioral/expectation test ("behavioral_test": it describes
+       how the agent should behave).
+    2. For a qa_test, extract the question and the agent's expected answer.
+       For a behavioral_test, synthesize a realistic user message and the agent reply
+       that demonstrates the behavior.
+
+    Example:
+    Input: "When the user asks to book without details, ask for campus."
+    Output:
+    {
+        "test_case_type": "behavioral_test",
+        "reasoning": "Describes expected agent behavior, not a literal Q&A pair.",
+        "input_prompt": "User: I would like to book a venue.",
+        "expected_output": "Agent: Which campus would you like to book at?"
+    }
+    """
+    raw_text: str = dspy.InputField(desc="Raw text of the test case.")
+    result_json: str = dspy.OutputField(desc="JSON with test_case_type, reasoning, input_prompt and expected_output.")
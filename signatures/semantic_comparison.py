@@ -0,0 +1,17 @@
+import dspy
+
+class SemanticComparisonSignature(dspy.Signature):
+    """
+    Compare two answers semantically to determine if they convey the same meaning.
+    
+    Output JSON format:
+    {
+        "are_equivalent": true/false,
+        "similarity_score": 0-100,
+        "reasoning": "Brief explanation of comparison"
+    }
+    """
+    question: str = dspy.InputField(desc="The original question asked")
+    expected_answer: str = dspy.InputField(desc="The expected/reference answer")
+    actual_answer: str = dspy.InputField(desc="The actual answer given by the agent")
+    comparison_json: str = dspy.OutputField(desc="JSON with are_equivalent, similarity_score, and reasoning")
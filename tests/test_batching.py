@@ -0,0 +1,81 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from modules.batching import BatchedPredictor, chunked, parse_json_array
+from modules.call_layer import CircuitOpenError
+
+
+def test_parse_json_array_tolerates_fences_and_prose():
+    assert parse_json_array('```json\n[{"id": 0}]\n```') == [{"id": 0}]
+    assert parse_json_array('Here you go: [{"id": 1}] Hope that helps') == [{"id": 1}]
+    assert parse_json_array('{"results": [{"id": 2}]}') == [{"id": 2}]
+    for text in ['{"id": 0}', "no array here", ""]:
+        with pytest.raises(ValueError):
+            parse_json_array(text)
+
+
+def test_chunked():
+    assert list(chunked([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+
+
+class Single:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return SimpleNamespace(answer_json=json.dumps({"label": text.upper()}))
+
+
+def batched(respond):
+    single = Single()
+    predictor = BatchedPredictor("upper", "unused:Signature", single, "answer_json", required=["label"])
+    batch_calls = []
+
+    def program(items_json):
+        items = json.loads(items_json)
+        batch_calls.append([item["text"] for item in items])
+        return SimpleNamespace(results_json=respond(items))
+
+    predictor.program = program
+    return predictor, single, batch_calls
+
+
+def test_one_call_answers_the_whole_batch():
+    predictor, single, batch_calls = batched(
+        lambda items: json.dumps([{"id": item["id"], "label": item["text"].upper()} for item in reversed(items)])
+    )
+    assert predictor([{"text": t} for t in "abc"]) == [{"label": "A"}, {"label": "B"}, {"label": "C"}]
+    assert batch_calls == [["a", "b", "c"]] and single.calls == []
+
+
+def test_dropped_and_invalid_items_are_retried_alone():
+    predictor, single, _ = batched(lambda items: json.dumps([{"id": 0, "label": "A"}, {"id": 1, "label": ""}]))
+    assert predictor([{"text": t} for t in "abc"]) == [{"label": "A"}, {"label": "B"}, {"label": "C"}]
+    assert single.calls == ["b", "c"]
+    assert predictor.stats["items_retried"] == 2
+
+
+def test_unusable_batch_is_split_in_half():
+    def respond(items):
+        if any(item["text"] == "x" for item in items):
+            return "I cannot help with that."
+        return json.dumps([{"id": item["id"], "label": item["text"].upper()} for item in items])
+
+    predictor, single, batch_calls = batched(respond)
+    results = predictor([{"text": t} for t in ["a", "b", "x", "d"]])
+    assert results == [{"label": "A"}, {"label": "B"}, {"label": "X"}, {"label": "D"}]
+    assert batch_calls == [["a", "b", "x", "d"], ["a", "b"], ["x", "d"]]
+    assert single.calls == ["x", "d"]
+
+
+def test_open_circuit_fails_the_batch_without_splitting():
+    def respond(items):
+        raise CircuitOpenError("provider down")
+
+    predictor, single, batch_calls = batched(respond)
+    results = predictor([{"text": t} for t in "abcd"])
+    assert all(isinstance(r, CircuitOpenError) for r in results)
+    assert len(batch_calls) == 1 and single.calls == []
@@ -0,0 +1,131 @@
+import pytest
+
+from modules import call_layer as layer
+from modules.call_layer import (
+    AIMDLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMCallError,
+    LLMCallLayer,
+    backoff_delay,
+    classify_error,
+)
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(layer, "backoff_delay", lambda attempt: 0)
+
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(1, 10):
+        cap = min(20, 0.5 * 2 ** (attempt - 1))
+        assert all(0 <= backoff_delay(attempt, 0.5, 20) <= cap for _ in range(50))
+
+
+def test_classify_error():
+    assert classify_error(type("RateLimitError", (Exception,), {})()) == "rate_limit"
+    assert classify_error(Unavailable()) == "transient"
+    assert classify_error(TimeoutError()) == "transient"
+    assert classify_error(BadRequest()) == "fatal"
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(threshold=2, reset_s=3600)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.opened == 1
+    assert not breaker.allow()
+
+    breaker.reset_s = 0
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.opened == 2
+
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_aimd_grows_and_halves():
+    limiter = AIMDLimiter(initial=8, minimum=1, maximum=64, cooldown_s=3600)
+    limiter.acquire()
+    limiter.release("success", 1.0)
+    assert limiter.limit == pytest.approx(8.125)
+    limiter.acquire()
+    limiter.release("rate_limit", 1.0)
+    assert limiter.limit == pytest.approx(4.0625)
+    # A second 429 inside the cooldown is the same congestion signal
+    limiter.acquire()
+    limiter.release("rate_limit", 1.0)
+    assert limiter.limit == pytest.approx(4.0625)
+
+
+def test_call_retries_transient_errors():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise Unavailable("try again")
+        return "ok"
+
+    call_layer = LLMCallLayer(max_retries=4)
+    assert call_layer.call("judge", flaky) == "ok"
+    stats = call_layer.snapshot()["stages"]["judge"]
+    assert stats["attempts"] == 3 and stats["retries"] == 2 and stats["succeeded"] == 1
+    assert call_layer.breaker.state == "closed"
+
+
+def test_call_does_not_retry_fatal_errors():
+    def rejected():
+        raise BadRequest("bad input")
+
+    call_layer = LLMCallLayer(max_retries=4)
+    with pytest.raises(LLMCallError):
+        call_layer.call("judge", rejected)
+    assert call_layer.snapshot()["stages"]["judge"]["attempts"] == 1
+
+
+def test_breaker_rejects_calls_once_open():
+    call_layer = LLMCallLayer(max_retries=0)
+    call_layer.breaker = CircuitBreaker(threshold=2, reset_s=3600)
+
+    def down():
+        raise Unavailable("down")
+
+    for _ in range(2):
+        with pytest.raises(LLMCallError):
+            call_layer.call("agent", down)
+    with pytest.raises(CircuitOpenError):
+        call_layer.call("agent", down)
+    snapshot = call_layer.snapshot()
+    assert snapshot["circuit_state"] == "open" and snapshot["stages"]["agent"]["circuit_rejected"] == 1
+
+
+def test_rate_limited_probe_releases_the_half_open_breaker():
+    call_layer = LLMCallLayer(max_retries=0)
+    call_layer.breaker = CircuitBreaker(threshold=1, reset_s=0)
+    call_layer.breaker.record_failure()
+    assert call_layer.breaker.state == "open"
+
+    def busy():
+        raise type("RateLimitError", (Exception,), {})("429")
+
+    with pytest.raises(LLMCallError) as error:
+        call_layer.call("judge", busy)
+    assert not isinstance(error.value, CircuitOpenError)
+    assert call_layer.breaker.state == "half_open"
+    # The next call is let through as a new probe, and its success closes the circuit
+    assert call_layer.call("judge", lambda: "ok") == "ok"
+    assert call_layer.breaker.state == "closed"
@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("rich")
+from compare import match_results  # noqa: E402
+from modules.fingerprints import test_key as make_test_key  # noqa: E402
+
+
+def expected(question, answer):
+    return {"question": question, "expected_answer": answer}
+
+
+def test_answers_are_joined_on_test_key_in_expected_order():
+    suite = [expected("q1", "a1"), expected("q2", "a2"), expected("q3", "a3")]
+    answers = [
+        {"test_key": make_test_key("q3", "a3"), "question": "q3", "agent_answer": "three"},
+        {"test_key": make_test_key("q1", "a1"), "question": "q1", "agent_answer": "one"},
+        {"question": "q2", "agent_answer": "legacy two"},
+        {"test_key": "unknown", "question": "q9", "agent_answer": "orphan"},
+    ]
+    matched, missing, orphans = match_results(suite, answers)
+    assert [(e["question"], a["agent_answer"]) for e, a in matched] == [("q1", "one"), ("q2", "legacy two"), ("q3", "three")]
+    assert missing == []
+    assert [a["agent_answer"] for a in orphans] == ["orphan"]
+
+
+def test_tests_without_an_answer_are_reported():
+    matched, missing, orphans = match_results([expected("q1", "a1"), expected("q2", "a2")], [
+        {"test_key": make_test_key("q1", "a1"), "question": "q1", "agent_answer": "one"},
+    ])
+    assert len(matched) == 1 and [e["question"] for e in missing] == ["q2"] and orphans == []
@@ -0,0 +1,37 @@
+from modules.comparison import (
+    TIER_EXACT,
+    TIER_LEXICAL,
+    decide_fast_tiers,
+    lexical_scores,
+    normalize_answer,
+)
+
+
+def test_normalize_answer():
+    assert normalize_answer("Agent: Yes, it's BOOKED!") == "yes it s booked"
+    assert normalize_answer(None) == ""
+
+
+def test_lexical_scores_are_token_set_f1():
+    assert lexical_scores([("The cat sat", "the cat sat down"), ("", ""), ("a b", "c d")]) == [85.71, 0.0, 0.0]
+
+
+def test_fast_tiers_decide_clear_rows_only():
+    decisions = decide_fast_tiers([
+        ("Agent: Yes.", "yes"),
+        ("abc", ""),
+        ("one two three four", "five six seven eight"),
+        ("a b c d e f g h i j", "a b c d e f g h i j k"),
+        ("the cat sat", "the cat sat down"),
+    ])
+    assert [d and d["decided_by"] for d in decisions] == [TIER_EXACT, TIER_EXACT, TIER_LEXICAL, TIER_LEXICAL, None]
+    assert [d and d["are_equivalent"] for d in decisions[:4]] == [True, False, False, True]
+    assert decisions[3]["similarity_score"] == 95.24
+
+
+def test_fast_tiers_take_the_band_and_scorer():
+    pairs = [("the cat sat", "the cat sat down")]
+    assert decide_fast_tiers(pairs, low=10, high=80)[0]["decided_by"] == TIER_LEXICAL
+    decision = decide_fast_tiers(pairs, scorer=lambda pairs: [5.0], scorer_name="tfidf")[0]
+    assert not decision["are_equivalent"]
+    assert decision["reasoning"].startswith("Lexical score (tfidf) 5.0%")
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from modules.concurrency import run_ordered
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_run_ordered_keeps_input_order(workers):
+    assert run_ordered(lambda x: x * x, range(20), max_workers=workers) == [x * x for x in range(20)]
+
+
+def test_run_ordered_reports_results_as_they_finish():
+    seen = []
+    results = run_ordered(lambda x: -x, range(30), max_workers=4, on_result=lambda i, r: seen.append((i, r)))
+    assert sorted(seen) == [(i, -i) for i in range(30)]
+    assert results == [-i for i in range(30)]
+
+
+def test_run_ordered_empty():
+    assert run_ordered(lambda x: x, [], max_workers=4) == []
+
+
+def test_run_ordered_stops_starting_items():
+    done = []
+    results = run_ordered(lambda x: x, range(10), max_workers=1, on_result=lambda i, r: done.append(i),
+                          should_stop=lambda: len(done) >= 3)
+    assert results == [0, 1, 2] + [None] * 7
+
+
+def test_run_ordered_stop_with_workers_finishes_in_flight():
+    started = []
+    lock = threading.Lock()
+
+    def work(x):
+        with lock:
+            started.append(x)
+        return x
+
+    done = []
+    results = run_ordered(work, range(100), max_workers=2, on_result=lambda i, r: done.append(i),
+                          should_stop=lambda: len(done) >= 5)
+    # Everything started finished; nothing past the in-flight window started after the stop
+    assert sorted(i for i, r in enumerate(results) if r is not None) == sorted(started)
+    assert 5 <= len(started) < 100
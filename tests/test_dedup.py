@@ -0,0 +1,59 @@
+import numpy as np
+
+from modules.dedup import DuplicateIndex, MinHasher, optimal_bands, shingles
+
+
+def case(prompt, expected="Agent: Your booking is confirmed for Friday at noon."):
+    return {"input_prompt": prompt, "expected_output": expected}
+
+
+BASE = case("Book a table for four people this Friday at noon near the station please")
+NEAR = case("Book a table for four people this Friday at noon near the station, please!")
+OTHER = case("Cancel my hotel reservation in Paris", "Agent: Your reservation has been cancelled.")
+
+
+def test_minhash_estimates_jaccard():
+    hasher = MinHasher(256)
+    a, b = shingles(BASE), shingles(case("Book a table for four people this Friday at noon near the park"))
+    jaccard = len(set(a.tolist()) & set(b.tolist())) / len(set(a.tolist()) | set(b.tolist()))
+    estimate = np.mean(hasher.signature(a) == hasher.signature(b))
+    assert abs(estimate - jaccard) < 0.15
+    assert np.array_equal(hasher.signature(a), MinHasher(256).signature(a))
+
+
+def test_optimal_bands_fit_the_signature():
+    bands, rows = optimal_bands(0.8)
+    assert bands * rows <= 128
+    assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.1
+
+
+def test_index_finds_exact_and_near_duplicates():
+    index = DuplicateIndex()
+    index.add(BASE)
+    index.add(OTHER)
+    assert index.find_exact(dict(BASE)) == 0
+    assert index.find_exact(NEAR) is None
+    assert [position for position, _ in index.find_near(NEAR)] == [0]
+    assert index.find_near(case("Where is the nearest pharmacy", "Agent: Two blocks north.")) == []
+
+
+def test_clusters_group_near_duplicates():
+    index = DuplicateIndex()
+    for c in (BASE, OTHER, NEAR):
+        index.add(c)
+    assert index.clusters() == [[0, 2]]
+
+
+def test_signatures_are_reused_only_for_the_same_store(tmp_path):
+    path = str(tmp_path / "cases.lsh.npz")
+    cases = [BASE, OTHER]
+    index = DuplicateIndex.load_or_build(path, cases)
+    index.save(path, cases)
+
+    reloaded = DuplicateIndex.load_or_build(path, cases)
+    assert len(reloaded) == 2
+    assert all(np.array_equal(a, b) for a, b in zip(index.signatures, reloaded.signatures))
+    assert [position for position, _ in reloaded.find_near(NEAR)] == [0]
+
+    rebuilt = DuplicateIndex.load_or_build(path, cases + [NEAR])
+    assert len(rebuilt) == 3 and rebuilt.clusters() == [[0, 2]]
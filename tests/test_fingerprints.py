@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from modules.fingerprints import Manifest, fingerprint, program_fingerprint, question_key, record_test_key
+from modules.fingerprints import test_key as make_test_key
+
+
+class AnswerSignature:
+    instructions = "Answer briefly."
+    input_fields = {"question": SimpleNamespace(json_schema_extra={"desc": "the question"})}
+    output_fields = {"answer": SimpleNamespace(json_schema_extra={"desc": "the answer"})}
+
+
+def test_fingerprint_is_stable_and_order_insensitive_for_dicts():
+    assert fingerprint("a", {"x": 1, "y": 2}) == fingerprint("a", {"y": 2, "x": 1})
+    assert fingerprint("a", "b") != fingerprint("b", "a")
+
+
+def test_record_test_key_for_every_stage_shape():
+    key = make_test_key("What time is it?", "Noon.")
+    assert record_test_key({"input_prompt": "What time is it?", "expected_output": "Noon."}) == key
+    assert record_test_key({"question": "What time is it?", "expected_answer": "Noon."}) == key
+    assert record_test_key({"test_key": "assigned", "question": "other"}) == "assigned"
+    assert question_key("What time is it?") != key
+
+
+def test_program_fingerprint_changes_with_model_and_settings():
+    base = program_fingerprint("openai/gpt-4o-mini", AnswerSignature)
+    assert base == program_fingerprint("openai/gpt-4o-mini", AnswerSignature, {})
+    assert base != program_fingerprint("openai/gpt-4o", AnswerSignature)
+    assert base != program_fingerprint("openai/gpt-4o-mini", AnswerSignature, {"temperature": 0.7})
+
+
+def test_manifest_reuses_rows_only_with_an_unchanged_fingerprint(tmp_path):
+    path = tmp_path / "manifest.json"
+    manifest = Manifest(str(path))
+    assert not manifest.is_fresh("ask", "k1", "fp1")
+    manifest.update_stage("ask", {"k1": "fp1", "k2": "fp2"})
+    manifest.save()
+
+    reloaded = Manifest(str(path))
+    assert reloaded.is_fresh("ask", "k1", "fp1")
+    assert not reloaded.is_fresh("ask", "k1", "changed")
+    assert not reloaded.is_fresh("judge", "k1", "fp1")
+
+    reloaded.update_stage("ask", {"k2": "fp2"})
+    assert not reloaded.is_fresh("ask", "k1", "fp1")
+
+
+def test_corrupt_manifest_starts_empty(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert Manifest(str(path)).stages == {}
@@ -0,0 +1,74 @@
+import json
+import os
+
+from modules.jsonl_store import (
+    OrderedJsonlWriter,
+    export_json,
+    export_report,
+    iter_jsonl,
+    jsonl_path,
+    read_checkpoint,
+    read_records,
+)
+
+
+def test_ordered_writer_keeps_an_in_order_prefix(tmp_path):
+    path = str(tmp_path / "answers.jsonl")
+    with OrderedJsonlWriter(path) as writer:
+        writer.put(2, {"i": 2})
+        writer.put(0, {"i": 0})
+        assert [r["i"] for r in iter_jsonl(path)] == [0]
+        writer.put(1, {"i": 1})
+    assert [r["i"] for r in iter_jsonl(path)] == [0, 1, 2]
+
+
+def test_checkpoint_drops_a_torn_line(tmp_path):
+    path = tmp_path / "answers.jsonl"
+    path.write_text('{"i": 0}\n{"i": 1}\n{"i": 2', encoding="utf-8")
+    assert read_checkpoint(str(path)) == [{"i": 0}, {"i": 1}]
+    assert path.read_text(encoding="utf-8") == '{"i": 0}\n{"i": 1}\n'
+
+
+def test_checkpoint_stops_at_the_first_stale_record(tmp_path):
+    path = tmp_path / "answers.jsonl"
+    path.write_text("".join(json.dumps({"q": q}) + "\n" for q in ["a", "b", "old", "d"]), encoding="utf-8")
+    questions = ["a", "b", "c", "d"]
+    assert read_checkpoint(str(path), matches=lambda idx, row: row["q"] == questions[idx]) == [{"q": "a"}, {"q": "b"}]
+
+    with OrderedJsonlWriter(str(path), append=True, start=2) as writer:
+        writer.put(3, {"q": "d"})
+        writer.put(2, {"q": "c"})
+    assert [r["q"] for r in iter_jsonl(str(path))] == questions
+
+
+def test_missing_checkpoint_is_empty(tmp_path):
+    assert read_checkpoint(str(tmp_path / "missing.jsonl")) == []
+
+
+def test_exports_match_json_dump(tmp_path):
+    records = [{"q": "a", "nested": {"n": 1}}, {"q": "é"}]
+    path = str(tmp_path / "answers.json")
+    export_json(iter(records), path)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == json.dumps(records, indent=2, ensure_ascii=False)
+    export_json([], path)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == []
+
+    report = str(tmp_path / "report.json")
+    export_report({"summary": {"total": 2}}, iter(records), report)
+    with open(report, encoding="utf-8") as f:
+        assert f.read() == json.dumps({"summary": {"total": 2}, "comparisons": records}, indent=2, ensure_ascii=False)
+
+
+def test_read_records_prefers_the_newest_file(tmp_path):
+    json_file = str(tmp_path / "answers.json")
+    export_json([{"from": "json"}], json_file)
+    with open(jsonl_path(json_file), "w", encoding="utf-8") as f:
+        f.write('{"from": "jsonl"}\n')
+    os.utime(json_file, (0, 0))
+    assert list(read_records(json_file)) == [{"from": "jsonl"}]
+    os.utime(jsonl_path(json_file), (0, 0))
+    os.utime(json_file, None)
+    assert list(read_records(json_file)) == [{"from": "json"}]
+    assert list(read_records(str(tmp_path / "missing.json"))) == []
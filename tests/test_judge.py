@@ -0,0 +1,42 @@
+import pytest
+
+from modules.comparison import parse_verdict
+
+
+def test_parse_verdict_normalizes_fields():
+    verdict = parse_verdict('{"are_equivalent": "true", "similarity_score": "85%", "reasoning": "same"}')
+    assert verdict == {"are_equivalent": True, "similarity_score": 85.0, "reasoning": "same"}
+    assert parse_verdict('{"similarity_score": 40}') == {"are_equivalent": False, "similarity_score": 40.0, "reasoning": ""}
+
+
+@pytest.mark.parametrize("reply", ['["PASS"]', '"PASS"', "42", '{"similarity_score": "high"}',
+                                   '{"similarity_score": null}', '{"similarity_score": true}', "not json"])
+def test_parse_verdict_rejects_malformed_replies(reply):
+    with pytest.raises(ValueError):
+        parse_verdict(reply)
+
+
+class Verdict:
+    def __init__(self, comparison_json):
+        self.comparison_json = comparison_json
+
+
+@pytest.mark.parametrize("reply", ['["PASS"]', '{"similarity_score": "high"}'])
+def test_malformed_verdict_becomes_an_error_row(monkeypatch, reply):
+    pytest.importorskip("rich")
+    from modules import judge
+
+    monkeypatch.setattr(judge, "semantic_comparator", lambda **inputs: Verdict(reply))
+    row = judge.build_comparison_row(1, "q", "expected", "actual")
+    assert row["status"] == judge.STATUS_ERROR and row["reasoning"].startswith("Judge failed")
+
+
+def test_verdict_statuses(monkeypatch):
+    pytest.importorskip("rich")
+    from modules import judge
+
+    for reply, status in [('{"are_equivalent": true, "similarity_score": 95}', "PASS"),
+                          ('{"are_equivalent": false, "similarity_score": "75"}', "PARTIAL"),
+                          ('{"are_equivalent": false, "similarity_score": 20}', "FAIL")]:
+        monkeypatch.setattr(judge, "semantic_comparator", lambda reply=reply, **inputs: Verdict(reply))
+        assert judge.build_comparison_row(1, "q", "expected", "actual")["status"] == status
@@ -0,0 +1,79 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from modules import llm_cache as cache_module
+from modules.llm_cache import CachedPredictor, LLMCache, json_output, make_cache_key
+from modules.lm_registry import LMRegistry, lm_registry
+from modules.mock_lm import MockPrediction
+
+
+class EchoSignature:
+    instructions = "Answer in JSON."
+    input_fields = {"question": SimpleNamespace(json_schema_extra={"desc": "the question"})}
+    output_fields = {"answer_json": SimpleNamespace(json_schema_extra={"desc": "JSON answer"})}
+
+
+class FakeProgram:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = []
+
+    def __call__(self, config=None, **inputs):
+        self.calls.append({"config": config, **inputs})
+        return MockPrediction(answer_json=self.answer)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LLMCache(str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(cache_module, "llm_cache", store)
+    monkeypatch.setattr(lm_registry, "model", "mock")
+    return store
+
+
+def predictor(monkeypatch, answer, **kwargs):
+    program = FakeProgram(answer)
+    monkeypatch.setattr(CachedPredictor, "program", property(lambda self: program))
+    return CachedPredictor("echo", EchoSignature, validate=json_output("answer_json"), **kwargs), program
+
+
+def test_cache_key_covers_generation_settings():
+    base = make_cache_key("openai/gpt-4o-mini", EchoSignature, "ChainOfThought", {"question": "q"})
+    assert base == make_cache_key("openai/gpt-4o-mini", EchoSignature, "ChainOfThought", {"question": "q"}, {})
+    assert base != make_cache_key("openai/gpt-4o-mini", EchoSignature, "ChainOfThought", {"question": "q"}, {"temperature": 0.7})
+    assert base != make_cache_key("openai/gpt-4o-mini", EchoSignature, "Predict", {"question": "q"})
+
+
+def test_generation_kwargs_leave_out_transport_settings():
+    registry = LMRegistry("openai/gpt-4o-mini")
+    registry.configure(temperature=0.5, api_key="secret", num_retries=5)
+    assert registry.generation_kwargs() == {"temperature": 0.5, "max_tokens": 4000}
+    assert LMRegistry("mock").generation_kwargs() == {}
+
+
+def test_second_call_is_served_from_the_cache(store, monkeypatch):
+    llm, program = predictor(monkeypatch, '{"answer": 42}')
+    assert llm.peek(question="q") is None
+    assert llm(question="q").answer_json == '{"answer": 42}'
+    assert llm(question="q").answer_json == '{"answer": 42}'
+    assert len(program.calls) == 1
+    assert store.stats["echo"] == {"hits": 1, "misses": 1}
+    assert json.loads(llm.peek(question="q")["answer_json"]) == {"answer": 42}
+
+
+def test_unparseable_answer_is_not_cached(store, monkeypatch):
+    llm, program = predictor(monkeypatch, "Sure! The answer is 42.")
+    assert llm(question="q").answer_json == "Sure! The answer is 42."
+    llm(question="q")
+    assert len(program.calls) == 2
+    assert llm.peek(question="q") is None
+
+
+def test_bypass_skips_both_caches(store, monkeypatch):
+    llm, program = predictor(monkeypatch, '{"answer": 42}', bypass=True)
+    llm(question="q")
+    llm(question="q")
+    assert [call["config"] for call in program.calls] == [{"cache": False}, {"cache": False}]
+    assert store.stats == {}
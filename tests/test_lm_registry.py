@@ -0,0 +1,44 @@
+from collections import OrderedDict
+
+import pytest
+
+from modules import lm_registry as registry_module
+from modules.lm_registry import LMRegistry
+from modules.mock_lm import MockLM, MockPrediction
+
+
+@pytest.fixture(autouse=True)
+def without_dspy(monkeypatch):
+    # Answer without dspy's adapters, so the stand-in signature below needs no dspy fields
+    monkeypatch.setattr(registry_module, "mock_dspy", lambda: None)
+    monkeypatch.setattr(registry_module, "adapter_program", lambda *args: None)
+
+
+def test_registry_builds_nothing_until_asked():
+    registry = LMRegistry("mock")
+    assert registry._lm is None and registry.usage() == {}
+    assert registry.signature("collections:OrderedDict") is OrderedDict
+    assert registry._lm is None
+
+
+def test_mock_lm_is_created_once_and_reset_by_configure():
+    registry = LMRegistry("mock")
+    lm = registry.get_lm()
+    assert isinstance(lm, MockLM) and registry.get_lm() is lm
+    registry.configure(latency_ms=0)
+    assert registry.get_lm() is not lm and registry.get_lm().latency_ms == 0
+    registry.configure(model="mock/other")
+    assert registry.model == "mock/other" and registry.get_lm().model == "mock/other"
+
+
+def test_mock_programs_are_cached_per_signature():
+    class TestCaseTypeClassifierSignature:
+        instructions = ""
+        input_fields = {}
+
+    registry = LMRegistry("mock")
+    registry.configure(latency_ms=0, jitter_ms=0)
+    program = registry.program("ChainOfThought", TestCaseTypeClassifierSignature)
+    assert registry.program("ChainOfThought", TestCaseTypeClassifierSignature) is program
+    assert program(test_input="Greet the user").classification_json
+    assert isinstance(registry.prediction(answer="x"), MockPrediction)
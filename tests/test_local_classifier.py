@@ -0,0 +1,71 @@
+import json
+
+from modules import test_case_processor
+from modules.local_classifier import ClassificationStats, LabelLog, NaiveBayesClassifier, ngram_features
+
+TEXTS = [
+    "Booking confirmation message for a table of two",
+    "Booking confirmation email for a hotel room",
+    "Price of a room for one night in Paris",
+    "Greet the customer before taking the order",
+    "Greet the guest politely and ask for their name",
+    "Apologize to the guest for the late delivery",
+]
+LABELS = ["qa_test", "qa_test", "qa_test", "behavioral_test", "behavioral_test", "behavioral_test"]
+
+
+def trained():
+    return NaiveBayesClassifier().fit(TEXTS, LABELS)
+
+
+def test_ngram_features():
+    assert ngram_features("Greet the guest!") == ["greet", "the", "guest", "greet the", "the guest", "^greet"]
+
+
+def test_naive_bayes_learns_the_labels():
+    model = trained()
+    assert model.predict("Booking confirmation for a room")[0] == "qa_test"
+    assert model.predict("Greet the customer politely")[0] == "behavioral_test"
+    assert abs(sum(model.predict_proba("anything at all").values()) - 1.0) < 1e-9
+
+
+def test_saved_model_predicts_the_same(tmp_path):
+    path = str(tmp_path / "local_classifier.json")
+    model = trained()
+    model.save(path)
+    loaded = NaiveBayesClassifier.load(path)
+    assert loaded.trained_on == len(TEXTS)
+    assert loaded.predict_proba("Greet the guest") == model.predict_proba("Greet the guest")
+
+
+def test_missing_or_stale_model_is_not_loaded(tmp_path):
+    path = tmp_path / "local_classifier.json"
+    assert NaiveBayesClassifier.load(str(path)) is None
+    path.write_text(json.dumps({"version": 0, "labels": ["a", "b"]}), encoding="utf-8")
+    assert NaiveBayesClassifier.load(str(path)) is None
+
+
+def test_label_log_keeps_the_latest_label(tmp_path):
+    path = tmp_path / "labels.jsonl"
+    path.write_text('{"text": "a", "test_case_type": "qa_test"}\n', encoding="utf-8")
+    log = LabelLog(str(path))
+    log.record("a", "behavioral_test")
+    log.record("a", "qa_test")
+    log.record("b", "qa_test")
+    log._writer.close()
+    assert log.load() == (["a", "b"], ["behavioral_test", "qa_test"])
+
+
+def test_classify_locally_routes_rules_then_model(monkeypatch):
+    stats = ClassificationStats()
+    monkeypatch.setattr(test_case_processor, "classification_stats", stats)
+    monkeypatch.setattr(test_case_processor, "get_local_model", trained)
+
+    assert test_case_processor.classify_locally("If the user is rude, stay calm")["test_case_type"] == "behavioral_test"
+    local = test_case_processor.classify_locally("Booking confirmation for a room", confidence_threshold=0.5)
+    assert local["test_case_type"] == "qa_test" and local["reasoning"].startswith("Local classifier")
+    assert test_case_processor.classify_locally("Booking confirmation for a room", confidence_threshold=1.01) is None
+    assert stats.counts == {"rules": 1, "local": 1, "llm": 0}
+
+    monkeypatch.setattr(test_case_processor, "get_local_model", lambda: None)
+    assert test_case_processor.classify_locally("Booking confirmation for a room") is None
@@ -0,0 +1,65 @@
+import pytest
+
+from modules import metrics
+from modules.metrics import (
+    percentile,
+    prediction_usage,
+    record_cache_hit,
+    record_llm_call,
+    record_retry,
+    reused_metrics,
+    summarize_metrics,
+    summarize_stage,
+    track,
+)
+
+
+@pytest.fixture(autouse=True)
+def list_prices(monkeypatch):
+    monkeypatch.setattr(metrics, "PRICE_OVERRIDE", (None, None))
+
+
+def test_estimate_cost():
+    assert metrics.estimate_cost("openai/gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert metrics.estimate_cost("mock", 1000, 1000) == 0.0
+
+
+def test_nested_tracking_adds_inner_counts_to_the_outer_block():
+    record_llm_call("openai/gpt-4o-mini", 10, 10)
+    with track() as outer:
+        record_cache_hit()
+        with track() as inner:
+            record_llm_call("openai/gpt-4o-mini", 1000, 500)
+            record_retry()
+    assert (inner["llm_calls"], inner["prompt_tokens"], inner["retries"]) == (1, 1000, 1)
+    assert (outer["llm_calls"], outer["cache_hits"], outer["completion_tokens"], outer["retries"]) == (1, 1, 500, 1)
+    assert outer["cost_usd"] == pytest.approx(0.00045)
+    assert outer["latency_ms"] >= inner["latency_ms"] >= 0
+
+
+def test_prediction_usage_prefers_tracked_usage():
+    class Tracked:
+        def get_lm_usage(self):
+            return {"m": {"prompt_tokens": 12, "completion_tokens": 3}}
+
+    assert prediction_usage(Tracked(), "x" * 400, "y") == (12, 3)
+    assert prediction_usage(object(), "x" * 400, "y" * 40) == (100, 10)
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([4, 1, 3, 2], 50) == 2.5
+    assert percentile(list(range(101)), 95) == 95
+
+
+def test_summaries_leave_reused_rows_out_of_the_percentiles():
+    fresh = {**metrics.empty_metrics(), "latency_ms": 100.0, "llm_calls": 1, "cost_usd": 0.001}
+    stage = summarize_stage([fresh, {**fresh, "latency_ms": 300.0}, reused_metrics(), None], wall_s=1.23456)
+    assert (stage["tests"], stage["reused"], stage["llm_calls"], stage["wall_s"]) == (2, 1, 2, 1.235)
+    assert stage["latency_ms"]["p50"] == 200.0 and stage["latency_ms"]["mean"] == 200.0
+
+    rows = [{"metrics": {"ask": fresh, "judge": fresh}}, {"metrics": {"ask": reused_metrics()}}]
+    performance = summarize_metrics(rows)
+    assert performance["ask"]["reused"] == 1
+    assert performance["total"]["llm_calls"] == 2
+    assert performance["total"]["cost_usd"] == pytest.approx(0.002)
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from modules.comparison import parse_verdict
+from modules.mock_lm import MockLM, MockLMError, MockProgram, is_mock_model
+
+
+def mock(**kwargs):
+    return MockLM(**{"latency_ms": 0, "jitter_ms": 0, **kwargs})
+
+
+def test_mock_model_names():
+    assert is_mock_model("mock") and is_mock_model("mock/fast")
+    assert not is_mock_model("openai/gpt-4o-mini") and not is_mock_model("mockingbird")
+
+
+def test_answers_are_deterministic_and_schema_valid():
+    lm = mock()
+    inputs = {"user_query": "Can I book a room for Friday?"}
+    first, usage = lm.complete("BookingAgentSignature", "", inputs)
+    assert first == lm.complete("BookingAgentSignature", "", inputs)[0]
+    assert first["agent_response"].startswith("Agent:")
+    assert usage["prompt_tokens"] > 0 and lm.stats["calls"] == 2
+
+    verdict, _ = lm.complete("SemanticComparisonSignature", "", {
+        "question": "q", "expected_answer": "Your booking is confirmed", "actual_answer": "Agent: Your booking is confirmed.",
+    })
+    assert parse_verdict(verdict["comparison_json"])["are_equivalent"]
+
+    batch, _ = lm.complete("BatchTestCaseTypeClassifierSignature", "", {
+        "items_json": json.dumps([{"id": 0, "test_input": "What time? Answer: noon"}, {"id": 1, "test_input": "Greet users"}]),
+    })
+    assert [row["test_case_type"] for row in json.loads(batch["results_json"])] == ["qa_test", "behavioral_test"]
+
+
+def test_unknown_signature_fails():
+    with pytest.raises(MockLMError):
+        mock().complete("UnknownSignature", "", {})
+
+
+def test_injected_failures_are_repeatable_and_retryable():
+    inputs = {"test_input": "Greet the user"}
+    outcomes = []
+    for _ in range(2):
+        lm = mock(error_rate=0.5, seed="s")
+        attempts = []
+        for _ in range(20):
+            try:
+                lm.complete("TestCaseTypeClassifierSignature", "", inputs)
+                attempts.append("ok")
+                break
+            except MockLMError:
+                attempts.append("error")
+        outcomes.append(attempts)
+    assert outcomes[0] == outcomes[1] and outcomes[0][-1] == "ok"
+    with pytest.raises(MockLMError):
+        mock(error_rate=1.0).complete("TestCaseTypeClassifierSignature", "", inputs)
+
+
+def test_program_returns_a_prediction_with_usage():
+    program = MockProgram(mock(model="mock"), "TestCaseTypeClassifierSignature")
+    prediction = program(test_input="Q: opening hours? Answer: 9 to 5", config={"cache": False})
+    assert json.loads(prediction.classification_json)["test_case_type"] == "qa_test"
+    assert set(prediction.get_lm_usage()) == {"mock"}
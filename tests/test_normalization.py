@@ -0,0 +1,40 @@
+import pytest
+
+from modules.normalization import canonicalize_expected_output, clean_many, clean_text, clean_to_one_sentence
+
+TEXTS = [
+    "Agent: Sure — I can help! Anything else?",
+    "What is the price?? Thanks",
+    "No terminator here – ok",
+    "Email: jane@example.com (work), phone: 555-0100.",
+    "",
+]
+
+
+def test_clean_to_one_sentence_keeps_the_first_sentence():
+    assert clean_to_one_sentence("Agent: Sure — I can help! Anything else?") == "Agent: Sure - I can help Anything else?"
+    assert clean_to_one_sentence("What is the price?? Thanks") == "What is the price?"
+    assert clean_to_one_sentence("No terminator here – ok") == "No terminator here - ok"
+
+
+@pytest.mark.parametrize("options", [{}, {"normalize_dashes": False}, {"allowed_punct": ".!"}, {"allowed_punct": ""}])
+def test_clean_many_matches_clean_to_one_sentence(options):
+    assert clean_many(TEXTS, **options) == [clean_to_one_sentence(text, **options) for text in TEXTS]
+
+
+def test_clean_text_drops_speaker_prefixes():
+    assert clean_text("  User:  hello there ") == "hello there"
+    assert clean_text("agent : Done.") == "Done."
+    assert clean_text("") == ""
+
+
+def test_canonicalize_expected_output():
+    assert canonicalize_expected_output("agent - your booking is confirmed") == (
+        "Agent: Your booking is confirmed.", {"normalization": "agent_prefix_preserved"}
+    )
+    assert canonicalize_expected_output("the booking is confirmed") == (
+        "Agent: The booking is confirmed.", {"normalization": "fallback_agent_prefix"}
+    )
+    canonical, meta = canonicalize_expected_output("Ask for name, email; phone")
+    assert canonical == "Agent: To help you, please provide for name, email, phone."
+    assert meta == {"normalization": "list_to_agent_reply"}
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from modules.pipeline import Pipeline, Stage
+
+
+def pipeline(workers=2, max_in_flight=4):
+    return Pipeline(
+        [
+            Stage("double", lambda r: {"doubled": r["n"] * 2}, workers=workers),
+            Stage("label", lambda r: {"label": f"#{r['doubled']}"}, after=["double"]),
+        ],
+        max_in_flight=max_in_flight
+    )
+
+
+def test_pipeline_runs_every_record_in_input_order():
+    results = pipeline().run([{"n": n} for n in range(10)])
+    assert [r["label"] for r in results] == [f"#{n * 2}" for n in range(10)]
+
+
+def test_stage_callbacks_follow_the_dag():
+    events = []
+    finished = []
+    pipeline(workers=0).run(
+        [{"n": 1}],
+        on_stage=lambda name, idx, record: events.append(name),
+        on_record=lambda idx, record: finished.append(record["label"])
+    )
+    assert events == ["double", "label"]
+    assert finished == ["#2"]
+
+
+def test_failing_stage_skips_its_dependents_only():
+    def double(record):
+        if record["n"] == 3:
+            raise ValueError("bad row")
+        return {"doubled": record["n"] * 2}
+
+    results = Pipeline(
+        [Stage("double", double, workers=2), Stage("label", lambda r: {"label": r["doubled"]}, after=["double"])]
+    ).run([{"n": n} for n in range(5)])
+    assert results[3]["errors"] == {"double": "bad row"} and "label" not in results[3]
+    assert [r.get("label") for r in results] == [0, 2, 4, None, 8]
+
+
+def test_invalid_dags_are_rejected():
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", dict, after=["missing"])])
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", dict, after=["b"]), Stage("b", dict, after=["a"])])
+
+
+def test_empty_input():
+    assert pipeline().run([]) == []
+
+
+def test_should_stop_admits_no_more_records():
+    finished = []
+    results = pipeline(max_in_flight=1).run(
+        [{"n": n} for n in range(10)],
+        on_record=lambda idx, record: finished.append(idx),
+        should_stop=lambda: len(finished) >= 3
+    )
+    # One record in flight at a time, so exactly the first three were admitted
+    assert [r is not None for r in results] == [True] * 3 + [False] * 7
+    assert results[2]["label"] == "#4"
+
+
+def test_should_stop_before_start_returns():
+    assert pipeline().run([{"n": n} for n in range(5)], should_stop=lambda: True) == [None] * 5
+
+
+@pytest.mark.parametrize("callback", ["on_stage", "on_record"])
+def test_failing_callback_is_raised_instead_of_hanging(callback):
+    def explode(*args):
+        raise RuntimeError("callback failed")
+
+    outcome = []
+
+    def run():
+        try:
+            pipeline(max_in_flight=2).run([{"n": n} for n in range(10)], **{callback: explode})
+        except RuntimeError as e:
+            outcome.append(e)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert [str(e) for e in outcome] == ["callback failed"]
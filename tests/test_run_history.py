@@ -0,0 +1,56 @@
+from modules.run_history import RunHistory
+
+
+def row(test_id, question, status, score=50.0):
+    return {
+        "test_id": test_id,
+        "test_key": f"k{test_id}",
+        "question": question,
+        "expected_answer": f"answer {test_id}",
+        "status": status,
+        "similarity_score": score,
+        "metrics": {"ask": {"latency_ms": 10.0 * test_id}},
+    }
+
+
+def header(timestamp, pass_rate):
+    return {
+        "timestamp": timestamp,
+        "comparison_method": "tiered",
+        "summary": {"total_tests": 4, "passed": 2, "failed": 2, "pass_rate": pass_rate,
+                    "performance": {"ask": {"latency_ms": {"p50": 12.0, "p95": 40.0}}, "total": {"cost_usd": 0.01}}},
+    }
+
+
+def history(tmp_path):
+    store = RunHistory(str(tmp_path / "history.sqlite"))
+    store.record_run(header("2026-01-01T00:00:00", 50.0), [
+        row(1, "q1", "PASS"), row(2, "q2", "FAIL"), row(3, "q3", "PASS"), row(4, "q4", "ERROR"),
+    ], run_id="run-a")
+    store.record_run(header("2026-01-02T00:00:00", 75.0), [
+        row(1, "q1", "FAIL"), row(2, "q2", "PARTIAL"), row(3, "q3", "PASS"), row(5, "q5", "PASS"),
+    ], run_id="run-b")
+    return store
+
+
+def test_runs_are_listed_oldest_first(tmp_path):
+    store = history(tmp_path)
+    runs = store.runs()
+    assert [r["run_id"] for r in runs] == ["run-a", "run-b"]
+    assert (runs[0]["ask_p50_ms"], runs[0]["ask_p95_ms"], runs[0]["cost_usd"]) == (12.0, 40.0, 0.01)
+    assert [r["run_id"] for r in store.runs(limit=1)] == ["run-b"]
+
+
+def test_diff_reports_status_flips_and_membership(tmp_path):
+    diff = history(tmp_path).diff("run-a", "run-b")
+    assert [(r["test_key"], r["base_status"], r["status"]) for r in diff["newly_failing"]] == [("k1", "PASS", "FAIL")]
+    assert [(r["test_key"], r["question"]) for r in diff["newly_passing"]] == [("k2", "q2")]
+    assert (diff["added"], diff["removed"]) == (1, 1)
+
+
+def test_recording_a_run_again_replaces_its_results(tmp_path):
+    store = history(tmp_path)
+    store.record_run(header("2026-01-02T00:00:00", 100.0), [row(1, "q1", "PASS")], run_id="run-b")
+    assert [r["pass_rate"] for r in store.runs()] == [50.0, 100.0]
+    assert [r["status"] for r in store.test_history("k1")] == ["PASS", "PASS"]
+    assert store.test_history("k5") == []
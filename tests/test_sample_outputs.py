@@ -0,0 +1,49 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from modules.sampling import sample_path
+from modules.sharding import shard_path
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FULL_OUTPUTS = ["expected_results.json", "agent_responses.json", "comparison_report.json"]
+
+
+def test_sample_path():
+    assert sample_path("outputs/comparison_report.json", None) == "outputs/comparison_report.json"
+    assert sample_path("outputs/comparison_report.json", 0.1) == "outputs/comparison_report.sample.json"
+    assert shard_path(sample_path("outputs/manifest.json", 5), (2, 4)) == "outputs/manifest.sample.shard-2-of-4.json"
+
+
+def digests(directory: str) -> dict:
+    """sha256 of every file in `directory`"""
+    return {
+        name: hashlib.sha256(open(os.path.join(directory, name), "rb").read()).hexdigest()
+        for name in sorted(os.listdir(directory))
+    }
+
+
+def test_sampled_compare_leaves_full_outputs_alone(tmp_path):
+    pytest.importorskip("rich")
+    outputs = tmp_path / "outputs"
+    outputs.mkdir()
+    for name in FULL_OUTPUTS:
+        shutil.copy(os.path.join(REPO, "outputs", name), outputs / name)
+    before = digests(outputs)
+
+    subprocess.run(
+        [sys.executable, os.path.join(REPO, "compare.py"), "--model", "mock", "--method", "vector", "--sample", "2"],
+        cwd=tmp_path,
+        env={**os.environ, "RUN_HISTORY_DISABLE": "1", "LLM_CACHE_DISABLE": "1"},
+        check=True,
+        capture_output=True,
+    )
+
+    after = digests(outputs)
+    assert {name: after[name] for name in before} == before
+    assert "comparison_report.sample.json" in after
+    assert "manifest.json" not in after
@@ -0,0 +1,80 @@
+import argparse
+
+import pytest
+
+from modules.sampling import (
+    allocate,
+    parse_sample_size,
+    sample_records,
+    stratified_sample,
+    summarize_sample,
+    wilson_interval,
+)
+
+
+def suite(n):
+    return [
+        {"test_key": f"key-{i}", "question": f"q{i}", "test_case_type": "qa_test" if i % 3 else "behavioral_test"}
+        for i in range(n)
+    ]
+
+
+STATUSES = {f"key-{i}": ("FAIL" if i % 5 == 0 else "PASS") for i in range(0, 300, 2)}
+
+
+def test_parse_sample_size():
+    assert parse_sample_size("200") == 200
+    assert parse_sample_size("0.1") == 0.1
+    for value in ["0", "-3", "1.5", "many"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_sample_size(value)
+
+
+def test_same_seed_same_sample():
+    first = stratified_sample(suite(300), STATUSES, 40, seed=7)
+    assert stratified_sample(suite(300), STATUSES, 40, seed=7) == first
+    assert stratified_sample(suite(300), STATUSES, 40, seed=8)[0] != first[0]
+    positions, plan = first
+    assert len(positions) == plan["size"] == 40
+    assert positions == sorted(positions)
+
+
+def test_fraction_and_strata():
+    positions, plan = stratified_sample(suite(300), STATUSES, 0.1, seed=0)
+    assert plan["size"] == len(positions) == 30
+    assert sum(s["sampled"] for s in plan["strata"].values()) == 30
+    # Every stratum gets at least one draw when the sample can afford it
+    assert all(s["sampled"] >= 1 for s in plan["strata"].values())
+
+
+def test_allocate_never_exceeds_a_stratum():
+    counts = allocate({"a": 2, "b": 50, "c": 1}, 40)
+    assert sum(counts.values()) == 40
+    assert counts["a"] <= 2 and counts["c"] <= 1
+
+
+def test_sample_records_tags_strata():
+    rows, plan = sample_records(suite(30), STATUSES, 10, seed=1)
+    assert len(rows) == plan["size"]
+    assert all(row["stratum"] in plan["strata"] for row in rows)
+
+
+def test_wilson_interval_bounds():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(0, 20)
+    assert low == 0.0 and 0 < high < 0.25
+    low, high = wilson_interval(20, 20)
+    assert 0.75 < low < 1 and high == 1.0
+    low, high = wilson_interval(30, 60)
+    assert 0 < low < 0.5 < high < 1
+    # More tests, narrower interval
+    wide, narrow = wilson_interval(5, 10), wilson_interval(500, 1000)
+    assert narrow[1] - narrow[0] < wide[1] - wide[0]
+
+
+def test_summarize_whole_suite_has_zero_width():
+    rows, plan = sample_records(suite(12), {}, 12, seed=0)
+    for i, row in enumerate(rows):
+        row["status"] = "PASS" if i % 2 else "FAIL"
+    sample = summarize_sample(rows, plan)
+    assert sample["pass_rate_ci"][0] == sample["pass_rate_ci"][1] == sample["pass_rate_estimate"] == 50.0
@@ -0,0 +1,34 @@
+from modules.scheduling import EarlyAbort, count_failing, failure_first
+
+
+def test_failure_first_order():
+    keys = ["pass", "new", "fail", "partial", "error", "pass-2"]
+    statuses = {"pass": "PASS", "fail": "FAIL", "partial": "PARTIAL", "error": "ERROR", "pass-2": "PASS"}
+    assert [keys[p] for p in failure_first(keys, statuses)] == ["fail", "partial", "error", "new", "pass", "pass-2"]
+    assert count_failing(keys, statuses) == 3
+    assert failure_first(keys, {}) == list(range(len(keys)))
+
+
+def test_early_abort_waits_for_min_tests():
+    abort = EarlyAbort(threshold=50, min_tests=4)
+    for status in ["FAIL", "FAIL", "FAIL"]:
+        abort.record(status)
+    assert not abort.should_stop()
+    abort.record("FAIL")
+    assert abort.should_stop()
+    assert abort.describe()["judged"] == 4
+
+
+def test_early_abort_ignores_errors_and_passes():
+    abort = EarlyAbort(threshold=50, min_tests=2)
+    for status in ["ERROR", "ERROR", "ERROR", "PASS", "PARTIAL", "FAIL"]:
+        abort.record(status)
+    assert not abort.should_stop()
+    assert abort.judged == 3 and abort.pass_rate == 66.67
+
+
+def test_no_threshold_never_stops():
+    abort = EarlyAbort(threshold=None, min_tests=1)
+    for _ in range(10):
+        abort.record("FAIL")
+    assert not abort.should_stop()
@@ -0,0 +1,40 @@
+import argparse
+
+import pytest
+
+from modules.sharding import parse_shard, shard_of, select_shard, shard_path, shard_paths
+
+
+def records(n):
+    return [{"test_key": f"key-{i}", "question": f"q{i}"} for i in range(n)]
+
+
+def test_parse_shard():
+    assert parse_shard("3/8") == (3, 8)
+    for spec in ["0/4", "5/4", "1/0", "a/b", "3"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(spec)
+
+
+def test_split_is_stable_and_complete():
+    suite = records(200)
+    shards = [select_shard(suite, (index, 4)) for index in range(1, 5)]
+    assert sorted(r["test_key"] for shard in shards for r in shard) == sorted(r["test_key"] for r in suite)
+    # A test's shard depends only on its key: file order and other tests do not move it
+    assert [select_shard(list(reversed(suite)), (index, 4)) for index in range(1, 5)] == [list(reversed(s)) for s in shards]
+    assert select_shard(suite[:50], (2, 4)) == [r for r in shards[1] if r in suite[:50]]
+    assert all(shard_of("key-7", 4) == shard_of("key-7", 4) for _ in range(3))
+
+
+def test_unsharded_run_keeps_everything():
+    suite = records(10)
+    assert select_shard(suite, None) == suite
+
+
+def test_shard_paths():
+    assert shard_path("outputs/agent_responses.json", None) == "outputs/agent_responses.json"
+    assert shard_path("outputs/agent_responses.json", (3, 8)) == "outputs/agent_responses.shard-3-of-8.json"
+    assert shard_paths("outputs/manifest.json", 2) == [
+        "outputs/manifest.shard-1-of-2.json",
+        "outputs/manifest.shard-2-of-2.json",
+    ]
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from modules.similarity import HashingTfidfVectorizer, pairwise_cosine, vector_decisions
+
+
+def test_vectorizer_rows_are_unit_length_with_unique_features():
+    rows, cols, weights = HashingTfidfVectorizer(1024).fit_transform(["a a b", "b c", ""])
+    assert np.allclose(np.bincount(rows, weights=weights ** 2, minlength=3), [1.0, 1.0, 0.0])
+    assert len(set(zip(rows.tolist(), cols.tolist()))) == len(rows)
+
+
+def test_vectorizer_needs_a_power_of_two():
+    with pytest.raises(ValueError):
+        HashingTfidfVectorizer(1000)
+
+
+def test_pairwise_cosine():
+    scores = pairwise_cosine([
+        ("The cat sat.", "the cat sat"),
+        ("a b", "c d"),
+        ("Booking confirmed for Friday", "Your booking is confirmed for Friday"),
+        ("", "anything"),
+    ])
+    assert scores[0] == 100.0 and scores[1] == 0.0 and scores[3] == 0.0
+    assert 0 < scores[2] < 100
+    assert len(pairwise_cosine([])) == 0
+
+
+def test_pairwise_cosine_matches_dense_dot_products():
+    pairs = [("refund issued today", "the refund was issued"), ("yes", "no yes")]
+    rows, cols, weights = HashingTfidfVectorizer(1024).fit_transform([e for e, _ in pairs] + [a for _, a in pairs])
+    dense = np.zeros((4, 1024))
+    np.add.at(dense, (rows, cols), weights)
+    expected = np.round([dense[0] @ dense[2] * 100, dense[1] @ dense[3] * 100], 2)
+    assert np.allclose(pairwise_cosine(pairs, n_features=1024), expected)
+
+
+def test_vector_decisions_pass_at_the_threshold():
+    decisions = vector_decisions([("same words", "same words"), ("a b", "c d")], pass_score=80)
+    assert [d["are_equivalent"] for d in decisions] == [True, False]
+    assert {d["decided_by"] for d in decisions} == {"vector"}
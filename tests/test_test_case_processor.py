@@ -0,0 +1,68 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from modules import test_case_processor as processor
+from modules.local_classifier import ClassificationStats, LabelLog
+
+RAW = "Customer wants the opening hours; reply with 9 to 5 on weekdays"
+
+
+class Program:
+    def __init__(self, field, reply):
+        self.field = field
+        self.reply = reply
+        self.calls = 0
+
+    def __call__(self, **inputs):
+        self.calls += 1
+        return SimpleNamespace(**{self.field: self.reply if isinstance(self.reply, str) else json.dumps(self.reply)})
+
+
+@pytest.fixture
+def programs(monkeypatch, tmp_path):
+    monkeypatch.setattr(processor, "get_local_model", lambda: None)
+    monkeypatch.setattr(processor, "classification_stats", ClassificationStats())
+    monkeypatch.setattr(processor, "label_log", LabelLog(str(tmp_path / "labels.jsonl")))
+    programs = {
+        "fused_llm": Program("result_json", {
+            "test_case_type": "qa_test", "reasoning": "asks for hours",
+            "input_prompt": "What are your opening hours?", "expected_output": "9 to 5 on weekdays",
+        }),
+        "classifier_llm": Program("classification_json", {"test_case_type": "qa_test", "reasoning": "two-call"}),
+        "extractor_llm": Program("structured_json", {
+            "input_prompt": "What are your opening hours?", "expected_output": "9 to 5 on weekdays",
+        }),
+    }
+    for name, program in programs.items():
+        monkeypatch.setattr(processor, name, program)
+    return programs
+
+
+def test_fused_path_makes_one_call(programs):
+    case = processor.process_test_case(RAW, fused=True)
+    assert case["test_case_type"] == "qa_test" and case["reasoning"] == "asks for hours"
+    assert case["input_prompt"] == "What are your opening hours?"
+    assert case["expected_output"] == "Agent: 9 to 5 on weekdays."
+    assert [p.calls for p in programs.values()] == [1, 0, 0]
+
+
+@pytest.mark.parametrize("reply", ["not json", {"test_case_type": "qa_test", "input_prompt": "q"}, {"test_case_type": "other"}])
+def test_unusable_fused_answer_falls_back_to_two_calls(programs, reply):
+    programs["fused_llm"].reply = reply
+    case = processor.process_test_case(RAW, fused=True)
+    assert case["reasoning"] == "two-call"
+    assert case["expected_output"] == "Agent: 9 to 5 on weekdays."
+    assert [p.calls for p in programs.values()] == [1, 1, 1]
+
+
+def test_fused_path_is_opt_in(programs):
+    processor.process_test_case(RAW, fused=False)
+    assert [p.calls for p in programs.values()] == [0, 1, 1]
+
+
+def test_rules_skip_every_llm_call(programs):
+    case = processor.process_test_case("Question: opening hours? Answer: 9 to 5", fused=True)
+    assert case["test_case_type"] == "qa_test"
+    assert [p.calls for p in programs.values()] == [0, 0, 1]
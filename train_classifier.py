@@ -0,0 +1,75 @@
+import argparse
+import random
+from modules.local_classifier import (
+    NaiveBayesClassifier,
+    label_log,
+    MODEL_PATH,
+    LABELS_PATH,
+    CONFIDENCE_THRESHOLD,
+)
+from rich.console import Console
+from rich.panel import Panel
+
+# ------------------- CLI OPTIONS -------------------
+parser = argparse.ArgumentParser(
+    description="Retrain the local test-case classifier from the labels the LLM classifier produced."
+)
+parser.add_argument(
+    "--threshold",
+    type=float,
+    default=CONFIDENCE_THRESHOLD,
+    help=f"Confidence threshold to evaluate (runtime value: env LOCAL_CLASSIFIER_THRESHOLD, default {CONFIDENCE_THRESHOLD})"
+)
+parser.add_argument("--alpha", type=float, default=1.0, help="Laplace smoothing")
+parser.add_argument("--holdout", type=float, default=0.2, help="Share of labels held out for evaluation")
+parser.add_argument("--min-examples", type=int, default=20, help="Refuse to train on fewer labelled cases")
+args = parser.parse_args()
+
+console = Console()
+
+# ------------------- LOAD LABELS -------------------
+texts, labels = label_log.load()
+console.print(f"\n[bold cyan]📂 Loaded {len(texts)} LLM-labelled cases from {LABELS_PATH}[/bold cyan]")
+
+if len(texts) < args.min_examples or len(set(labels)) < 2:
+    console.print(
+        f"[red]❌ Need at least {args.min_examples} labelled cases covering both types "
+        f"(have {len(texts)}: {', '.join(sorted(set(labels))) or 'none'}).[/red]"
+    )
+    console.print("[yellow]💡 Labels are collected automatically whenever the LLM classifier runs.[/yellow]")
+    exit(1)
+
+# ------------------- EVALUATE ON A HOLDOUT -------------------
+order = list(range(len(texts)))
+random.Random(0).shuffle(order)
+split = max(1, int(len(order) * args.holdout))
+test_idx, train_idx = order[:split], order[split:]
+
+model = NaiveBayesClassifier(args.alpha).fit([texts[i] for i in train_idx], [labels[i] for i in train_idx])
+correct = confident = confident_correct = 0
+for i in test_idx:
+    label, confidence = model.predict(texts[i])
+    correct += label == labels[i]
+    if confidence >= args.threshold:
+        confident += 1
+        confident_correct += label == labels[i]
+
+accuracy = correct / len(test_idx) * 100
+coverage = confident / len(test_idx) * 100
+confident_accuracy = (confident_correct / confident * 100) if confident else 0.0
+
+# ------------------- TRAIN ON EVERYTHING & SAVE -------------------
+model = NaiveBayesClassifier(args.alpha).fit(texts, labels)
+model.save(MODEL_PATH)
+
+counts = ", ".join(f"{label}: {labels.count(label)}" for label in model.labels)
+console.print(Panel(
+    f"""[bold]Labelled cases:[/bold] {len(texts)} ({counts})
+[bold]Holdout accuracy:[/bold] {accuracy:.1f}% on {len(test_idx)} cases
+[bold]Confident at ≥ {args.threshold}:[/bold] {coverage:.1f}% of holdout (expected LLM avoidance after the rules)
+[bold]Accuracy when confident:[/bold] {confident_accuracy:.1f}%
+
+[dim]Model saved to {MODEL_PATH}[/dim]""",
+    title="[bold cyan]Local Classifier[/bold cyan]",
+    border_style="cyan"
+))